@@ -0,0 +1,17 @@
+"""
+Orbital TrIP — Array Helpers
+Small vectorized numpy building blocks shared by the screening and
+index modules.
+"""
+
+import numpy as np
+
+
+def ragged_arange(starts, counts):
+    """
+    Concatenated aranges: starts[i], starts[i] + 1, ... (counts[i] values)
+    for every i, in one vectorized pass.
+    """
+    starts, counts = np.asarray(starts), np.asarray(counts)
+    offsets = np.cumsum(counts) - counts
+    return np.arange(counts.sum()) - np.repeat(offsets, counts) + np.repeat(starts, counts)
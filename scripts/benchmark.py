@@ -0,0 +1,288 @@
+"""
+Orbital TrIP — Pipeline Benchmarks
+Times the pipeline stages on synthetic catalogs (synthetic_catalog.py)
+and writes throughput and peak RSS per stage and catalog size to a JSON
+results file, which later runs can be checked against.
+
+Stages (throughput unit):
+    propagate      propagate_satellite, scalar reference        points/s
+    propagate_vec  propagation.propagate_catalog, SatrecArray   points/s
+    sign           generate_breadcrumb_chain                    signatures/s
+    score          compute_trust_score, one object at a time    objects/s
+    score_vec      scoring.score_components, whole catalog      objects/s
+    screen         conjunctions.screen_catalog, whole catalog   objects/s
+    pipeline       run_pipeline end to end (ephemeral keys,     objects/s
+                   no cache, quiet, screening at --screen-km)
+
+The per-object stages (propagate, sign, score) run on an evenly strided
+sample of at most --sample objects, so the regime mix is kept and the
+30k size finishes in minutes; the vectorized stages and the pipeline
+take the whole catalog. Each (stage, size) runs in its own freshly
+spawned process, so the recorded peak RSS (ru_maxrss, plus any pipeline
+workers) belongs to that stage alone. Screening grows faster than
+linearly with catalog density (conjunctions.py --check holds it to a
+time and RSS budget at 10k objects); --screen-km 0 times the pipeline
+without it.
+
+With --baseline, every (stage, size) found in both files is compared;
+throughput more than --tolerance below the baseline, or peak RSS more
+than --tolerance above it, is a regression and the exit status is 1.
+
+Usage:
+    python3 benchmark.py [--sizes 100,1000,10000,30000] [--stages S,...] [--sample N]
+                         [--workers N] [--screen-km D] [--output PATH] [--baseline PATH [--tolerance F]]
+"""
+
+import json, multiprocessing, os, platform, resource, sys, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+import numpy as np
+import sgp4
+
+from conjunctions import SCREEN_KM
+from synthetic_catalog import synthetic_catalog
+
+SIZES = (100, 1_000, 10_000, 30_000)
+STAGES = ("propagate", "propagate_vec", "sign", "score", "score_vec", "screen", "pipeline")
+SAMPLE = 1_000          # objects for the per-object stages
+TOLERANCE = 0.20        # allowed fractional slowdown / RSS growth vs baseline
+RESULTS_PATH = "benchmark_results.json"
+
+
+def _peak_rss_mb():
+    """Peak resident set of this process and its reaped children, MB."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KB on Linux
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / scale, 1)
+
+
+def _sample(pairs, cap):
+    step = max(1, len(pairs) // cap)
+    return pairs[::step][:cap]
+
+
+# ============================================================
+# STAGES — each returns (objects, items, unit, seconds)
+# ============================================================
+def _bench_propagate(pairs, opts):
+    from orbital_trip_pipeline_v2 import propagate_satellite
+
+    pairs = _sample(pairs, opts["sample"])
+    t0 = time.perf_counter()
+    points = sum(len(propagate_satellite(e["tle1"], e["tle2"])) for _, e in pairs)
+    return len(pairs), points, "points", time.perf_counter() - t0
+
+
+def _bench_propagate_vec(pairs, opts):
+    from propagation import propagate_catalog, positions_from_batch
+    from orbital_trip_pipeline_v2 import PROPAGATION_END, PROPAGATION_HOURS, INTERVAL_MINUTES, PROPAGATION_CHUNK
+
+    tles = [(n, e["tle1"], e["tle2"]) for n, e in pairs]
+    points = 0
+    t0 = time.perf_counter()
+    for i in range(0, len(tles), PROPAGATION_CHUNK):
+        batch = propagate_catalog(tles[i:i + PROPAGATION_CHUNK], PROPAGATION_END, PROPAGATION_HOURS,
+                                  INTERVAL_MINUTES)
+        points += sum(len(p) for _, p in positions_from_batch(batch))
+    return len(tles), points, "points", time.perf_counter() - t0
+
+
+def _sample_positions(pairs, sample):
+    from propagation import propagate_catalog, positions_from_batch
+    from orbital_trip_pipeline_v2 import PROPAGATION_END, PROPAGATION_HOURS, INTERVAL_MINUTES
+
+    pairs = _sample(pairs, sample)
+    batch = propagate_catalog([(n, e["tle1"], e["tle2"]) for n, e in pairs], PROPAGATION_END,
+                              PROPAGATION_HOURS, INTERVAL_MINUTES)
+    entries = dict(pairs)
+    return [(name, entries[name], positions) for name, positions in positions_from_batch(batch)]
+
+
+def _bench_sign(pairs, opts):
+    from nacl.signing import SigningKey
+    from orbital_trip_pipeline_v2 import generate_breadcrumb_chain
+
+    jobs = _sample_positions(pairs, opts["sample"])
+    key = SigningKey(bytes(32))
+    t0 = time.perf_counter()
+    signatures = sum(generate_breadcrumb_chain(name, positions, key)["appended"] for name, _, positions in jobs)
+    return len(jobs), signatures, "signatures", time.perf_counter() - t0
+
+
+def _bench_score(pairs, opts):
+    from orbital_trip_pipeline_v2 import compute_trust_score
+
+    jobs = _sample_positions(pairs, opts["sample"])
+    t0 = time.perf_counter()
+    for name, entry, positions in jobs:
+        compute_trust_score(name, positions, entry["category"])
+    return len(jobs), len(jobs), "objects", time.perf_counter() - t0
+
+
+def _bench_score_vec(pairs, opts):
+    from propagation import propagate_catalog, geodetic_from_batch
+    from scoring import ScoreAccumulators, score_components
+    from orbital_trip_pipeline_v2 import PROPAGATION_END, PROPAGATION_HOURS, INTERVAL_MINUTES, PROPAGATION_CHUNK
+
+    chunks = []
+    for i in range(0, len(pairs), PROPAGATION_CHUNK):
+        part = pairs[i:i + PROPAGATION_CHUNK]
+        batch = propagate_catalog([(n, e["tle1"], e["tle2"]) for n, e in part], PROPAGATION_END,
+                                  PROPAGATION_HOURS, INTERVAL_MINUTES)
+        lat, _, alt = geodetic_from_batch(batch)
+        chunks.append((lat, alt, batch["e"] == 0, batch["epochs"], [e["category"] for _, e in part]))
+
+    t0 = time.perf_counter()
+    for lat, alt, valid, epochs, categories in chunks:
+        acc = ScoreAccumulators(len(categories))
+        acc.update(alt, lat, valid, epochs)
+        score_components(categories, acc)
+    return len(pairs), len(pairs), "objects", time.perf_counter() - t0
+
+
+def _bench_screen(pairs, opts):
+    from datetime import timedelta
+    from conjunctions import screen_catalog
+    from orbital_trip_pipeline_v2 import PROPAGATION_END, PROPAGATION_HOURS
+
+    tles = [(n, e["tle1"], e["tle2"]) for n, e in pairs]
+    t0 = time.perf_counter()
+    screen_catalog(tles, PROPAGATION_END - timedelta(hours=PROPAGATION_HOURS), PROPAGATION_END,
+                   opts["screen_km"] or SCREEN_KM)
+    return len(tles), len(tles), "objects", time.perf_counter() - t0
+
+
+def _bench_pipeline(pairs, opts):
+    from orbital_trip_pipeline_v2 import run_pipeline
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        t0 = time.perf_counter()
+        with redirect_stdout(devnull):
+            run_pipeline(output_path=os.path.join(tmp, "out.json"), workers=opts["workers"], state_dir=None,
+                         cache_dir=None, screen_km=opts["screen_km"], catalog=pairs, quiet=True)
+        elapsed = time.perf_counter() - t0
+    return len(pairs), len(pairs), "objects", elapsed
+
+
+BENCHES = {
+    "propagate": _bench_propagate,
+    "propagate_vec": _bench_propagate_vec,
+    "sign": _bench_sign,
+    "score": _bench_score,
+    "score_vec": _bench_score_vec,
+    "screen": _bench_screen,
+    "pipeline": _bench_pipeline,
+}
+
+
+def run_stage(stage, size, opts):
+    """One measurement; meant to run in a fresh process (see run_benchmarks)."""
+    pairs = list(synthetic_catalog(size, opts["seed"]))
+    objects, items, unit, seconds = BENCHES[stage](pairs, opts)
+    return {
+        "stage": stage, "size": size, "objects": objects,
+        "items": items, "unit": unit, "seconds": round(seconds, 4),
+        "throughput": round(items / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_benchmarks(sizes=SIZES, stages=STAGES, sample=SAMPLE, workers=1, screen_km=SCREEN_KM, seed=0):
+    """Results document for every (stage, size), each measured in its own spawned process."""
+    opts = {"sample": sample, "workers": workers, "screen_km": screen_km, "seed": seed}
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for size in sizes:
+        for stage in stages:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                r = pool.submit(run_stage, stage, size, opts).result()
+            print(f"  {stage:14} {size:>6}  {r['throughput']:>12,.1f} {r['unit'] + '/s':12}"
+                  f"  {r['seconds']:8.2f}s  {r['peak_rss_mb']:7.1f} MB", flush=True)
+            results.append(r)
+    return {
+        "version": 1,
+        "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": {
+            "platform": platform.platform(), "python": platform.python_version(),
+            "numpy": np.__version__, "sgp4": sgp4.__version__, "cpus": os.cpu_count(),
+        },
+        "config": opts,
+        "results": results,
+    }
+
+
+# ============================================================
+# BASELINE COMPARISON
+# ============================================================
+def compare(current, baseline, tolerance=TOLERANCE):
+    """
+    Per (stage, size) present in both result documents: throughput and
+    peak RSS ratios (current / baseline) and whether either regressed.
+    """
+    base = {(r["stage"], r["size"]): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        b = base.get((r["stage"], r["size"]))
+        if b is None or not b.get("throughput") or not r.get("throughput"):
+            continue
+        speed = r["throughput"] / b["throughput"]
+        rss = r["peak_rss_mb"] / b["peak_rss_mb"] if b.get("peak_rss_mb") else 1.0
+        rows.append({
+            "stage": r["stage"], "size": r["size"],
+            "throughput": round(speed, 3), "peak_rss": round(rss, 3),
+            "regressed": speed < 1 - tolerance or rss > 1 + tolerance,
+        })
+    return rows
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the Orbital TrIP pipeline on synthetic catalogs")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="comma-separated catalog sizes (default: %(default)s)")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages (default: all)")
+    parser.add_argument("--sample", type=int, default=SAMPLE,
+                        help="objects for the per-object stages (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1, help="run_pipeline workers (default: 1)")
+    parser.add_argument("--screen-km", type=float, default=SCREEN_KM,
+                        help="pipeline conjunction screening distance, 0 to skip (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic catalog seed")
+    parser.add_argument("--output", default=RESULTS_PATH, help="results JSON (default: %(default)s)")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed throughput drop / RSS growth as a fraction (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = [s for s in stages if s not in BENCHES]
+    if unknown:
+        parser.error(f"unknown stage(s) {', '.join(unknown)}; choose from {', '.join(STAGES)}")
+
+    print(f"\n  {'stage':14} {'size':>6}  {'throughput':>25}  {'time':>8}  {'peak RSS':>10}")
+    current = run_benchmarks([int(s) for s in args.sizes.split(",") if s], stages,
+                             args.sample, max(1, args.workers), args.screen_km, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=1)
+    print(f"\n  ✓ Results: {args.output}")
+
+    if not args.baseline:
+        print()
+        return 0
+    with open(args.baseline) as f:
+        rows = compare(current, json.load(f), args.tolerance)
+    print(f"\n  vs {args.baseline} (tolerance {args.tolerance:.0%})")
+    for row in rows:
+        flag = "[FAIL]" if row["regressed"] else "  ok  "
+        print(f"  {flag} {row['stage']:14} {row['size']:>6}  throughput x{row['throughput']:.2f}"
+              f"  peak RSS x{row['peak_rss']:.2f}")
+    regressed = sum(row["regressed"] for row in rows)
+    print(f"\n  {len(rows)} compared, {regressed} regressed\n")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
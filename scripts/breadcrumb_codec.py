@@ -0,0 +1,161 @@
+"""
+Orbital TrIP — Canonical Breadcrumb Encoding
+Fixed-layout binary record that is hashed and signed for each
+breadcrumb, replacing json.dumps(..., sort_keys=True) per crumb.
+
+trip-bc/1 layout (big-endian, 89 bytes):
+    B    version      (1)
+    I    index        (4)
+    32s  key id       (32)  raw Ed25519 public key
+    q    epoch        (8)   seconds since 1970-01-01T00:00:00Z
+    i    lat          (4)   1e-7 degrees
+    i    lon          (4)   1e-7 degrees
+    i    alt          (4)   metres
+    32s  prev hash    (32)  raw SHA-256 of previous record (zeros at genesis)
+
+json-legacy reproduces the v0.2 sorted-key JSON bytes so chains signed
+before trip-bc/1 still verify.
+
+Signatures are stored in full as unpadded base64url (86 chars) rather
+than truncated hex.
+
+Usage:
+    python3 breadcrumb_codec.py        # encoding micro-benchmark
+"""
+
+import base64, json, struct
+from datetime import datetime, timezone
+
+ENCODING_BINARY = "trip-bc/1"
+ENCODING_LEGACY = "json-legacy"
+ENCODINGS = (ENCODING_BINARY, ENCODING_LEGACY)
+
+_VERSION = 1
+_RECORD = struct.Struct(">BI32sqiii32s")
+RECORD_SIZE = _RECORD.size
+LATLON_SCALE = 10_000_000  # 1e-7 deg
+ALT_SCALE = 1000           # km -> m
+
+GENESIS_PREV = "0" * 64
+
+
+# ============================================================
+# TRIP-BC/1
+# ============================================================
+def encode_breadcrumb(index, public_key, epoch, lat, lon, alt, prev):
+    """Pack one breadcrumb. `public_key`/`prev` are raw 32-byte values."""
+    return _RECORD.pack(
+        _VERSION, index, public_key, epoch,
+        round(lat * LATLON_SCALE), round(lon * LATLON_SCALE), round(alt * ALT_SCALE),
+        prev,
+    )
+
+
+def decode_breadcrumb(record):
+    """Unpack a trip-bc/1 record back into a breadcrumb dict."""
+    version, index, public_key, epoch, lat, lon, alt, prev = _RECORD.unpack(record)
+    if version != _VERSION:
+        raise ValueError(f"unsupported breadcrumb version {version}")
+    return {
+        "i": index,
+        "id": public_key.hex(),
+        "ts": datetime.fromtimestamp(epoch, timezone.utc).isoformat(),
+        "epoch": epoch,
+        "lat": lat / LATLON_SCALE,
+        "lon": lon / LATLON_SCALE,
+        "alt": alt / ALT_SCALE,
+        "prev": prev.hex(),
+    }
+
+
+# ============================================================
+# JSON-LEGACY
+# ============================================================
+def encode_legacy(breadcrumb):
+    """The v0.2 signing payload: sorted-key JSON of i/id/ts/lat/lon/alt/prev."""
+    fields = {k: breadcrumb[k] for k in ("i", "id", "ts", "lat", "lon", "alt", "prev")}
+    return json.dumps(fields, sort_keys=True).encode()
+
+
+def decode_legacy(content):
+    return json.loads(content)
+
+
+# ============================================================
+# SIGNATURES
+# ============================================================
+SIGNATURE_SIZE = 64
+
+
+def encode_signature(signature):
+    """64-byte Ed25519 signature -> 86-char unpadded base64url."""
+    return base64.urlsafe_b64encode(signature).rstrip(b"=").decode()
+
+
+def decode_signature(text):
+    """Inverse of encode_signature; rejects the old truncated hex form."""
+    raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+    if len(raw) != SIGNATURE_SIZE:
+        raise ValueError(f"signature is {len(raw)} bytes, expected {SIGNATURE_SIZE}")
+    return raw
+
+
+# ============================================================
+# DISPATCH
+# ============================================================
+def canonical_bytes(breadcrumb, encoding=ENCODING_BINARY):
+    """Signing payload for a breadcrumb dict under the given encoding."""
+    if encoding == ENCODING_BINARY:
+        return encode_breadcrumb(
+            breadcrumb["i"], bytes.fromhex(breadcrumb["id"]), breadcrumb["epoch"],
+            breadcrumb["lat"], breadcrumb["lon"], breadcrumb["alt"],
+            bytes.fromhex(breadcrumb["prev"]),
+        )
+    if encoding == ENCODING_LEGACY:
+        return encode_legacy(breadcrumb)
+    raise ValueError(f"unknown breadcrumb encoding {encoding!r}")
+
+
+def describe(encoding):
+    """Block for the output `crypto` section declaring the encoding."""
+    if encoding == ENCODING_LEGACY:
+        return {"encoding": ENCODING_LEGACY, "format": "json(sort_keys=True)"}
+    return {
+        "encoding": ENCODING_BINARY,
+        "layout": _RECORD.format,
+        "size": RECORD_SIZE,
+        "fields": ["version", "i", "pk", "epoch", "lat_e7", "lon_e7", "alt_m", "prev"],
+    }
+
+
+if __name__ == "__main__":
+    import hashlib, timeit
+    from nacl.signing import SigningKey
+
+    sk = SigningKey.generate()
+    pk = sk.verify_key.encode()
+    crumb = {"i": 42, "id": pk.hex(), "ts": "2025-02-08T12:30:00+00:00", "epoch": 1739017800,
+             "lat": 51.6387, "lon": -120.1234, "alt": 418.9, "prev": "ab" * 32}
+    prev = bytes.fromhex(crumb["prev"])
+    n = 20000
+
+    def legacy():
+        content = encode_legacy(crumb)
+        hashlib.sha256(content).digest()
+
+    def binary():
+        content = encode_breadcrumb(crumb["i"], pk, crumb["epoch"], crumb["lat"],
+                                    crumb["lon"], crumb["alt"], prev)
+        hashlib.sha256(content).digest()
+
+    def sign():
+        sk.sign(encode_breadcrumb(crumb["i"], pk, crumb["epoch"], crumb["lat"],
+                                  crumb["lon"], crumb["alt"], prev))
+
+    assert decode_breadcrumb(canonical_bytes(crumb))["lat"] == crumb["lat"]
+    print(f"\n  Breadcrumb encoding benchmark ({n:,} crumbs)\n")
+    for label, fn in (("json-legacy + sha256", legacy), ("trip-bc/1 + sha256", binary),
+                      ("trip-bc/1 + ed25519", sign)):
+        t = timeit.timeit(fn, number=n)
+        print(f"  {label:22} {t / n * 1e6:7.2f} µs/crumb  {n / t:12,.0f} crumbs/s")
+    print(f"\n  Record size: {RECORD_SIZE} B binary vs {len(encode_legacy(crumb))} B JSON\n")
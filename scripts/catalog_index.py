@@ -0,0 +1,197 @@
+"""
+Orbital TrIP — Indexed In-Memory Catalog
+Compact __slots__ records plus secondary indexes built once, so lookups
+by NORAD ID, name, category, operator or orbital regime are O(1) and a
+run can be scoped to a filtered subset without scanning the catalog.
+
+Regimes (from TLE line 2 mean motion n, rev/day, and eccentricity e):
+    HEO   e >= 0.25
+    LEO   n >= 11.25            (period <= 128 min)
+    GEO   0.9 <= n <= 1.1
+    MEO   everything else
+
+Records also answer record["category"] / record.get("story"), so code
+written against get_full_catalog() dict entries keeps working.
+"""
+
+REGIMES = ("LEO", "MEO", "GEO", "HEO")
+
+
+def orbital_regime(tle2):
+    try:
+        mean_motion = float(tle2[52:63])
+        ecc = float("0." + tle2[26:33].strip())
+    except (TypeError, ValueError):
+        return None
+    if ecc >= 0.25:
+        return "HEO"
+    if mean_motion >= 11.25:
+        return "LEO"
+    if 0.9 <= mean_motion <= 1.1:
+        return "GEO"
+    return "MEO"
+
+
+# ============================================================
+# RECORDS
+# ============================================================
+class SatelliteRecord:
+    """One catalog object; dict-style access for pipeline compatibility."""
+
+    __slots__ = ("name", "norad", "cospar", "operator", "category", "tle1", "tle2",
+                 "is_story", "story", "regime", "pos")
+
+    def __init__(self, name, entry, pos=0):
+        self.name = name
+        self.norad = entry["norad"]
+        self.cospar = entry.get("cospar")
+        self.operator = entry.get("operator", "Unknown")
+        self.category = entry.get("category", "Unknown")
+        self.tle1 = entry.get("tle1")
+        self.tle2 = entry.get("tle2")
+        self.is_story = bool(entry.get("is_story"))
+        self.story = entry.get("story")
+        self.regime = orbital_regime(self.tle2)
+        self.pos = pos  # catalog order, so filtered iteration stays stable
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __getstate__(self):
+        return tuple(getattr(self, k) for k in self.__slots__)
+
+    def __setstate__(self, state):
+        for k, v in zip(self.__slots__, state):
+            setattr(self, k, v)
+
+
+# ============================================================
+# INDEX
+# ============================================================
+class CatalogIndex:
+    """Name/NORAD primary maps plus category, operator and regime indexes."""
+
+    FIELDS = ("category", "operator", "regime")
+
+    def __init__(self, pairs=()):
+        self.by_name = {}
+        self.by_norad = {}
+        self._indexes = {f: {} for f in self.FIELDS}
+        for name, entry in pairs:
+            self.add(name, entry)
+
+    def add(self, name, entry):
+        """Index a record; re-adding a name replaces its record in every index, keeping its position."""
+        old = self.by_name.get(name)
+        pos = old.pos if old is not None else len(self.by_name)
+        rec = entry if isinstance(entry, SatelliteRecord) else SatelliteRecord(name, entry, pos)
+        if old is not None:
+            self._unindex(old)
+        self.by_name[name] = rec
+        self.by_norad[rec.norad] = rec
+        for field in self.FIELDS:
+            value = getattr(rec, field)
+            if value is not None:
+                self._indexes[field].setdefault(value.casefold(), []).append(rec)
+        return rec
+
+    def _unindex(self, rec):
+        if self.by_norad.get(rec.norad) is rec:
+            del self.by_norad[rec.norad]
+        for field in self.FIELDS:
+            value = getattr(rec, field)
+            if value is None:
+                continue
+            bucket = self._indexes[field].get(value.casefold(), [])
+            bucket[:] = [r for r in bucket if r is not rec]
+            if not bucket:
+                self._indexes[field].pop(value.casefold(), None)
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def __getitem__(self, name):
+        return self.by_name[name]
+
+    def __iter__(self):
+        return iter(self.by_name)
+
+    def items(self):
+        return self.by_name.items()
+
+    def norad(self, norad):
+        return self.by_norad.get(int(norad))
+
+    def counts(self, field):
+        """Objects per category / operator / regime, from the index sizes."""
+        out = {}
+        for recs in self._indexes[field].values():
+            out[getattr(recs[0], field)] = len(recs)
+        return out
+
+    def filter(self, category=None, operator=None, regime=None):
+        """
+        Yield (name, record) in catalog order. Each argument is a value or
+        list of values (OR within a field, AND across fields, case-insensitive);
+        only the smallest matching index bucket is walked.
+        """
+        wanted = {f: v for f, v in zip(self.FIELDS, (category, operator, regime)) if v}
+        if not wanted:
+            yield from self.by_name.items()
+            return
+
+        sets = []
+        for field, values in wanted.items():
+            values = [values] if isinstance(values, str) else values
+            bucket = []
+            for v in values:
+                bucket += self._indexes[field].get(v.casefold(), [])
+            sets.append(bucket)
+        sets.sort(key=len)
+        others = [{id(r) for r in s} for s in sets[1:]]
+        for rec in sorted(sets[0], key=lambda r: r.pos):
+            if all(id(rec) in s for s in others):
+                yield rec.name, rec
+
+
+if __name__ == "__main__":
+    import sys, time
+    from satellite_catalog import get_full_catalog
+
+    index = CatalogIndex(get_full_catalog().items())
+    print(f"\n  {len(index)} objects indexed")
+    for field in CatalogIndex.FIELDS:
+        print(f"  {field:9} {dict(sorted(index.counts(field).items(), key=lambda x: -x[1]))}")
+
+    # Lookup cost vs scanning the dict catalog, on a 30k-object replica
+    big = CatalogIndex()
+    base = list(get_full_catalog().items())
+    for i in range(30_000):
+        name, entry = base[i % len(base)]
+        big.add(f"{name} #{i}", dict(entry, norad=100_000 + i))
+    plain = {name: {"norad": rec.norad, "category": rec.category} for name, rec in big.items()}
+
+    t0 = time.perf_counter()
+    for n in range(100_000, 130_000, 30):
+        next(e for e in plain.values() if e["norad"] == n)
+    scan = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for n in range(100_000, 130_000, 30):
+        big.norad(n)
+    indexed = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    debris = sum(1 for _ in big.filter(category="Debris"))
+    print(f"\n  30k objects: 1000 NORAD lookups {scan * 1e3:.1f} ms scanned vs {indexed * 1e3:.2f} ms indexed")
+    print(f"  filter(category='Debris'): {debris} objects in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+    print(f"  record size: {sys.getsizeof(next(iter(big.by_name.values())))} bytes (__slots__) "
+          f"vs {sys.getsizeof(dict(base[0][1]))} bytes (dict)\n")
@@ -0,0 +1,323 @@
+"""
+Orbital TrIP — Bulk TLE / OMM Catalog Loader
+Streams element sets from files on disk instead of the dict literals in
+satellite_catalog.py, so the pipeline can run over the full public
+catalog (~30k objects).
+
+Sources (picked by extension):
+    .tle .txt .3le   2LE or 3LE text ("0 NAME" or bare name lines optional)
+    .json            CCSDS OMM as a JSON array (CelesTrak/Space-Track keys)
+    .csv             CCSDS OMM as CSV with the same column names
+    .xml             CCSDS OMM XML (<omm> ... <segment> per object)
+
+TLE lines must pass their mod-10 checksum; OMM records are converted to
+TLE lines through sgp4, so everything downstream sees one format. When
+a NORAD ID appears more than once (across files or within one), the
+newest epoch wins.
+
+Loading is two passes: the first keeps only (epoch, record number) per
+NORAD ID, the second re-streams the files and yields the winners, so
+memory stays proportional to the ID table, not the element sets.
+
+Category, operator, name and story metadata come from an overlay JSON
+file keyed by NORAD ID:
+    {"40258": {"name": "LUCH (OLYMP-K1)", "category": "Suspicious",
+               "operator": "Russian MOD", "story": {...}}, ...}
+
+Usage:
+    python3 catalog_loader.py FILE... [--overlay PATH]
+    python3 catalog_loader.py --export-embedded DIR   # 3LE + overlay from satellite_catalog.py
+"""
+
+import csv, json, os
+import xml.etree.ElementTree as ET
+
+from sgp4.api import Satrec
+from sgp4 import exporter, omm
+
+TLE_EXTENSIONS = (".tle", ".txt", ".3le")
+_CHECKSUM_VALUES = bytes(i - 48 if 48 <= i <= 57 else 1 if i == 45 else 0 for i in range(256))
+
+
+def tle_checksum(line):
+    """Mod-10 checksum of the first 68 columns: digits count face value, '-' counts 1."""
+    return sum(line[:68].encode("latin-1").translate(_CHECKSUM_VALUES)) % 10
+
+
+def tle_valid(line1, line2):
+    return (len(line1) >= 69 and len(line2) >= 69 and line1[0] == "1" and line2[0] == "2"
+            and line1[2:7] == line2[2:7]
+            and line1[68] in "0123456789" and line2[68] in "0123456789"
+            and tle_checksum(line1) == int(line1[68]) and tle_checksum(line2) == int(line2[68]))
+
+
+def tle_epoch(line1):
+    """TLE epoch as a sortable float: 4-digit year * 1000 + day of year."""
+    yy = int(line1[18:20])
+    return (2000 + yy if yy < 57 else 1900 + yy) * 1000 + float(line1[20:32])
+
+
+# ============================================================
+# SOURCE READERS — each yields (name, tle1, tle2) or raises ValueError per record
+# ============================================================
+def _read_tle(path):
+    name = None
+    with open(path) as f:
+        line1 = None
+        for raw in f:
+            line = raw.rstrip("\r\n")
+            if not line.strip():
+                continue
+            if line1 is not None:
+                yield name, line1, line
+                name = line1 = None
+            elif line.startswith("1 ") and len(line) >= 69:
+                line1 = line
+            elif line.startswith("0 "):
+                name = line[2:].strip()
+            else:
+                name = line.strip()
+
+
+def _omm_to_tle(fields):
+    fields = {k.upper(): (v.strip() if isinstance(v, str) else v) for k, v in fields.items()}
+    fields = {k: str(v) for k, v in fields.items() if v is not None}
+    if "." not in fields.get("EPOCH", "."):
+        fields["EPOCH"] += ".000000"
+    fields.setdefault("CLASSIFICATION_TYPE", "U")
+    fields.setdefault("EPHEMERIS_TYPE", "0")
+    fields.setdefault("ELEMENT_SET_NO", "999")
+    fields.setdefault("REV_AT_EPOCH", "0")
+    fields.setdefault("OBJECT_ID", "")
+    sat = Satrec()
+    try:
+        omm.initialize(sat, fields)
+    except KeyError as e:
+        raise ValueError(f"OMM record missing {e.args[0]}") from None
+    line1, line2 = exporter.export_tle(sat)
+    return fields.get("OBJECT_NAME"), line1, line2
+
+
+def _iter_json_array(path, chunk_size=1 << 16):
+    """Yield the objects of a top-level JSON array without loading the file."""
+    decoder = json.JSONDecoder()
+    with open(path) as f:
+        buf, started = "", False
+        while True:
+            chunk = f.read(chunk_size)
+            buf += chunk
+            while True:
+                buf = buf.lstrip()
+                if not started:
+                    if not buf:
+                        break
+                    if buf[0] != "[":
+                        raise ValueError(f"{path}: expected a JSON array of OMM records")
+                    buf, started = buf[1:], True
+                    continue
+                buf = buf.lstrip(",").lstrip()
+                if not buf or buf[0] == "]":
+                    break
+                try:
+                    obj, end = decoder.raw_decode(buf)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    break  # object continues in the next chunk
+                yield obj
+                buf = buf[end:]
+            if not chunk:
+                return
+
+
+def _read_omm_json(path):
+    for record in _iter_json_array(path):
+        yield lambda record=record: _omm_to_tle(record)
+
+
+def _read_omm_csv(path):
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield lambda row=row: _omm_to_tle(row)
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _read_omm_xml(path):
+    for _, elem in ET.iterparse(path):
+        if _local(elem.tag) != "segment":
+            continue
+        fields = {_local(e.tag): e.text for e in elem.iter() if len(e) == 0 and e.text}
+        elem.clear()
+        yield lambda fields=fields: _omm_to_tle(fields)
+
+
+def _read_source(path):
+    """Yield per-record thunks returning (name, tle1, tle2)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in TLE_EXTENSIONS:
+        return (lambda rec=rec: rec for rec in _read_tle(path))
+    if ext == ".json":
+        return _read_omm_json(path)
+    if ext == ".csv":
+        return _read_omm_csv(path)
+    if ext == ".xml":
+        return _read_omm_xml(path)
+    raise ValueError(f"{path}: unknown catalog format {ext!r}")
+
+
+# ============================================================
+# LOADER
+# ============================================================
+def load_overlay(path):
+    """NORAD ID (int) -> metadata dict."""
+    if not path:
+        return {}
+    with open(path) as f:
+        return {int(k): v for k, v in json.load(f).items()}
+
+
+class CatalogLoader:
+    """
+    Iterable of (name, entry) pairs in the shape get_full_catalog()
+    produces, read lazily from `paths` and joined with `overlay`.
+    `stats` is filled in as the files are read.
+    """
+
+    def __init__(self, paths, overlay=None):
+        self.paths = list(paths)
+        self.overlay = overlay if isinstance(overlay, dict) else load_overlay(overlay)
+        self.stats = {"records": 0, "rejected": 0, "duplicates": 0, "loaded": 0}
+
+    def _records(self):
+        """
+        Yield (seq, name, tle1, tle2) for every record across all sources;
+        rejected records come back as (seq, None, reason, None).
+        """
+        seq = 0
+        for path in self.paths:
+            for i, thunk in enumerate(_read_source(path)):
+                seq += 1
+                try:
+                    name, tle1, tle2 = thunk()
+                except (ValueError, TypeError) as e:
+                    yield seq, None, f"{path} record {i + 1}: {e}", None
+                    continue
+                if not tle_valid(tle1, tle2):
+                    yield seq, None, f"{path} record {i + 1}: bad TLE checksum or format", None
+                    continue
+                yield seq, name, tle1, tle2
+
+    def _winners(self):
+        """First pass: newest record number per NORAD ID."""
+        best = {}
+        for seq, name, tle1, tle2 in self._records():
+            self.stats["records"] += 1
+            if name is None and tle2 is None:
+                print(f"  [WARN] {tle1}, skipped")
+                self.stats["rejected"] += 1
+                continue
+            norad = int(tle1[2:7])
+            epoch = tle_epoch(tle1)
+            if norad in best:
+                self.stats["duplicates"] += 1
+                if epoch <= best[norad][0]:
+                    continue
+            best[norad] = (epoch, seq)
+        return {seq for _, seq in best.values()}
+
+    def __iter__(self):
+        winners = self._winners()
+        seen_names = set()
+        for seq, name, tle1, tle2 in self._records():
+            if seq not in winners:
+                continue
+            norad = int(tle1[2:7])
+            meta = self.overlay.get(norad, {})
+            name = meta.get("name") or name or f"NORAD {norad}"
+            if name in seen_names:
+                name = f"{name} [{norad}]"  # names are not unique in the public catalog
+            seen_names.add(name)
+
+            entry = {
+                "norad": norad,
+                "cospar": meta.get("cospar", _cospar(tle1)),
+                "operator": meta.get("operator", "Unknown"),
+                "category": meta.get("category", "Unknown"),
+                "tle1": tle1,
+                "tle2": tle2,
+                "is_story": "story" in meta,
+            }
+            if "story" in meta:
+                entry["story"] = meta["story"]
+            self.stats["loaded"] += 1
+            yield name, entry
+
+
+def _cospar(tle1):
+    """International designator from TLE cols 10-17 ("14058A" -> "2014-058A")."""
+    intl = tle1[9:17].strip()
+    if len(intl) < 5 or not intl[:5].isdigit():
+        return ""
+    yy = int(intl[:2])
+    return f"{2000 + yy if yy < 57 else 1900 + yy}-{intl[2:]}"
+
+
+# ============================================================
+# EXPORT
+# ============================================================
+def _with_checksum(line):
+    line = line[:68].ljust(68)
+    return line + str(tle_checksum(line))
+
+
+def export_embedded(out_dir):
+    """
+    Write satellite_catalog.py as catalog.tle + overlay.json. The
+    embedded TLEs are hand-typed, so their checksum digits are recomputed.
+    """
+    from satellite_catalog import get_full_catalog
+
+    os.makedirs(out_dir, exist_ok=True)
+    overlay = {}
+    with open(os.path.join(out_dir, "catalog.tle"), "w") as f:
+        for name, data in get_full_catalog().items():
+            if not data.get("tle1"):
+                continue
+            f.write(f"0 {name}\n{_with_checksum(data['tle1'])}\n{_with_checksum(data['tle2'])}\n")
+            meta = {"name": name, "category": data["category"], "operator": data["operator"]}
+            if data.get("cospar"):
+                meta["cospar"] = data["cospar"]
+            if data.get("is_story"):
+                meta["story"] = data.get("story", {})
+            overlay[str(data["norad"])] = meta
+    with open(os.path.join(out_dir, "overlay.json"), "w") as f:
+        json.dump(overlay, f, indent=1)
+    return len(overlay)
+
+
+if __name__ == "__main__":
+    import argparse, time
+
+    parser = argparse.ArgumentParser(description="Load TLE/OMM catalog files")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--overlay", help="metadata overlay JSON keyed by NORAD ID")
+    parser.add_argument("--export-embedded", metavar="DIR",
+                        help="write the embedded catalog as DIR/catalog.tle + DIR/overlay.json")
+    args = parser.parse_args()
+
+    if args.export_embedded:
+        n = export_embedded(args.export_embedded)
+        print(f"  Exported {n} satellites to {args.export_embedded}/catalog.tle + overlay.json")
+    if args.files:
+        t0 = time.perf_counter()
+        loader = CatalogLoader(args.files, args.overlay)
+        cats = {}
+        for _, entry in loader:
+            cats[entry["category"]] = cats.get(entry["category"], 0) + 1
+        print(f"\n  {loader.stats} in {time.perf_counter() - t0:.2f}s")
+        for c, count in sorted(cats.items(), key=lambda x: -x[1]):
+            print(f"  {c}: {count}")
+        print()
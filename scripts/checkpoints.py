@@ -0,0 +1,225 @@
+"""
+Orbital TrIP — Checkpointed Stages
+Persists each pipeline stage's intermediate results chunk by chunk, so a
+run that dies halfway resumes from its last completed chunk and a rerun
+skips every stage whose inputs did not change.
+
+A stage is identified by a key: the fingerprint of its name, its config
+and the digests of everything it reads (upstream stages, state files).
+Its checkpoint directory <work_dir>/<stage>/ holds one artifact per chunk
+plus manifest.json ({key, chunks: {id: digest}}), rewritten atomically
+after every chunk. Opening a stage under a different key discards the
+old chunks; chunks already in the manifest are loaded, not recomputed.
+PassthroughRunner is the same interface with no persistence, for runs
+without --checkpoint.
+
+A stage's digest hashes its chunk digests, and a chunk digest hashes the
+artifact's content (not the file), so a recomputed stage that produced
+the same data keeps its digest and downstream stages still skip.
+
+Artifacts are .npz files: numpy arrays as themselves, everything else as
+one JSON document under "__json__" (no pickle).
+
+Usage:
+    python3 checkpoints.py      # resume / skip / invalidation self-check
+"""
+
+import hashlib, json, os, shutil
+
+import numpy as np
+
+from keystore import _load_json, _write_json_atomic
+
+
+def fingerprint(*parts):
+    """SHA-256 over the canonical JSON of `parts`."""
+    return hashlib.sha256(json.dumps(parts, separators=(",", ":"), sort_keys=True,
+                                     default=str).encode()).hexdigest()
+
+
+def file_digest(path):
+    """SHA-256 of a file's bytes, or None if it does not exist."""
+    try:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        return h.hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+# ============================================================
+# ARTIFACTS
+# ============================================================
+def _content_digest(arrays, doc):
+    h = hashlib.sha256(doc.encode())
+    for name in sorted(arrays):
+        a = np.ascontiguousarray(arrays[name])
+        h.update(f"\0{name}:{a.dtype.str}:{a.shape}\0".encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def save_artifact(path, data):
+    """Write `data` (a dict) atomically; returns its content digest."""
+    arrays = {k: v for k, v in data.items() if isinstance(v, np.ndarray)}
+    doc = json.dumps({k: v for k, v in data.items() if k not in arrays}, separators=(",", ":"))
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        np.savez(f, __json__=np.array(doc), **arrays)
+    os.replace(tmp, path)
+    return _content_digest(arrays, doc)
+
+
+def load_artifact(path):
+    with np.load(path, allow_pickle=False) as z:
+        data = json.loads(str(z["__json__"]))
+        data.update({k: z[k] for k in z.files if k != "__json__"})
+    return data
+
+
+# ============================================================
+# STAGES
+# ============================================================
+class StageCheckpoint:
+    """One stage's chunk artifacts under one key."""
+
+    def __init__(self, root, stage, key, fresh=False):
+        self.stage = stage
+        self.dir = os.path.join(root, stage)
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        manifest = _load_json(self.manifest_path)
+        if fresh or manifest.get("key") != key:
+            shutil.rmtree(self.dir, ignore_errors=True)
+            manifest = {"key": key, "chunks": {}}
+        os.makedirs(self.dir, exist_ok=True)
+        self.manifest = manifest
+        self.reused = 0
+
+    def _path(self, chunk):
+        return os.path.join(self.dir, f"{chunk}.npz")
+
+    def done(self, chunk):
+        return chunk in self.manifest["chunks"] and os.path.exists(self._path(chunk))
+
+    def load(self, chunk):
+        return load_artifact(self._path(chunk))
+
+    def save(self, chunk, data):
+        self.manifest["chunks"][chunk] = save_artifact(self._path(chunk), data)
+        _write_json_atomic(self.manifest_path, self.manifest)
+
+    def digest(self, chunks):
+        return fingerprint(self.stage, [(c, self.manifest["chunks"][c]) for c in chunks])
+
+
+class StageRunner:
+    """
+    Runs stages against checkpoints under `work_dir` and keeps, per stage,
+    how many chunks were computed and how many came from a checkpoint.
+    """
+
+    def __init__(self, work_dir):
+        self.work_dir = work_dir
+        self.report = {}
+        self._digests = {}
+
+    def run(self, stage, key, chunks, compute, fresh=False):
+        """
+        Make sure every chunk id in `chunks` has an artifact for `key`,
+        calling compute(chunk) -> dict for the missing ones, in order.
+        `fresh` recomputes everything (a stage that must always run).
+        Returns the StageCheckpoint; the stage digest is then digest(stage).
+        """
+        cp = StageCheckpoint(self.work_dir, stage, key, fresh)
+        chunks = list(chunks)
+        for chunk in chunks:
+            if cp.done(chunk):
+                cp.reused += 1
+            else:
+                cp.save(chunk, compute(chunk))
+        self._digests[stage] = cp.digest(chunks)
+        self.report[stage] = {"chunks": len(chunks), "reused": cp.reused, "key": key[:12]}
+        return cp
+
+    def digest(self, stage):
+        """Digest of a stage run earlier, None if it did not run."""
+        return self._digests.get(stage)
+
+    def discard(self, *stages):
+        """Drop checkpoints that can never be reused (their inputs were consumed)."""
+        for stage in stages:
+            shutil.rmtree(os.path.join(self.work_dir, stage), ignore_errors=True)
+
+
+class _LazyStage:
+    """A stage's chunks computed on first load; only the last one is kept."""
+
+    def __init__(self, compute):
+        self.compute = compute
+        self._chunk, self._data = None, None
+
+    def load(self, chunk):
+        if self._chunk != chunk:
+            self._data = self.compute(chunk)
+            self._chunk = chunk
+        return self._data
+
+
+class PassthroughRunner:
+    """
+    StageRunner interface without checkpoints: run() persists nothing and
+    defers each chunk to its first load(), so a consumer walking the chunks
+    in order streams through the stages one chunk at a time.
+    """
+
+    def __init__(self):
+        self.report = {}
+
+    def run(self, stage, key, chunks, compute, fresh=False):
+        return _LazyStage(compute)
+
+    def digest(self, stage):
+        return None
+
+    def discard(self, *stages):
+        pass
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    calls = []
+
+    def square(chunk):
+        calls.append(chunk)
+        if chunk == "c2" and crash[0]:
+            crash[0] = False
+            raise RuntimeError("simulated crash")
+        x = np.arange(4, dtype=np.float64) * int(chunk[1:])
+        return {"x": x ** 2, "chunk": chunk}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        crash = [True]
+        runner = StageRunner(tmp)
+        try:
+            runner.run("square", fingerprint("square", 1), ["c0", "c1", "c2", "c3"], square)
+        except RuntimeError:
+            pass
+        assert calls == ["c0", "c1", "c2"], calls
+
+        calls.clear()
+        cp = runner.run("square", fingerprint("square", 1), ["c0", "c1", "c2", "c3"], square)
+        assert calls == ["c2", "c3"] and runner.report["square"]["reused"] == 2, calls
+        assert cp.load("c3")["x"].tolist() == [0.0, 9.0, 36.0, 81.0] and cp.load("c3")["chunk"] == "c3"
+        first = runner.digest("square")
+
+        calls.clear()
+        runner.run("square", fingerprint("square", 1), ["c0", "c1", "c2", "c3"], square, fresh=True)
+        assert len(calls) == 4 and runner.digest("square") == first   # same content, same digest
+
+        calls.clear()
+        runner.run("square", fingerprint("square", 2), ["c0", "c1"], square)
+        assert calls == ["c0", "c1"]                                 # new key: nothing reused
+        print("\n  ✓ resume after crash, skip on unchanged key, stable digests, invalidation\n")
@@ -0,0 +1,393 @@
+"""
+Orbital TrIP — Catalog-Wide Conjunction Screening
+Finds close approaches between every pair of catalog objects without an
+all-pairs O(N²) check:
+
+    1. Perigee/apogee shell filter: objects whose radial shell (padded by
+       the screening distance) overlaps no other object's are dropped.
+    2. Spatial hash grid per screening grid step, streamed in blocks:
+       SGP4 runs through SatrecArray every SCREEN_STEP_S, cubic Hermite
+       interpolation fills in the grid steps between samples, and only
+       objects in the same or a neighbouring cell are compared, in
+       batches of at most PAIR_BATCH pairs. A pair is kept if its
+       straight-line closest approach within half a grid step, padded for
+       orbital curvature and interpolation error, is under the threshold;
+       consecutive kept steps of a pair are folded into one encounter.
+    3. TCA refinement: Newton iterations on d/dt|Δr|², vectorized over
+       all encounters (one sgp4_array call per object and iteration),
+       giving time of closest approach and miss distance between samples.
+
+A grid cell is the screening distance plus the largest relative motion in
+half a grid step, so the grid step sets the cell size. Short steps mean
+more points to hash, long steps bigger cells and more candidate pairs;
+grid_split measures the catalog's candidate density at the window start
+and picks the step with the least modelled cost. The SGP4 step grows as
+needed to keep objects × samples within SCREEN_MAX_SAMPLES, which only
+widens the interpolation pad, not the cells.
+
+Usage:
+    python3 conjunctions.py [--km D] [--step S]
+    python3 conjunctions.py --check [N]    # time and peak RSS on an N-object synthetic catalog
+                                           # (default CHECK_OBJECTS) against the CHECK_* budget
+"""
+
+import numpy as np
+from datetime import timedelta
+from sgp4.api import SatrecArray, jday
+
+from propagation import parse_tles
+from array_utils import ragged_arange
+
+SCREEN_KM = 10.0       # report approaches closer than this
+SCREEN_STEP_S = 120.0  # SGP4 sampling step (grid steps are interpolated between samples)
+SCREEN_MAX_SAMPLES = 20_000_000   # objects × SGP4 samples; the sampling step is coarsened past this
+BLOCK_POINTS = 1_000_000   # objects × grid steps hashed per block, bounds peak memory
+PAIR_BATCH = 1_000_000     # candidate pairs gated at a time
+PROBE_KM = 200.0       # grid cell used to measure the catalog's candidate density
+POINT_COST = 5.0       # hashing one point costs about this many candidate-pair gates
+MIN_GRID_S = 1.0       # finest grid step
+R_MAX_KM = 100_000.0   # grid extent; farther objects are clamped to the edge cells
+V_REL_MAX = 22.4       # km/s, largest relative speed of two Earth orbiters
+SPEED_MARGIN = 1.02    # perigee speed from mean elements -> bound on SGP4 speed
+HERMITE_MARGIN = 2.0   # Hermite error estimate from the perigee rate -> bound
+MU_KM3_S2 = 398600.4418
+CHECK_OBJECTS = 10_000   # --check catalog size, and its budget on one core:
+CHECK_SECONDS = 240.0
+CHECK_RSS_MB = 768.0
+# Relative acceleration (1/s²) per km of separation: twice the surface gravity gradient 3μ/R³
+GRADIENT = 2 * 3 * MU_KM3_S2 / 6378.137 ** 3
+
+# Half-space neighbour columns (dx, dy): each spans dz = -1..1, contiguous in cell-key order.
+# With the own column's cell above (dz = +1) they cover the 13 neighbour cells once per pair.
+_HALF_COLUMNS = ((0, 1), (1, -1), (1, 0), (1, 1))
+
+
+# ============================================================
+# PRE-FILTER
+# ============================================================
+def shell_bounds(sats):
+    """Perigee and apogee radius (km) of each Satrec from its mean elements."""
+    a = np.array([s.a * s.radiusearthkm for s in sats])
+    e = np.array([s.ecco for s in sats])
+    return a * (1 - e), a * (1 + e)
+
+
+def shell_overlap_mask(perigee, apogee, pad):
+    """True for objects whose padded radial shell overlaps at least one other."""
+    n = len(perigee)
+    if n < 2:
+        return np.zeros(n, dtype=bool)
+    order = np.argsort(perigee)
+    lo, hi = perigee[order] - pad, apogee[order] + pad
+    prev_hi = np.maximum.accumulate(hi)
+    mask = np.zeros(n, dtype=bool)
+    mask[1:] |= lo[1:] <= prev_hi[:-1]                              # overlaps an earlier shell
+    mask[:-1] |= lo[1:] <= hi[:-1]                                  # overlaps the next shell
+    out = np.zeros(n, dtype=bool)
+    out[order] = mask
+    return out
+
+
+def perigee_rates(perigee, apogee):
+    """Speed (km/s) and angular rate (rad/s) at perigee, the largest along each orbit."""
+    a = (perigee + apogee) / 2
+    speed = np.sqrt(MU_KM3_S2 * (2 / perigee - 1 / a))
+    return speed, speed / perigee
+
+
+# ============================================================
+# SPATIAL HASH
+# ============================================================
+def grid_pairs(pos, cell, group=None, batch=PAIR_BATCH):
+    """
+    Yield candidate index pairs (i, j), about `batch` at most per yield,
+    for points in the same or adjacent cubic cells of size `cell`; every
+    unordered pair once. Points are taken in cell-key order, so each
+    neighbour lookup is a searchsorted over sorted queries, and the three
+    z-neighbours of an (x, y) column are one contiguous range of points.
+    Points of different `group`s (e.g. time steps) are never paired.
+    """
+    # One empty padding cell on each side, so neighbour keys never wrap into another column or group
+    n_cells = int(np.ceil(2 * R_MAX_KM / cell)) + 3
+    c = np.clip(np.floor((pos + R_MAX_KM) / cell).astype(np.int64) + 1, 1, n_cells - 2)
+    key = (c[:, 0] * n_cells + c[:, 1]) * n_cells + c[:, 2]
+    if group is not None:
+        key += np.asarray(group, dtype=np.int64) * n_cells ** 3
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+
+    # Own cell and the one above it: the points after this one, up to key + 1
+    columns = [(np.arange(1, len(key) + 1), np.searchsorted(key, key + 1, "right"))]
+    for dx, dy in _HALF_COLUMNS:
+        base = key + (dx * n_cells + dy) * n_cells
+        columns.append((np.searchsorted(key, base - 1, "left"), np.searchsorted(key, base + 1, "right")))
+
+    for lo, hi in columns:
+        src = np.flatnonzero(hi > lo)
+        counts = (hi - lo)[src]
+        cuts = np.searchsorted(np.cumsum(counts), np.arange(batch, counts.sum(), batch), "right")
+        for part in np.split(np.arange(len(src)), cuts):
+            if len(part):
+                yield (order[np.repeat(src[part], counts[part])],
+                       order[ragged_arange(lo[src[part]], counts[part])])
+
+
+def grid_split(pos, step_s, reach):
+    """
+    Grid steps per SGP4 sample step for points `pos` of one instant, where
+    reach(dt) is the grid cell at grid step dt: the split with the least
+    modelled cost (hashed points plus candidate pairs over the window),
+    candidates scaled from a PROBE_KM grid by cell volume.
+    """
+    density = sum(len(i) for i, _ in grid_pairs(pos, PROBE_KM)) / PROBE_KM ** 3
+    splits = np.arange(1, max(1, int(step_s // MIN_GRID_S)) + 1)
+    cells = np.array([reach(step_s / k) for k in splits.tolist()])
+    cost = splits * (len(pos) * POINT_COST + density * cells ** 3)
+    return int(splits[np.argmin(cost)])
+
+
+# ============================================================
+# ENCOUNTERS
+# ============================================================
+def merge_runs(rows, gap):
+    """
+    Merge encounter rows (a, b, first, last, t, dist, rel) of the same
+    pair less than `gap` seconds apart into one, keeping the row with the
+    smallest sampled distance as its seed (t, dist, rel).
+    """
+    a, b, first, last, t, dist, rel = rows
+    order = np.lexsort((first, b, a))
+    a, b, first, last, t, dist, rel = (x[order] for x in rows)
+    new = np.ones(len(a), dtype=bool)
+    new[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1]) | (first[1:] - last[:-1] > gap)
+    run = np.cumsum(new) - 1
+    heads = np.flatnonzero(new)
+    seed = np.lexsort((dist, run))[heads]
+    return (a[heads], b[heads], first[heads], np.maximum.reduceat(last, heads) if len(heads) else last[:0],
+            t[seed], dist[seed], rel[seed])
+
+
+# ============================================================
+# TCA REFINEMENT
+# ============================================================
+def _states(sats, idx, jd0, fr0, t):
+    """SGP4 (e, r, v) of sats[idx[k]] at t[k] seconds from grid start: one sgp4_array call per object."""
+    e = np.zeros(len(idx), dtype=np.uint8)
+    r, v = np.empty((len(idx), 3)), np.empty((len(idx), 3))
+    order = np.argsort(idx, kind="stable")
+    objects, starts = np.unique(idx[order], return_index=True)
+    for obj, sel in zip(objects.tolist(), np.split(order, starts[1:])):
+        e[sel], r[sel], v[sel] = sats[obj].sgp4_array(np.full(len(sel), jd0), fr0 + t[sel] / 86400.0)
+    return e, r, v
+
+
+def refine_tca(sats, a, b, jd0, fr0, t, lo, hi, iterations=6):
+    """
+    Minimize |ra - rb| for every encounter k between sats[a[k]] and
+    sats[b[k]] near t[k] (seconds from grid start), within [lo[k], hi[k]].
+    Returns (t, miss_km, rel_kms, ok) arrays; ok is False where SGP4 failed.
+    """
+    t = np.array(t, dtype=float)
+    ok = np.ones(len(t), dtype=bool)
+    active = ok.copy()
+    for _ in range(iterations):
+        k = np.flatnonzero(active)
+        if not len(k):
+            break
+        ea, ra, va = _states(sats, a[k], jd0, fr0, t[k])
+        eb, rb, vb = _states(sats, b[k], jd0, fr0, t[k])
+        failed = (ea != 0) | (eb != 0)
+        ok[k[failed]] = False
+        dr, dv = ra - rb, va - vb
+        vv = np.einsum("ij,ij->i", dv, dv)
+        moving = ~failed & (vv > 0)
+        active[k[~moving]] = False
+        k, step = k[moving], -np.einsum("ij,ij->i", dr[moving], dv[moving]) / vv[moving]
+        t[k] = np.clip(t[k] + step, lo[k], hi[k])
+        active[k[np.abs(step) < 1e-3]] = False
+    ea, ra, va = _states(sats, a, jd0, fr0, t)
+    eb, rb, vb = _states(sats, b, jd0, fr0, t)
+    ok &= (ea == 0) & (eb == 0)
+    return t, np.linalg.norm(ra - rb, axis=1), np.linalg.norm(va - vb, axis=1), ok
+
+
+# ============================================================
+# SCREENING
+# ============================================================
+def _upsample(r, v, step_s, split, last):
+    """
+    Hermite positions and velocities at `split` grid steps per interval of
+    (n, K+1, 3) samples, plus the final sample when `last`: (n, K*split[+1], 3) each.
+    """
+    x = np.arange(split) / split
+    x2, x3 = x * x, x * x * x
+    basis = np.stack([2 * x3 - 3 * x2 + 1, (x3 - 2 * x2 + x) * step_s, -2 * x3 + 3 * x2, (x3 - x2) * step_s], axis=1)
+    slope = np.stack([6 * x2 - 6 * x, (3 * x2 - 4 * x + 1) * step_s, -6 * x2 + 6 * x, (3 * x2 - 2 * x) * step_s],
+                     axis=1) / step_s
+    ends = np.stack([r[:, :-1], v[:, :-1], r[:, 1:], v[:, 1:]], axis=2)   # (n, K, 4, 3)
+    pos, vel = (basis @ ends).reshape(len(r), -1, 3), (slope @ ends).reshape(len(r), -1, 3)
+    if last:
+        pos, vel = np.concatenate([pos, r[:, -1:]], axis=1), np.concatenate([vel, v[:, -1:]], axis=1)
+    return pos, vel
+
+
+def screen_catalog(tles, start, end, screen_km=SCREEN_KM, step_s=SCREEN_STEP_S, max_samples=SCREEN_MAX_SAMPLES):
+    """
+    Screen (name, tle1, tle2) triples for approaches closer than
+    `screen_km` between UTC datetimes `start` and `end`. SGP4 runs on a
+    `step_s` grid coarsened to at most `max_samples` object-steps; the
+    spatial hash runs on a finer grid (grid_split) interpolated from it,
+    so its cells follow the grid step, not the coarsened SGP4 step.
+
+    Returns {"step_s": SGP4 sampling step, "grid_s": hash grid step,
+    "events": [...], "objects": N screened, "candidates": encounters
+    refined} with events sorted by miss distance; each event carries a,
+    b (names), tca (ISO), miss_km and rel_kms.
+    """
+    sats, names, _ = parse_tles(tles)
+    perigee, apogee = shell_bounds(sats) if sats else (np.empty(0), np.empty(0))
+    keep = shell_overlap_mask(perigee, apogee, screen_km)
+    sats = [s for s, k in zip(sats, keep) if k]
+    names = [n for n, k in zip(names, keep) if k]
+    perigee, apogee = perigee[keep], apogee[keep]
+    span = (end - start).total_seconds()
+    if max_samples and len(sats):
+        step_s = max(step_s, float(np.ceil(span / (max(2, max_samples // len(sats)) - 1))))
+    result = {"step_s": step_s, "grid_s": None, "events": [], "objects": len(sats), "candidates": 0}
+    if len(sats) < 2:
+        return result
+
+    array = SatrecArray(sats)
+    jd0, fr0 = jday(start.year, start.month, start.day, start.hour, start.minute, start.second)
+    n_steps = int(span // step_s) + 1
+    speed, rate = perigee_rates(perigee, apogee)
+    v_rel = min(V_REL_MAX, 2 * SPEED_MARGIN * speed.max())
+    # Hermite position error (4th derivative ~ rate⁴ r), plus its velocity error over half a grid step
+    quartic = HERMITE_MARGIN * rate ** 4 * perigee
+
+    def bounds(dt):
+        """Per-object interpolation pad and the grid cell at grid step dt."""
+        pad = quartic * (step_s ** 4 / 384 + step_s ** 3 * dt / 250)
+        h = dt / 2
+        # Farthest apart a pair can be at a grid step and still pass the gate below
+        return pad, (screen_km + 2 * pad.max() + v_rel * h) * (1 + GRADIENT * h * h)
+
+    e, r, _ = array.sgp4(np.array([jd0]), np.array([fr0]))
+    split = grid_split(r[e[:, 0] == 0, 0], step_s, lambda dt: bounds(dt)[1])
+    dt = step_s / split
+    h = dt / 2
+    pad, cell = bounds(dt)
+    result["grid_s"] = dt
+
+    # SGP4 in blocks of sample intervals, each upsampled to the grid and hashed in one pass;
+    # gated grid steps are folded into per-pair encounter runs block by block
+    per_block = max(1, BLOCK_POINTS // (len(sats) * split))
+    runs = tuple(np.empty(0) for _ in range(7))
+    prev = None
+    for k0 in range(0, n_steps, per_block):
+        k1 = min(k0 + per_block, n_steps - 1)
+        ks = np.arange(k0 if prev is None else k0 + 1, k1 + 1)
+        e, r, v = array.sgp4(np.full(len(ks), jd0), fr0 + ks * step_s / 86400.0)
+        if prev is not None:
+            e, r, v = (np.concatenate([p, x], axis=1) for p, x in zip(prev, (e, r, v)))
+        prev = e[:, -1:], r[:, -1:], v[:, -1:]
+        last = k1 == n_steps - 1
+        pos, vel = _upsample(r, v, step_s, split, last)
+        ok = np.repeat((e[:, :-1] == 0) & (e[:, 1:] == 0), split, axis=1)
+        if last:
+            ok = np.concatenate([ok, e[:, -1:] == 0], axis=1)
+        obj, k = np.nonzero(ok)
+        pos, vel = pos[obj, k], vel[obj, k]
+        t = k0 * step_s + k * dt
+
+        hits = []
+        for i, j in grid_pairs(pos, cell, k):
+            dr = pos[i] - pos[j]
+            near = np.einsum("ij,ij->i", dr, dr) <= cell * cell  # the cell's sphere, not its 27-cell cube
+            i, j, dr = i[near], j[near], dr[near]
+            dv = vel[i] - vel[j]
+            dist, rel = np.linalg.norm(dr, axis=1), np.linalg.norm(dv, axis=1)
+            # Straight-line closest approach within half a grid step, padded by the curvature
+            tau = np.clip(-np.einsum("ij,ij->i", dr, dv) / np.maximum(rel * rel, 1e-12), -h, h)
+            reach = np.linalg.norm(dr + dv * tau[:, None], axis=1)
+            gi, gj = obj[i], obj[j]
+            gate = reach <= screen_km + pad[gi] + pad[gj] + GRADIENT * (dist + rel * h) * h * h / 2
+            gate &= (perigee[gi] - screen_km <= apogee[gj]) & (perigee[gj] - screen_km <= apogee[gi])
+            if gate.any():
+                ts = t[i][gate]
+                hits.append((np.minimum(gi, gj)[gate], np.maximum(gi, gj)[gate], ts, ts, ts,
+                             dist[gate], rel[gate]))
+        if hits:
+            # Consecutive gated grid steps of a pair form one encounter, also across blocks
+            block = tuple(np.concatenate(c) for c in zip(*hits))
+            runs = merge_runs(tuple(np.concatenate(c) for c in zip(runs, block)), 1.5 * dt)
+        if last:
+            break
+
+    a, b, first, last, t, dist, rel = runs
+    a, b = a.astype(np.int64), b.astype(np.int64)
+    result["candidates"] = len(a)
+    if not len(a):
+        return result
+
+    # Refine each encounter once, from its closest grid step
+    lo, hi = np.maximum(first - dt, 0.0), np.minimum(last + dt, span)
+    tca, miss, speed, ok = refine_tca(sats, a, b, jd0, fr0, t, lo, hi)
+    sampled = ~ok | (miss > dist)  # co-orbiting pairs: the sampled minimum is the better estimate
+    tca = np.where(sampled, t, tca)
+    miss = np.where(sampled, dist, miss)
+    speed = np.where(sampled, rel, speed)
+    for k in np.flatnonzero(miss <= screen_km):
+        result["events"].append({
+            "a": names[a[k]], "b": names[b[k]],
+            "tca": (start + timedelta(seconds=float(tca[k]))).isoformat(),
+            "miss_km": round(float(miss[k]), 3), "rel_kms": round(float(speed[k]), 3),
+        })
+    result["events"].sort(key=lambda ev: ev["miss_km"])
+    return result
+
+
+def events_by_object(events):
+    """name -> list of events involving it, for trust scoring."""
+    out = {}
+    for ev in events:
+        out.setdefault(ev["a"], []).append(ev)
+        out.setdefault(ev["b"], []).append(ev)
+    return out
+
+
+if __name__ == "__main__":
+    import argparse, sys, time
+    from satellite_catalog import get_full_catalog
+    from orbital_trip_pipeline_v2 import PROPAGATION_END, PROPAGATION_HOURS
+
+    if sys.argv[1:2] == ["--check"]:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        from benchmark import run_stage
+
+        # A fresh process, so the peak RSS is the screening's own
+        size = int(sys.argv[2]) if len(sys.argv) > 2 else CHECK_OBJECTS
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            r = pool.submit(run_stage, "screen", size, {"screen_km": SCREEN_KM, "seed": 0}).result()
+        ok = r["seconds"] <= CHECK_SECONDS and r["peak_rss_mb"] <= CHECK_RSS_MB
+        print(f"\n  {'✓' if ok else '✗'} {size} synthetic objects screened in {r['seconds']:.1f}s "
+              f"(budget {CHECK_SECONDS:g}s), peak RSS {r['peak_rss_mb']:.0f} MB (budget {CHECK_RSS_MB:g} MB)\n")
+        sys.exit(0 if ok else 1)
+
+    parser = argparse.ArgumentParser(description="Catalog conjunction screening")
+    parser.add_argument("--km", type=float, default=SCREEN_KM)
+    parser.add_argument("--step", type=float, default=SCREEN_STEP_S)
+    args = parser.parse_args()
+
+    catalog = get_full_catalog()
+    tles = [(n, d["tle1"], d["tle2"]) for n, d in catalog.items() if d.get("tle1")]
+    t0 = time.perf_counter()
+    res = screen_catalog(tles, PROPAGATION_END - timedelta(hours=PROPAGATION_HOURS), PROPAGATION_END,
+                         args.km, args.step)
+    print(f"\n  Screened {res['objects']} objects (SGP4 every {res['step_s']:g}s, grid every {res['grid_s'] or 0:g}s), "
+          f"{res['candidates']} candidates "
+          f"refined in {time.perf_counter() - t0:.2f}s")
+    for ev in res["events"]:
+        print(f"  {ev['miss_km']:8.3f} km  {ev['rel_kms']:6.2f} km/s  {ev['tca']}  {ev['a']} × {ev['b']}")
+    print()
@@ -0,0 +1,391 @@
+"""
+Orbital TrIP — Long-Horizon Breadcrumb Archive (trip-crumbs/1)
+The output only carries each chain's pk/len/genesis/head; the signed
+breadcrumbs themselves go here, so months or years of history per
+object can be queried ("all crumbs for NORAD 40258 between T1 and T2")
+and re-verified offline.
+
+Log-structured: every run appends one immutable segment of the crumbs
+it signed, grouped by NORAD ID and epoch-ascending within each object,
+with a sorted per-object index. A range query binary-searches each
+segment's index for the object, then its epoch column, over memory-
+mapped files, so it touches only the rows it returns. Segments are
+tiered: once COMPACT_FANOUT segments share a level they are merged into
+one segment of the next level, which keeps the segment count
+logarithmic in the history (nothing is ever dropped).
+
+Record (128 bytes, little-endian): norad u4, i u4, epoch i8, lat/lon
+i4 (1e-7 deg), alt i4 (m), key u4, prev[32], sig[64]. Together with the
+public key (manifest "keys"[key]) that is exactly the trip-bc/1 payload,
+so hash = SHA-256(payload) is recomputed rather than stored.
+
+Segment file <seq:08d>.seg:
+    header   magic "TRIPCRB1", version, records, objects, index_offset
+    data     records
+    index    objects x (norad u4, offset u8, count u4, first i8, last i8), by norad
+
+manifest.json ({keys, segments, heads, seq}) is rewritten atomically
+after the segment is in place; files it does not list are leftovers of
+an interrupted run and are removed. `heads` (norad -> [key, last i])
+makes a re-signed extension of the same chain a no-op. Only trip-bc/1
+chains are archived.
+
+Usage:
+    python3 crumb_store.py DIR                      # summary
+    python3 crumb_store.py DIR NORAD [T0 T1]        # dump (epoch seconds), verified
+    python3 crumb_store.py --demo [N]               # query timing over N synthetic crumbs
+"""
+
+import hashlib, os, struct
+from datetime import datetime, timezone
+
+import numpy as np
+
+from keystore import _load_json, _write_json_atomic
+from breadcrumb_codec import (ENCODING_BINARY, LATLON_SCALE, ALT_SCALE, encode_breadcrumb,
+                              encode_signature, decode_signature)
+
+MAGIC = b"TRIPCRB1"
+VERSION = 1
+FORMAT = "trip-crumbs/1"
+COMPACT_FANOUT = 8
+
+_HEADER = struct.Struct("<8sHxxQIxxxxQ")
+CRUMB = np.dtype([("norad", "<u4"), ("i", "<u4"), ("epoch", "<i8"), ("lat", "<i4"), ("lon", "<i4"),
+                  ("alt", "<i4"), ("key", "<u4"), ("prev", "u1", (32,)), ("sig", "u1", (64,))])
+_INDEX = np.dtype([("norad", "<u4"), ("offset", "<u8"), ("count", "<u4"), ("first", "<i8"), ("last", "<i8")])
+
+
+def pack_crumbs(chain):
+    """Newly signed trip-bc/1 breadcrumb dicts -> CRUMB records (norad/key filled in by the store)."""
+    rec = np.zeros(len(chain), dtype=CRUMB)
+    if not chain:
+        return rec
+    rec["i"] = [c["i"] for c in chain]
+    rec["epoch"] = [c["epoch"] for c in chain]
+    rec["lat"] = [round(c["lat"] * LATLON_SCALE) for c in chain]
+    rec["lon"] = [round(c["lon"] * LATLON_SCALE) for c in chain]
+    rec["alt"] = [round(c["alt"] * ALT_SCALE) for c in chain]
+    rec["prev"] = np.frombuffer(b"".join(bytes.fromhex(c["prev"]) for c in chain), np.uint8).reshape(-1, 32)
+    rec["sig"] = np.frombuffer(b"".join(decode_signature(c["sig"]) for c in chain), np.uint8).reshape(-1, 64)
+    return rec
+
+
+# ============================================================
+# SEGMENTS
+# ============================================================
+class _SegmentWriter:
+    """Streams object groups into a segment; index + header at close()."""
+
+    def __init__(self, path):
+        self.path = path
+        self._tmp = f"{path}.tmp.{os.getpid()}"
+        self._f = open(self._tmp, "wb")
+        self._f.write(b"\0" * _HEADER.size)
+        self._groups = {}   # norad -> (offset, count, first, last)
+        self.count = 0
+        self.first, self.last = None, None
+
+    def add(self, records):
+        """Append one object's records, epoch-ascending."""
+        if not len(records):
+            return
+        norad = int(records["norad"][0])
+        if norad in self._groups:
+            raise ValueError(f"NORAD {norad} added to one segment twice")
+        first, last = int(records["epoch"][0]), int(records["epoch"][-1])
+        self._groups[norad] = (self.count, len(records), first, last)
+        self._f.write(records.tobytes())
+        self.count += len(records)
+        self.first = first if self.first is None else min(self.first, first)
+        self.last = last if self.last is None else max(self.last, last)
+
+    def close(self):
+        index = np.array([(norad, *self._groups[norad]) for norad in sorted(self._groups)], dtype=_INDEX)
+        index_offset = self._f.tell()
+        self._f.write(index.tobytes())
+        self._f.seek(0)
+        self._f.write(_HEADER.pack(MAGIC, VERSION, self.count, len(index), index_offset))
+        self._f.close()
+        os.replace(self._tmp, self.path)
+        return {"file": os.path.basename(self.path), "count": self.count, "first": self.first, "last": self.last}
+
+    def abort(self):
+        self._f.close()
+        os.remove(self._tmp)
+
+
+class _Segment:
+    """Memory-mapped segment reader."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, count, objects, index_offset = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a {FORMAT} segment")
+        self.data = np.memmap(path, dtype=CRUMB, mode="r", offset=_HEADER.size, shape=(count,)) if count else \
+            np.zeros(0, CRUMB)
+        self.index = np.memmap(path, dtype=_INDEX, mode="r", offset=index_offset, shape=(objects,)) if objects \
+            else np.zeros(0, _INDEX)
+
+    def group(self, norad):
+        """All records of one object (a view), or None."""
+        row = np.searchsorted(self.index["norad"], norad)
+        if row == len(self.index) or self.index["norad"][row] != norad:
+            return None
+        entry = self.index[row]
+        return self.data[int(entry["offset"]):int(entry["offset"]) + int(entry["count"])]
+
+    def range(self, norad, t0, t1):
+        group = self.group(norad)
+        if group is None:
+            return None
+        epochs = group["epoch"]
+        lo, hi = np.searchsorted(epochs, t0, "left"), np.searchsorted(epochs, t1, "right")
+        return group[lo:hi] if hi > lo else None
+
+
+# ============================================================
+# STORE
+# ============================================================
+class CrumbStore:
+    """
+    Directory of segments plus manifest.json. Writers call add() per
+    object during a run and commit() once; readers use range()/crumbs().
+    Single writer at a time (the pipeline), any number of readers.
+    """
+
+    def __init__(self, root, fanout=COMPACT_FANOUT):
+        self.root = root
+        self.fanout = fanout
+        self.manifest_path = os.path.join(root, "manifest.json")
+        manifest = _load_json(self.manifest_path)
+        self.keys = manifest.get("keys", [])
+        self.segments = manifest.get("segments", [])   # oldest first; levels never increase along the list
+        self.heads = manifest.get("heads", {})
+        self.seq = manifest.get("seq", 0)
+        self._key_ids = {pk: i for i, pk in enumerate(self.keys)}
+        self._open = {}
+        self._writer = None
+        self.added = 0
+
+    def _segment(self, name):
+        if name not in self._open:
+            self._open[name] = _Segment(os.path.join(self.root, name))
+        return self._open[name]
+
+    def _new_segment(self):
+        self.seq += 1
+        os.makedirs(self.root, exist_ok=True)
+        return _SegmentWriter(os.path.join(self.root, f"{self.seq:08d}.seg"))
+
+    # ── writing
+    def add(self, norad, public_key, records):
+        """
+        Queue one object's newly signed `records` (pack_crumbs) signed by
+        `public_key` (hex). Crumbs at or below the archived head of the
+        same chain are skipped; a chain restarting at i = 0 replaces the head.
+        """
+        if records is None or not len(records):
+            return 0
+        key = self._key_ids.get(public_key)
+        if key is None:
+            key = self._key_ids[public_key] = len(self.keys)
+            self.keys.append(public_key)
+        head = self.heads.get(str(norad))
+        if head and head[0] == key and records["i"][0] != 0:
+            records = records[records["i"] > head[1]]
+            if not len(records):
+                return 0
+        records = records.copy()
+        records["norad"], records["key"] = norad, key
+        if self._writer is None:
+            self._writer = self._new_segment()
+        self._writer.add(records)
+        self.heads[str(norad)] = [key, int(records["i"][-1])]
+        self.added += len(records)
+        return len(records)
+
+    def commit(self, compact=True):
+        """Seal this run's segment, publish it in the manifest and compact. Returns stats()."""
+        if self._writer is not None:
+            self.segments.append(dict(self._writer.close(), level=0))
+            self._writer = None
+            self._save()
+        if compact:
+            self.compact()
+        return self.stats()
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        _write_json_atomic(self.manifest_path, {"format": FORMAT, "keys": self.keys, "segments": self.segments,
+                                                "heads": self.heads, "seq": self.seq})
+        listed = {s["file"] for s in self.segments} | {"manifest.json"}
+        for name in os.listdir(self.root):
+            if name not in listed and (name.endswith(".seg") or ".seg.tmp." in name):
+                self._open.pop(name, None)
+                os.remove(os.path.join(self.root, name))
+
+    def compact(self):
+        """Merge every run of `fanout` same-level segments into one segment a level up."""
+        merged = True
+        while merged:
+            merged = False
+            for start in range(len(self.segments) - self.fanout + 1):
+                run = self.segments[start:start + self.fanout]
+                if len({s["level"] for s in run}) == 1:
+                    self.segments[start:start + self.fanout] = [self._merge(run)]
+                    self._save()
+                    merged = True
+                    break
+
+    def _merge(self, run):
+        """One segment holding every record of `run` (oldest first), per object epoch-ordered."""
+        segments = [self._segment(s["file"]) for s in run]
+        writer = self._new_segment()
+        try:
+            for norad in np.unique(np.concatenate([s.index["norad"] for s in segments])).tolist():
+                groups = [g for g in (s.group(norad) for s in segments) if g is not None]
+                records = np.concatenate(groups)
+                order = np.argsort(records["epoch"], kind="stable")
+                writer.add(records[order])
+        except BaseException:
+            writer.abort()
+            raise
+        return dict(writer.close(), level=run[0]["level"] + 1)
+
+    # ── reading
+    def range(self, norad, t0=None, t1=None):
+        """CRUMB records of one object with t0 <= epoch <= t1 (Unix seconds), by epoch."""
+        t0 = np.iinfo(np.int64).min if t0 is None else int(t0)
+        t1 = np.iinfo(np.int64).max if t1 is None else int(t1)
+        parts = []
+        for s in self.segments:
+            if s["count"] and s["first"] <= t1 and s["last"] >= t0:
+                part = self._segment(s["file"]).range(norad, t0, t1)
+                if part is not None:
+                    parts.append(part)
+        if not parts:
+            return np.zeros(0, dtype=CRUMB)
+        records = np.concatenate(parts)
+        return records[np.argsort(records["epoch"], kind="stable")]
+
+    def tail(self, norad, count):
+        """
+        The last `count` archived crumbs of the object's head chain, up to
+        the archived head, as breadcrumb dicts in index order.
+        """
+        head = self.heads.get(str(norad))
+        if not head or count <= 0:
+            return []
+        key, last = head
+        found = {}
+        for s in reversed(self.segments):     # newest first: a re-signed index keeps its latest record
+            group = self._segment(s["file"]).group(norad) if s["count"] else None
+            if group is None:
+                continue
+            part = group[(group["key"] == key) & (group["i"] <= last) & (group["i"] > last - count)]
+            for r in part[::-1]:
+                found.setdefault(int(r["i"]), r)
+            if len(found) >= count:
+                break
+        return self._as_crumbs([found[i] for i in sorted(found)])
+
+    def crumbs(self, norad, t0=None, t1=None):
+        """Breadcrumb dicts (as generate_breadcrumb_chain signs them) for a range, hashes recomputed."""
+        return self._as_crumbs(self.range(norad, t0, t1))
+
+    def _as_crumbs(self, records):
+        out = []
+        for r in records:
+            pk = bytes.fromhex(self.keys[int(r["key"])])
+            epoch = int(r["epoch"])
+            crumb = {
+                "i": int(r["i"]), "id": pk.hex(),
+                "ts": datetime.fromtimestamp(epoch, timezone.utc).isoformat(), "epoch": epoch,
+                "lat": int(r["lat"]) / LATLON_SCALE, "lon": int(r["lon"]) / LATLON_SCALE,
+                "alt": int(r["alt"]) / ALT_SCALE, "prev": r["prev"].tobytes().hex(),
+            }
+            content = encode_breadcrumb(crumb["i"], pk, epoch, crumb["lat"], crumb["lon"], crumb["alt"],
+                                        r["prev"].tobytes())
+            crumb["hash"] = hashlib.sha256(content).hexdigest()
+            crumb["sig"] = encode_signature(r["sig"].tobytes())
+            out.append(crumb)
+        return out
+
+    def verify(self, norad, t0=None, t1=None):
+        """verification.verify_chain over each contiguous run of the range, per key."""
+        from verification import verify_chain
+
+        results = []
+        crumbs = sorted(self.crumbs(norad, t0, t1), key=lambda c: (c["id"], c["i"]))
+        start = 0
+        for k in range(1, len(crumbs) + 1):
+            if k == len(crumbs) or crumbs[k]["id"] != crumbs[k - 1]["id"] or crumbs[k]["i"] != crumbs[k - 1]["i"] + 1:
+                run = crumbs[start:k]
+                results.append(verify_chain(run, run[0]["id"], ENCODING_BINARY, prev=run[0]["prev"],
+                                            start_index=run[0]["i"]))
+                start = k
+        return results
+
+    def stats(self):
+        return {
+            "format": FORMAT,
+            "segments": len(self.segments),
+            "crumbs": sum(s["count"] for s in self.segments),
+            "objects": len(self.heads),
+            "added": self.added,
+            "first": min((s["first"] for s in self.segments if s["count"]), default=None),
+            "last": max((s["last"] for s in self.segments if s["count"]), default=None),
+        }
+
+
+if __name__ == "__main__":
+    import sys, tempfile, time
+
+    if len(sys.argv) < 2:
+        sys.exit(__doc__[__doc__.index("Usage:"):].rstrip())
+
+    if sys.argv[1:2] == ["--demo"]:
+        # Synthetic history: 3-hourly runs over 500 objects, 6 crumbs each, random signatures
+        total = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000_000
+        objects, per_run, step = 500, 6, 1800
+        runs = total // (objects * per_run)
+        rng = np.random.default_rng(7)
+        with tempfile.TemporaryDirectory() as tmp:
+            t = time.perf_counter()
+            for run in range(runs):
+                store = CrumbStore(tmp)
+                for norad in range(objects):
+                    rec = np.zeros(per_run, dtype=CRUMB)
+                    rec["i"] = np.arange(run * per_run, (run + 1) * per_run)
+                    rec["epoch"] = 1_700_000_000 + rec["i"].astype(np.int64) * step
+                    rec["sig"] = rng.integers(0, 256, (per_run, 64), dtype=np.uint8)
+                    store.add(40000 + norad, "ab" * 32, rec)
+                store.commit()
+            build = time.perf_counter() - t
+            store = CrumbStore(tmp)
+            st = store.stats()
+            span = st["last"] - st["first"]
+            t = time.perf_counter()
+            n = 200
+            hits = sum(len(store.range(40000 + q % objects, st["first"] + span // 2, st["first"] + span // 2 + 86400))
+                       for q in range(n))
+            query = (time.perf_counter() - t) / n
+            print(f"\n  {st['crumbs']:,} crumbs in {st['segments']} segments ({runs} runs, {build:.1f}s to build)")
+            print(f"  1-day range query: {query * 1e3:.2f} ms ({hits // n} crumbs each)\n")
+        sys.exit()
+
+    store = CrumbStore(sys.argv[1])
+    if len(sys.argv) == 2:
+        for k, v in store.stats().items():
+            print(f"  {k:9} {v}")
+        for s in store.segments:
+            print(f"  {s['file']}  level {s['level']}  {s['count']:>10,} crumbs  {s['first']} .. {s['last']}")
+        sys.exit()
+    norad = int(sys.argv[2])
+    t0, t1 = (int(sys.argv[3]), int(sys.argv[4])) if len(sys.argv) > 4 else (None, None)
+    for c in store.crumbs(norad, t0, t1):
+        print(f"  #{c['i']:<6} {c['ts']}  {c['lat']:9.4f} {c['lon']:9.4f} {c['alt']:9.1f}  {c['hash'][:16]}")
+    for r in store.verify(norad, t0, t1):
+        print(f"  {'✓' if r['ok'] else '✗'} {r['valid']}/{r['checked']} verified" + (f": {r['errors']}" if r["errors"] else ""))
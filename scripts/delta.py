@@ -0,0 +1,319 @@
+"""
+Orbital TrIP — Delta Publication Between Runs
+Each run with a state directory also publishes what changed since the
+previous run, so a consumer that holds run N only has to fetch and
+apply the deltas N+1..M instead of re-downloading the whole catalog.
+
+The previous run is remembered as a compact snapshot in
+<state_dir>/published.json: per satellite a digest of every output
+field, the TLE + sampling basis its positions came from, and the first
+and last sample epoch. Digests are over canonical JSON (every number a
+float) and leave out per-run values (RUN_FIELDS: generation time,
+timing, counts of crumbs signed this run), so an unchanged rerun
+publishes an empty delta; a delta carries those values only along with
+a real change to their field. Positions are only re-sent in full when that
+basis changed (new TLE, other sampling policy, adaptive sampling, or a
+window shift off the sampling grid); otherwise the delta says how many
+leading positions fell out of the window and appends the new tail.
+
+The first run of an output keeps only that snapshot and publishes no
+delta. Added and changed entries are spooled to temporary files as they
+finish and spliced into the delta at close, so the catalog is never held
+in memory.
+
+Delta artifact (trip-delta/1), <stem>.deltas/<seq>.json:
+    seq, parent, run      sequence number, previous and this run's id
+    window                [start, end] epoch seconds of this run
+    added                 {name: full entry}
+    removed               [name]
+    changed               {name: {field: new value, ...,
+                                  "p": {"drop": k, "append": [...]} | {"replace": [...]}}}
+    header                top-level output fields that changed (stats,
+                          leaderboard, catalog root, ...); null = removed
+
+A run id is SHA-256(parent id || SHA-256 of the snapshot), so it commits
+to the full published state and to the run it followed. The full output
+carries the same ids under "publication", which is where a client starts
+before applying deltas. The last DELTA_KEEP deltas are kept; a client
+further behind re-fetches the full output. Scoped runs publish no delta.
+
+Usage:
+    python3 delta.py OUTPUT.json DELTA.json... [--out PATH]   # apply deltas to a json-format output
+    python3 delta.py --check                                  # an unchanged rerun publishes nothing
+"""
+
+import hashlib, json, os, shutil
+
+from keystore import _load_json, _write_json_atomic
+from output_writer import _dumps, _write_atomic, _stem
+
+DELTA_FORMAT = "trip-delta/1"
+DELTA_KEEP = 56   # a week of 3-hourly refreshes
+
+
+# Per-run values left out of the digests: they differ between identical runs
+RUN_FIELDS = {"generated": None, "stats": ("timing", "breadcrumbs_signed", "archive", "cache", "checkpoints"),
+              "trip": ("new",)}
+
+
+def _canonical(value):
+    """Numbers as floats (10 and 10.0 are the same score), containers recursively."""
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(_canonical(value), separators=(",", ":"), sort_keys=True)
+                          .encode()).hexdigest()[:16]
+
+
+def _field_digests(doc, skip=()):
+    """Digest per field, without RUN_FIELDS (and without the fields in `skip`)."""
+    out = {}
+    for k, v in doc.items():
+        if k in skip or (k in RUN_FIELDS and RUN_FIELDS[k] is None):
+            continue
+        if k in RUN_FIELDS and isinstance(v, dict):
+            v = {f: x for f, x in v.items() if f not in RUN_FIELDS[k]}
+        out[k] = _digest(v)
+    return out
+
+
+def positions_basis(tle1, tle2, policy):
+    """What an object's samples are a pure function of, besides their epochs."""
+    return _digest([tle1.strip(), tle2.strip(), list(policy)])
+
+
+class _Spool:
+    """
+    One {name: value} section of a delta, streamed to a temporary file as
+    entries finish (like the json writer's body) so it never sits in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+        self.count = 0
+
+    def add(self, name, value):
+        if self._f is None:
+            self._f = open(self.path, "w")
+        self._f.write(f"{',' if self.count else ''}{_dumps(name)}:{_dumps(value)}")
+        self.count += 1
+
+    def copy_to(self, out):
+        out.write("{")
+        if self._f is not None:
+            self._f.close()
+            with open(self.path) as body:
+                shutil.copyfileobj(body, out, 1 << 20)
+        out.write("}")
+
+    def discard(self):
+        if self._f is not None:
+            self._f.close()
+            os.remove(self.path)
+            self._f = None
+
+
+class DeltaPublisher:
+    """
+    Collects the current run's entries one at a time (add), then writes the
+    delta against the stored snapshot (close) and, once the full output is
+    safely written, the new snapshot (commit).
+    """
+
+    def __init__(self, state_dir, output_path, window):
+        self.path = os.path.join(state_dir, "published.json")
+        self.output_path = output_path
+        self.delta_dir = _stem(output_path) + ".deltas"
+        self.window = list(window)
+        prev = _load_json(self.path)
+        # A snapshot of another output is a different series: start over
+        self.prev = prev if prev.get("output") == os.path.basename(output_path) else {}
+        self.prev_objects = self.prev.get("objects", {})
+        self.objects = {}
+        spool = f"{self.delta_dir}.%s.tmp.{os.getpid()}"
+        self.added, self.changed = _Spool(spool % "added"), _Spool(spool % "changed")
+        self.publication = None
+
+    def add(self, name, entry, epochs, basis, step_s):
+        """
+        Diff one finished entry. `epochs` are its sample epochs, `basis` its
+        positions_basis(), `step_s` its sampling interval (None if adaptive).
+        """
+        fields = _field_digests(entry, skip=("p",))
+        span = [epochs[0], epochs[-1], len(epochs)] if epochs else [None, None, 0]
+        self.objects[name] = {"f": fields, "b": basis, "e": span, "s": step_s}
+        if not self.prev:
+            return  # first run of this output: no delta, the snapshot digests are all it needs
+
+        old = self.prev_objects.get(name)
+        if old is None:
+            self.added.add(name, entry)
+            return
+        change = {k: entry[k] for k, h in fields.items() if old["f"].get(k) != h}
+        change.update({k: None for k in old["f"] if k not in fields})
+        p = self._positions(old, entry["p"], epochs, basis, step_s)
+        if p:
+            change["p"] = p
+        if change:
+            self.changed.add(name, change)
+
+    def _positions(self, old, compact, epochs, basis, step_s):
+        span = [epochs[0], epochs[-1], len(epochs)] if epochs else [None, None, 0]
+        if old["b"] == basis and old["e"] == span:
+            return None  # same samples of the same trajectory
+        old_first, old_last, old_count = old["e"]
+        shift = self.window[0] - self.prev["window"][0]
+        if (step_s and old["s"] == step_s and old["b"] == basis and shift % step_s == 0
+                and old_count and epochs and epochs[0] >= old_first):
+            # Same trajectory on the same grid: the overlap is sample-for-sample identical
+            kept = sum(1 for t in epochs if t <= old_last)
+            if old_count >= kept:
+                return {"drop": old_count - kept, "append": compact[kept:]}
+        return {"replace": compact}
+
+    def close(self, header):
+        """
+        Write this run's delta (if there is a previous run) against the
+        output `header` (everything but the satellites) and return the
+        publication block for it.
+        """
+        fields = _field_digests(header, skip=("publication",))
+        snapshot = {"objects": self.objects, "window": self.window, "header": fields}
+        parent = self.prev.get("run")
+        seq = self.prev.get("seq", 0) + 1
+        run = hashlib.sha256(bytes.fromhex(parent or "") + hashlib.sha256(
+            _dumps(snapshot).encode()).digest()).hexdigest()
+        self._snapshot = dict(snapshot, output=os.path.basename(self.output_path), seq=seq, run=run,
+                              oldest=self.prev.get("oldest", seq) if parent else seq)
+        self.publication = {"seq": seq, "run": run, "parent": parent, "delta": None}
+        if not parent:
+            return self.publication
+
+        delta = {
+            "format": DELTA_FORMAT,
+            "seq": seq,
+            "parent": parent,
+            "run": run,
+            "window": self.window,
+            "removed": [n for n in self.prev_objects if n not in self.objects],
+            "header": {k: header[k] for k, h in fields.items() if self.prev["header"].get(k) != h},
+        }
+        delta["header"].update({k: None for k in self.prev["header"] if k not in fields})
+
+        # The spooled added/changed sections are spliced in behind the small fields
+        os.makedirs(self.delta_dir, exist_ok=True)
+        name = f"{seq:08d}.json"
+        path = os.path.join(self.delta_dir, name)
+        tmp = f"{path}.tmp.{os.getpid()}"
+        with open(tmp, "w") as out:
+            out.write(_dumps(delta)[:-1] + ',"added":')
+            self.added.copy_to(out)
+            out.write(',"changed":')
+            self.changed.copy_to(out)
+            out.write("}")
+        os.replace(tmp, path)
+        self.added.discard()
+        self.changed.discard()
+        oldest = max(self._snapshot["oldest"], seq - DELTA_KEEP + 1)
+        for old in range(self._snapshot["oldest"], oldest):
+            try:
+                os.remove(os.path.join(self.delta_dir, f"{old:08d}.json"))
+            except FileNotFoundError:
+                pass
+        self._snapshot["oldest"] = oldest
+        self.publication.update({
+            "delta": f"{os.path.basename(self.delta_dir)}/{name}", "oldest": oldest,
+            "added": self.added.count, "removed": len(delta["removed"]), "changed": self.changed.count,
+        })
+        return self.publication
+
+    def commit(self):
+        """Persist the snapshot; only after the full output is in place."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        _write_json_atomic(self.path, self._snapshot)
+
+
+# ============================================================
+# CLIENT SIDE
+# ============================================================
+def apply_delta(doc, delta):
+    """
+    Apply one delta in place to a json-format output document (as loaded
+    with json.load). The delta must follow the document's run.
+    """
+    if delta.get("format") != DELTA_FORMAT:
+        raise ValueError(f"not a {DELTA_FORMAT} delta")
+    current = (doc.get("publication") or {}).get("run")
+    if delta["parent"] != current:
+        raise ValueError(f"delta {delta['seq']} follows run {delta['parent'][:12]}, "
+                         f"document is at {(current or 'none')[:12]}")
+
+    satellites = doc["satellites"]
+    for name in delta["removed"]:
+        satellites.pop(name, None)
+    for name, change in delta["changed"].items():
+        entry = satellites[name]
+        for field, value in change.items():
+            if field == "p":
+                if "replace" in value:
+                    entry["p"] = value["replace"]
+                else:
+                    entry["p"] = entry["p"][value["drop"]:] + value["append"]
+            elif value is None:
+                entry.pop(field, None)
+            else:
+                entry[field] = value
+    satellites.update(delta["added"])
+    for field, value in delta["header"].items():
+        if value is None:
+            doc.pop(field, None)
+        else:
+            doc[field] = value
+    doc["publication"] = {"seq": delta["seq"], "run": delta["run"], "parent": delta["parent"]}
+    return doc
+
+
+if __name__ == "__main__":
+    import argparse, sys, tempfile
+
+    if sys.argv[1:2] == ["--check"]:
+        from orbital_trip_pipeline_v2 import run_pipeline
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "out.json")
+            for _ in range(2):
+                run_pipeline(out, state_dir=os.path.join(tmp, "state"), cache_dir=None, screen_km=0, quiet=True)
+            with open(out) as f:
+                pub = json.load(f)["publication"]
+            with open(os.path.join(os.path.dirname(out), pub["delta"])) as f:
+                delta = json.load(f)
+        empty = not (delta["added"] or delta["removed"] or delta["changed"] or delta["header"])
+        print(f"  {'✓' if empty else '✗'} unchanged rerun: +{len(delta['added'])} -{len(delta['removed'])} "
+              f"~{len(delta['changed'])}, header {sorted(delta['header'])}\n")
+        sys.exit(0 if empty else 1)
+
+    parser = argparse.ArgumentParser(description="Apply trip-delta/1 files to a json-format pipeline output")
+    parser.add_argument("output")
+    parser.add_argument("deltas", nargs="+")
+    parser.add_argument("--out", help="write the updated document here (default: just report)")
+    args = parser.parse_args()
+
+    with open(args.output) as f:
+        doc = json.load(f)
+    for path in args.deltas:
+        with open(path) as f:
+            delta = json.load(f)
+        apply_delta(doc, delta)
+        print(f"  ✓ seq {delta['seq']}: +{len(delta['added'])} -{len(delta['removed'])} "
+              f"~{len(delta['changed'])} -> run {delta['run'][:12]}")
+    if args.out:
+        _write_atomic(args.out, _dumps(doc))
+        print(f"  ✓ Wrote {args.out}")
@@ -0,0 +1,95 @@
+"""
+Orbital TrIP — On-Disk Propagation Cache
+Content-addressed store for propagated ephemerides. The key is a hash
+of (tle1, tle2, model, window start, hours, interval), so an unchanged
+TLE over the same window is never re-propagated.
+
+Entries are single .npz files written to a temp name and renamed into
+place, so several processes can share one cache directory: readers see
+a complete entry or none. Hits bump the file mtime; evict() removes the
+least recently used entries until the cache fits its size budget,
+holding an flock so two evictions never race.
+"""
+
+import fcntl, hashlib, os, zipfile
+import numpy as np
+
+CACHE_DIR = ".trip_cache"
+CACHE_MAX_MB = 512
+
+
+def cache_key(tle1, tle2, model, start, hours, interval):
+    payload = "\n".join([tle1.strip(), tle2.strip(), model, start, str(hours), str(interval)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class EphemerisCache:
+    """Directory of <key[:2]>/<key>.npz entries holding r, v, e arrays."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evicted = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".npz")
+
+    def get(self, key):
+        """Return (r, v, e) for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            with np.load(path) as npz:
+                value = npz["r"], npz["v"], npz["e"]
+            os.utime(path)
+        except (zipfile.BadZipFile, EOFError):
+            # Truncated or half-written entry: drop it and recompute
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.misses += 1
+            return None
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, r, v, e):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.{os.getpid()}.npz"
+        np.savez(tmp, r=r, v=v, e=e)
+        os.replace(tmp, path)
+
+    def evict(self):
+        """Drop least-recently-used entries until under max_bytes."""
+        with open(os.path.join(self.cache_dir, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            entries, total = [], 0
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith(".npz") or ".tmp." in name:
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evicted += 1
+        return total
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evicted": self.evicted}
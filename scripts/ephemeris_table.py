@@ -0,0 +1,363 @@
+"""
+Orbital TrIP — Precomputed Ephemeris Tables (trip-eph/1)
+TEME position + velocity per object on a regular grid, so a position at
+any instant in the window is a cubic Hermite interpolation between two
+stored states instead of an SGP4 call, and a snapshot of the whole
+catalog at one instant is a handful of array operations.
+
+The pipeline's 30-minute output grid is far too coarse for this (Hermite
+misses LEO midpoints by hundreds of km), so each object gets the longest
+step in TABLE_STEPS whose interpolation error stays within tol_km. The
+step is first estimated from the orbit (angular rate and radius at
+perigee), then checked against direct SGP4 at every interval midpoint,
+where the cubic's error peaks; objects that miss are rebuilt at the next
+shorter step. The worst midpoint error, with BOUND_MARGIN on top, is
+stored per object and returned with every lookup as its error bound. Objects sharing a step
+form a band, and a snapshot interpolates each band in one vectorized
+pass.
+
+File layout (little-endian):
+    header     magic "TRIPEPH1", version, epoch_start, epoch_end, tol_km,
+               n_bands, dir_offset
+    bands      per band: float32 state[n_steps][n_sats][6] (r km, v km/s),
+               time-major so a snapshot reads two contiguous rows
+    directory  n_bands x (step_s, n_steps, n_sats, data_offset, meta_offset)
+    meta       per band: norad u4[n_sats], err_km f4[n_sats]
+
+Samples where SGP4 failed are stored as NaN, so lookups there give NaN.
+
+Usage:
+    python3 ephemeris_table.py PATH                        # bands + error bounds
+    python3 ephemeris_table.py PATH NORAD EPOCH            # one lookup
+    python3 ephemeris_table.py --check [TOL_KM [N]]        # build for the embedded (or an N-object
+                                                           # synthetic) catalog, compare against SGP4
+"""
+
+import os, struct
+from datetime import timedelta
+
+import numpy as np
+
+from propagation import parse_tles, propagate_catalog
+from frames import teme_to_geodetic
+from sampling import hermite
+
+MAGIC = b"TRIPEPH1"
+VERSION = 1
+FORMAT = "trip-eph/1"
+TABLE_STEPS = (3600, 1800, 900, 600, 300, 120, 60)   # seconds, longest first
+TABLE_TOL_KM = 1.0
+TABLE_BATCH_SAMPLES = 1 << 20   # objects x samples per propagation batch, bounds peak memory
+BOUND_MARGIN = 1.25    # midpoint error -> bound: the 4th derivative varies across an interval
+MU_KM3_S2 = 398600.4418
+
+_HEADER = struct.Struct("<8sHxxqqdIxxxxQ")
+_BAND = np.dtype([("step", "<i4"), ("n_steps", "<u4"), ("n_sats", "<u4"),
+                  ("data_offset", "<u8"), ("meta_offset", "<u8")])
+
+
+def _hermite_velocity(ra, va, rb, vb, h, s):
+    """Time derivative of sampling.hermite (km/s)."""
+    s2 = s * s
+    return ((6 * s2 - 6 * s) * ra + (3 * s2 - 4 * s + 1) * h * va
+            + (-6 * s2 + 6 * s) * rb + (3 * s2 - 2 * s) * h * vb) / h
+
+
+def estimated_step(sat, tol_km=TABLE_TOL_KM):
+    """
+    Longest TABLE_STEPS entry whose Hermite error estimate, (w h)^4 r / 384
+    with w and r the angular rate and radius at perigee, is within tol_km.
+    """
+    n = sat.no_kozai / 60.0                           # rad/s
+    e = min(sat.ecco, 0.99)
+    a = (MU_KM3_S2 / n ** 2) ** (1 / 3)
+    w = n * np.sqrt(1 + e) / (1 - e) ** 1.5
+    for step in TABLE_STEPS:
+        if (w * step) ** 4 * a * (1 - e) / 384 <= tol_km:
+            return step
+    return TABLE_STEPS[-1]
+
+
+def _julian(t):
+    """Unix seconds -> (jd, fr) split the way frames/sgp4 expect."""
+    days = np.asarray(t, dtype=np.float64) / 86400.0
+    whole = np.floor(days)
+    return 2440587.5 + whole, days - whole
+
+
+# ============================================================
+# BUILD
+# ============================================================
+def build_ephemeris(tles, norads, path, end, hours, tol_km=TABLE_TOL_KM, cache=None):
+    """
+    Write a trip-eph/1 table for (name, tle1, tle2) triples over the
+    `hours` ending at `end`; `norads` maps name -> NORAD ID. Returns the
+    header block for the pipeline output.
+    """
+    sats, names, _ = parse_tles(tles)
+    by_name = {tle[0]: tle for tle in tles}
+    pending = {step: [] for step in TABLE_STEPS}
+    for sat, name in zip(sats, names):
+        pending[estimated_step(sat, tol_km)].append(by_name[name])
+
+    start = end - timedelta(hours=hours)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    rows_tmp = f"{path}.rows.{os.getpid()}"
+    bands, errors = [], []
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        for k, step in enumerate(TABLE_STEPS):
+            last = k == len(TABLE_STEPS) - 1
+            band_norads, band_err, data_offset, n_steps = [], [], f.tell(), int(hours * 3600 // step) + 1
+            group, chunk = pending[step], max(1, TABLE_BATCH_SAMPLES // (2 * n_steps))
+            rows = open(rows_tmp, "wb")   # object-major as propagated; transposed below
+            for lo in range(0, len(group), chunk):
+                # Every state plus every interval midpoint in one propagation
+                batch = propagate_catalog(group[lo:lo + chunk], end, hours, step / 120, cache)
+                ok = batch["e"] == 0
+                r = np.where(ok[..., None], batch["r"], np.nan)
+                v = np.where(ok[..., None], batch["v"], np.nan)
+                state = np.concatenate([r[:, ::2], v[:, ::2]], axis=-1).astype(np.float32)
+                s = state.astype(np.float64)
+                guess = hermite(s[:, :-1, :3], s[:, :-1, 3:], s[:, 1:, :3], s[:, 1:, 3:], float(step), 0.5)
+                miss = np.linalg.norm(guess - r[:, 1::2], axis=-1)
+                err = np.where(np.isnan(miss), 0.0, miss).max(axis=1, initial=0.0) * BOUND_MARGIN
+                for i, name in enumerate(batch["names"]):
+                    if err[i] > tol_km and not last:
+                        pending[TABLE_STEPS[k + 1]].append(by_name[name])
+                        continue
+                    rows.write(state[i].tobytes())
+                    band_norads.append(norads[name])
+                    band_err.append(err[i])
+            rows.close()
+            if not band_norads:
+                continue
+            obj_major = np.memmap(rows_tmp, dtype="<f4", mode="r", shape=(len(band_norads), n_steps, 6))
+            block = max(1, TABLE_BATCH_SAMPLES // len(band_norads))
+            for s0 in range(0, n_steps, block):
+                f.write(np.ascontiguousarray(obj_major[:, s0:s0 + block].transpose(1, 0, 2)).tobytes())
+            del obj_major
+            meta_offset = f.tell()
+            f.write(np.asarray(band_norads, dtype="<u4").tobytes())
+            f.write(np.asarray(band_err, dtype="<f4").tobytes())
+            bands.append((step, n_steps, len(band_norads), data_offset, meta_offset))
+            errors += band_err
+        dir_offset = f.tell()
+        f.write(np.array(bands, dtype=_BAND).tobytes())
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, int(start.timestamp()), int(end.timestamp()), tol_km,
+                             len(bands), dir_offset))
+    if os.path.exists(rows_tmp):
+        os.remove(rows_tmp)
+    os.replace(tmp, path)
+
+    errors = np.asarray(errors)
+    return {
+        "file": os.path.basename(path), "format": FORMAT, "frame": "TEME",
+        "tol_km": tol_km, "objects": len(errors),
+        "bands": {str(b[0]): b[2] for b in bands},
+        "err_km": {"max": round(float(errors.max()), 4), "p95": round(float(np.percentile(errors, 95)), 4)}
+        if len(errors) else None,
+    }
+
+
+# ============================================================
+# LOOKUP
+# ============================================================
+class EphemerisTable:
+    """Memory-mapped reader; a lookup touches only the two bracketing states per object."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, self.epoch_start, self.epoch_end, self.tol_km, n_bands, dir_offset = \
+                _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a {FORMAT} file")
+        directory = np.fromfile(path, dtype=_BAND, count=n_bands, offset=dir_offset)
+
+        self.bands = []
+        self._rows = {}
+        for b, (step, n_steps, n_sats, data_offset, meta_offset) in enumerate(directory.tolist()):
+            meta = np.fromfile(path, dtype="<u4", count=2 * n_sats, offset=meta_offset)
+            band = {
+                "step": step,
+                "state": np.memmap(path, dtype="<f4", mode="r", offset=data_offset,
+                                   shape=(n_steps, n_sats, 6)).view(np.ndarray),   # plain indexing, still mapped
+                "norads": meta[:n_sats],
+                "err_km": meta[n_sats:].view("<f4"),
+            }
+            self.bands.append(band)
+            self._rows.update({int(n): (b, i) for i, n in enumerate(band["norads"])})
+        norads = np.array(list(self._rows), dtype=np.int64)
+        order = np.argsort(norads)
+        where = np.array(list(self._rows.values()), dtype=np.int64).reshape(-1, 2)[order]
+        self._sorted = norads[order], where[:, 0], where[:, 1]   # vectorized norad -> (band, row)
+        # Band-order catalog columns for positions_at_all()
+        sizes = [len(band["norads"]) for band in self.bands]
+        self._all = {
+            "norad": np.concatenate([band["norads"] for band in self.bands]) if sizes else np.zeros(0, np.uint32),
+            "err_km": np.concatenate([band["err_km"] for band in self.bands]) if sizes else np.zeros(0, np.float32),
+        }
+        self._sizes = sizes
+
+    @property
+    def norads(self):
+        return list(self._rows)
+
+    def _bracket(self, band, t):
+        """Interval index and fraction of Unix time(s) t in a band's grid."""
+        if np.any((t < self.epoch_start) | (t > self.epoch_end)):
+            raise ValueError(f"time outside the table window [{self.epoch_start}, {self.epoch_end}]")
+        x = (np.asarray(t, dtype=np.float64) - self.epoch_start) / band["step"]
+        k = np.minimum(np.floor(x).astype(np.int64), band["state"].shape[0] - 2)
+        return k, x - k
+
+    def _interpolate(self, a, b, step, s, t, geodetic=True):
+        a, b = a.astype(np.float64), b.astype(np.float64)
+        s = np.asarray(s)[..., None]
+        r = hermite(a[..., :3], a[..., 3:], b[..., :3], b[..., 3:], step, s)
+        v = _hermite_velocity(a[..., :3], a[..., 3:], b[..., :3], b[..., 3:], step, s)
+        if not geodetic:
+            return {"r": r, "v": v}
+        lat, lon, alt = teme_to_geodetic(r, *_julian(t))
+        return {"r": r, "v": v, "lat": lat, "lon": lon, "alt": alt}
+
+    def position_at(self, norad, t):
+        """
+        TEME r, v and geodetic lat/lon/alt of one object at Unix time t
+        (scalar or array), plus its error bound err_km.
+        """
+        b, row = self._rows[norad]
+        band = self.bands[b]
+        k, s = self._bracket(band, t)
+        state = band["state"]
+        out = self._interpolate(state[k, row], state[k + 1, row], float(band["step"]), s, t)
+        out["err_km"] = float(band["err_km"][row])
+        return out
+
+    def positions_at(self, norads, t, geodetic=True):
+        """
+        Object norads[i] at Unix time t[i] for arrays of pairs (t may be a
+        scalar), with one gather per band: r, v and lat/lon/alt in input
+        order. Unknown NORAD IDs raise KeyError.
+        """
+        norads = np.asarray(norads, dtype=np.int64)
+        t = np.broadcast_to(np.asarray(t, dtype=np.float64), norads.shape)
+        keys, bands, rows = self._sorted
+        at = np.minimum(np.searchsorted(keys, norads), max(len(keys) - 1, 0))
+        if len(norads) and (not len(keys) or np.any(keys[at] != norads)):
+            raise KeyError(f"not in the table: {sorted(set(norads.tolist()) - set(keys.tolist()))[:5]}")
+        out = {}
+        for b, band in enumerate(self.bands):
+            sel = np.flatnonzero(bands[at] == b)
+            if not len(sel):
+                continue
+            k, s = self._bracket(band, t[sel])
+            row, state = rows[at[sel]], band["state"]
+            part = self._interpolate(state[k, row], state[k + 1, row], float(band["step"]), s, t[sel], geodetic)
+            for name, value in part.items():
+                out.setdefault(name, np.full(norads.shape + value.shape[1:], np.nan))[sel] = value
+        names = ("r", "v") + (("lat", "lon", "alt") if geodetic else ())
+        return {name: out.get(name, np.full(norads.shape + ((3,) if name in "rv" else ()), np.nan))
+                for name in names}
+
+    def positions_at_all(self, t, geodetic=False):
+        """
+        The whole catalog at one Unix time t: arrays norad, r (N, 3),
+        v (N, 3) and err_km in band order. Each band's Hermite weights are
+        scalars at one instant, so every band is interpolated by a single
+        (N, 2, 4) @ (N, 4, 3) product. geodetic=True adds lat/lon/alt (the
+        TEME -> WGS84 conversion costs more than the interpolation).
+        """
+        if not self.epoch_start <= t <= self.epoch_end:
+            raise ValueError(f"time outside the table window [{self.epoch_start}, {self.epoch_end}]")
+        a, b, weights = [], [], []
+        for band in self.bands:
+            state, h = band["state"], float(band["step"])
+            x = (t - self.epoch_start) / h
+            k = min(int(x), state.shape[0] - 2)
+            s = x - k
+            s2, s3 = s * s, s * s * s
+            a.append(state[k])
+            b.append(state[k + 1])
+            weights.append([[2 * s3 - 3 * s2 + 1, (s3 - 2 * s2 + s) * h, -2 * s3 + 3 * s2, (s3 - s2) * h],
+                            [(6 * s2 - 6 * s) / h, 3 * s2 - 4 * s + 1, (6 * s - 6 * s2) / h, 3 * s2 - 2 * s]])
+        if not a:
+            return {k: np.zeros(0) for k in ("norad", "r", "v", "err_km") + (("lat", "lon", "alt") if geodetic else ())}
+        ends = np.concatenate([np.concatenate(a), np.concatenate(b)], axis=1).reshape(-1, 4, 3)   # ra va rb vb
+        rv = np.repeat(np.array(weights), self._sizes, axis=0) @ ends
+        out = {"r": rv[:, 0], "v": rv[:, 1]}
+        if geodetic:
+            out["lat"], out["lon"], out["alt"] = teme_to_geodetic(out["r"], *_julian(t))
+        out.update(self._all)
+        return out
+
+if __name__ == "__main__":
+    import sys, tempfile, time
+
+    if len(sys.argv) < 2:
+        sys.exit(__doc__[__doc__.index("Usage:"):].rstrip())
+
+    if sys.argv[1:2] == ["--check"]:
+        from sgp4.api import SatrecArray
+        from satellite_catalog import get_full_catalog
+        from synthetic_catalog import synthetic_catalog
+        from orbital_trip_pipeline_v2 import PROPAGATION_END, PROPAGATION_HOURS
+
+        tol = float(sys.argv[2]) if len(sys.argv) > 2 else TABLE_TOL_KM
+        source = synthetic_catalog(int(sys.argv[3])) if len(sys.argv) > 3 else get_full_catalog().items()
+        tles, norads = [], {}
+        for name, entry in source:
+            if entry.get("tle1"):
+                tles.append((name, entry["tle1"], entry["tle2"]))
+                norads[name] = entry["norad"]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "catalog.eph")
+            t0 = time.perf_counter()
+            info = build_ephemeris(tles, norads, path, PROPAGATION_END, PROPAGATION_HOURS, tol)
+            build = time.perf_counter() - t0
+            table = EphemerisTable(path)
+            print(f"\n  Built {info['objects']} objects in {build:.2f}s, {os.path.getsize(path) >> 20} MB; "
+                  f"steps {info['bands']}; bound max {info['err_km']['max']} km")
+
+            # Random off-grid instants: table snapshot vs one vectorized SGP4 call over the catalog
+            sats, names, _ = parse_tles(tles)
+            array = SatrecArray(sats)
+            where = {int(n): i for i, n in enumerate(table.positions_at_all(table.epoch_start)["norad"])}
+            rows = [where[norads[n]] for n in names]
+            times = np.random.default_rng(7).uniform(table.epoch_start, table.epoch_end, 50)
+            timing = np.zeros(4)   # table TEME, SGP4 TEME, table geodetic, SGP4 geodetic
+            worst, over = 0.0, 0
+            for t in times:
+                jd, fr = _julian([t])
+                t0 = time.perf_counter()
+                snap = table.positions_at_all(t)
+                t1 = time.perf_counter()
+                e, r, _ = array.sgp4(jd, fr)
+                t2 = time.perf_counter()
+                table.positions_at_all(t, geodetic=True)
+                t3 = time.perf_counter()
+                teme_to_geodetic(array.sgp4(jd, fr)[1], jd, fr)
+                timing += np.diff([t0, t1, t2, t3, time.perf_counter()])
+                miss = np.linalg.norm(snap["r"][rows] - r[:, 0], axis=-1)[e[:, 0] == 0]
+                worst = max(worst, float(miss.max()))
+                over += int((miss > snap["err_km"][rows][e[:, 0] == 0]).sum())
+            ms = timing / len(times) * 1e3
+            print(f"  {len(times)} random instants: worst miss {worst:.3f} km (tol {tol:g}), "
+                  f"{over} of {len(times) * len(rows)} lookups above their object's bound")
+            print(f"  Catalog snapshot, TEME: {ms[0]:.2f} ms table vs {ms[1]:.2f} ms vectorized SGP4; "
+                  f"geodetic: {ms[2]:.2f} ms vs {ms[3]:.2f} ms\n")
+        sys.exit()
+
+    table = EphemerisTable(sys.argv[1])
+    if len(sys.argv) > 3:
+        p = table.position_at(int(sys.argv[2]), float(sys.argv[3]))
+        print(f"  lat {float(p['lat']):.4f}  lon {float(p['lon']):.4f}  alt {float(p['alt']):.3f} km  "
+              f"(± {p['err_km']:.3f} km)  r {np.round(p['r'], 3).tolist()}  v {np.round(p['v'], 5).tolist()}")
+    else:
+        print(f"  {FORMAT}: {len(table.norads)} objects, {table.epoch_start} .. {table.epoch_end}, "
+              f"tol {table.tol_km:g} km")
+        for band in table.bands:
+            err = band["err_km"]
+            print(f"  step {band['step']:5d}s  {len(err):6d} objects  {band['state'].shape[0]:5d} states  "
+                  f"err max {err.max():.3f} km")
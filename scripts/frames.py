@@ -0,0 +1,106 @@
+"""
+Orbital TrIP — Vectorized Frame Conversions
+TEME (SGP4 output) -> ECEF -> WGS84 geodetic over whole NumPy arrays.
+
+    GMST       IAU-82 (Vallado gstime), from split Julian dates
+    TEME->ECEF rotation about z by GMST (polar motion neglected)
+    geodetic   Bowring's method with two refinement passes on WGS84
+
+Every function broadcasts: `r` may be (3,), (N_steps, 3) or
+(N_sats, N_steps, 3) with jd/fr matching the step axis.
+
+Usage:
+    python3 frames.py        # accuracy + speed vs scalar conversion
+"""
+
+import numpy as np
+
+TWO_PI = 2.0 * np.pi
+WGS84_A = 6378.137                      # km
+WGS84_F = 1.0 / 298.257223563
+WGS84_B = WGS84_A * (1.0 - WGS84_F)
+WGS84_E2 = WGS84_F * (2.0 - WGS84_F)
+WGS84_EP2 = WGS84_E2 / (1.0 - WGS84_E2)
+
+
+# ============================================================
+# SIDEREAL TIME
+# ============================================================
+def gmst82(jd, fr=0.0):
+    """IAU-82 Greenwich mean sidereal time (radians) for UT1 Julian dates."""
+    tut1 = ((np.asarray(jd) - 2451545.0) + fr) / 36525.0
+    seconds = (-6.2e-6 * tut1 ** 3 + 0.093104 * tut1 ** 2
+               + (876600.0 * 3600.0 + 8640184.812866) * tut1 + 67310.54841)
+    return np.mod(np.radians(seconds / 240.0), TWO_PI)
+
+
+# ============================================================
+# ROTATIONS
+# ============================================================
+def teme_to_ecef(r, jd, fr=0.0):
+    """Rotate TEME vectors into the Earth-fixed frame."""
+    g = gmst82(jd, fr)
+    c, s = np.cos(g), np.sin(g)
+    x, y = r[..., 0], r[..., 1]
+    return np.stack([c * x + s * y, -s * x + c * y, r[..., 2]], axis=-1)
+
+
+def ecef_to_geodetic(r):
+    """WGS84 geodetic lat, lon (degrees) and ellipsoidal height (km)."""
+    x, y, z = r[..., 0], r[..., 1], r[..., 2]
+    p = np.hypot(x, y)
+
+    beta = np.arctan2(z * WGS84_A, p * WGS84_B)  # reduced latitude seed
+    for _ in range(2):
+        sb, cb = np.sin(beta), np.cos(beta)
+        lat = np.arctan2(z + WGS84_EP2 * WGS84_B * sb ** 3, p - WGS84_E2 * WGS84_A * cb ** 3)
+        beta = np.arctan2((1.0 - WGS84_F) * np.sin(lat), np.cos(lat))
+
+    sl, cl = np.sin(lat), np.cos(lat)
+    alt = p * cl + z * sl - WGS84_A * np.sqrt(1.0 - WGS84_E2 * sl * sl)
+    return np.degrees(lat), np.degrees(np.arctan2(y, x)), alt
+
+
+def teme_to_geodetic(r, jd, fr=0.0):
+    """TEME position(s) at jd+fr -> WGS84 lat, lon (deg, [-180, 180]) and alt (km)."""
+    return ecef_to_geodetic(teme_to_ecef(np.asarray(r, dtype=np.float64), jd, fr))
+
+
+if __name__ == "__main__":
+    import math, time
+
+    rng = np.random.default_rng(7)
+    n_sats, n_steps = 2000, 145
+    radius = rng.uniform(6600, 42500, (n_sats, 1, 1))
+    direction = rng.normal(size=(n_sats, n_steps, 3))
+    r = radius * direction / np.linalg.norm(direction, axis=-1, keepdims=True)
+    jd = np.full(n_steps, 2460710.5)
+    fr = np.arange(n_steps) / 48.0
+
+    # Accuracy: round-trip geodetic -> ECEF -> geodetic
+    lat, lon, alt = ecef_to_geodetic(r)
+    la, lo = np.radians(lat), np.radians(lon)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(la) ** 2)
+    back = np.stack([(n + alt) * np.cos(la) * np.cos(lo), (n + alt) * np.cos(la) * np.sin(lo),
+                     (n * (1 - WGS84_E2) + alt) * np.sin(la)], axis=-1)
+    print(f"\n  Geodetic round-trip error: {np.abs(back - r).max() * 1e6:.3f} mm (max)")
+
+    # Speed: vectorized kernel vs the pipeline's old per-point math
+    t0 = time.perf_counter()
+    teme_to_geodetic(r, jd, fr)
+    vec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(n_sats):
+        for j in range(n_steps):
+            x, y, z = r[i, j]
+            jdj = jd[j] + fr[j]
+            _alt = math.sqrt(x * x + y * y + z * z) - 6371.0
+            gmst = 4.894961212 + 6.300388099 * (jdj - 2451545.0)
+            _lon = math.degrees(math.atan2(y, x) - gmst) % 360
+            _lat = math.degrees(math.atan2(z, math.sqrt(x * x + y * y)))
+    scalar = time.perf_counter() - t0
+
+    pts = n_sats * n_steps
+    print(f"  Vectorized WGS84: {pts / vec:14,.0f} points/s")
+    print(f"  Scalar spherical: {pts / scalar:14,.0f} points/s  ({scalar / vec:.0f}x slower)\n")
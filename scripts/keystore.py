@@ -0,0 +1,108 @@
+"""
+Orbital TrIP — Persistent Identity + Chain State
+Ed25519 seeds and breadcrumb chain heads keyed by NORAD ID, so a
+satellite keeps the same public key across runs and each refresh only
+signs the breadcrumbs after the stored head.
+
+Layout of a state directory:
+    keys.json     {norad: seed_hex}            (mode 0600)
+    chains.json   {norad: {pk, enc, len, genesis, head, last_ts, ...}}
+"""
+
+import json, os
+from nacl.signing import SigningKey
+
+STATE_DIR = ".trip_state"
+
+
+def _load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json_atomic(path, data, mode=None):
+    tmp = f"{path}.tmp.{os.getpid()}"
+    # Created with the final mode so secrets are never readable by others, even briefly
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666 if mode is None else mode)
+    with os.fdopen(fd, "w") as f:
+        if mode is not None:
+            os.fchmod(fd, mode)  # a leftover tmp file keeps its old mode through O_CREAT
+        json.dump(data, f, separators=(",", ":"), sort_keys=True)
+        f.flush()
+        os.fsync(fd)
+    os.replace(tmp, path)
+
+
+# ============================================================
+# KEYSTORE
+# ============================================================
+class KeyStore:
+    """NORAD ID -> Ed25519 seed. Keys are created on first use."""
+
+    def __init__(self, state_dir=STATE_DIR):
+        self.path = os.path.join(state_dir, "keys.json")
+        self._seeds = _load_json(self.path)
+        self._dirty = False
+
+    def seed(self, norad):
+        key = str(norad)
+        if key not in self._seeds:
+            self._seeds[key] = SigningKey.generate().encode().hex()
+            self._dirty = True
+        return bytes.fromhex(self._seeds[key])
+
+    def signing_key(self, norad):
+        return SigningKey(self.seed(norad))
+
+    def save(self):
+        if self._dirty:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            _write_json_atomic(self.path, self._seeds, mode=0o600)
+            self._dirty = False
+
+
+# ============================================================
+# CHAIN STATE
+# ============================================================
+class ChainStateStore:
+    """NORAD ID -> chain head state ({pk, len, genesis, head, last_ts})."""
+
+    def __init__(self, state_dir=STATE_DIR):
+        self.path = os.path.join(state_dir, "chains.json")
+        self._states = _load_json(self.path)
+
+    def get(self, norad):
+        return self._states.get(str(norad))
+
+    def put(self, norad, state):
+        self._states[str(norad)] = state
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        _write_json_atomic(self.path, self._states)
+
+
+def rebuild_chain(keystore, states, norad, positions):
+    """
+    Re-sign a chain from genesis with the stored key and encoding, up to
+    the stored head. Ed25519 is deterministic, so the result must reproduce the
+    stored genesis and head hashes exactly; raises ValueError otherwise.
+    """
+    from orbital_trip_pipeline_v2 import generate_breadcrumb_chain
+    from breadcrumb_codec import ENCODING_LEGACY
+
+    state = states.get(norad)
+    if state is None:
+        raise ValueError(f"no stored chain for NORAD {norad}")
+
+    history = [p for p in positions if p["ts"] <= state["last_ts"]]
+    trip = generate_breadcrumb_chain(str(norad), history, signing_key=keystore.signing_key(norad),
+                                     encoding=state.get("enc", ENCODING_LEGACY))
+
+    if trip["public_key"] != state["pk"]:
+        raise ValueError(f"NORAD {norad}: stored key does not match chain public key")
+    if trip["genesis_hash"] != state["genesis"] or trip["head_hash"] != state["head"]:
+        raise ValueError(f"NORAD {norad}: rebuilt chain diverges from stored genesis/head")
+    return trip
@@ -0,0 +1,255 @@
+"""
+Orbital TrIP — Streaming GEO Maneuver Detector
+Watches near-circular GEO objects (is_geo) one position at a time and
+flags repositioning / plane-change maneuvers as they happen. Each update
+is amortized O(1) and the state is bounded whatever the sampling rate:
+at most RING time slots covering just over a sidereal day, each with the
+running sums of its samples and its newest sample, plus a few
+exponentially-weighted baselines, never the full history. A slot leaves
+the window once its newest sample is a sidereal day old: its sums are
+subtracted and that sample becomes the drift anchor. With samples SLOT_S
+or more apart this is the exact one-day window; denser samples leave a
+slot at a time.
+
+Rolling quantities (per object):
+    drift      longitude drift rate, deg/day, from the position one
+               sidereal day back (cancels the daily libration caused by
+               eccentricity and inclination)
+    incl       inclination proxy, deg: mean |lat| over the day * pi/2
+    alt_std    altitude standard deviation over the day, km
+
+Events:
+    drift          drift rate departs from its baseline by > DRIFT_DELTA
+    inclination    inclination proxy departs from its baseline by > INCL_DELTA
+
+After an event the detector holds for one day (the lagged drift is
+still ramping) and then re-baselines, so one burn gives one event and
+the next burn, e.g. the stop at a new slot, gives another.
+
+State is a plain dict, persisted per NORAD ID in <state_dir>/maneuvers.json
+so detection continues across runs over only the new positions.
+
+Usage:
+    python3 maneuvers.py     # synthetic relocation self-check
+"""
+
+import math, os
+from datetime import datetime, timezone
+
+from catalog_index import orbital_regime
+from keystore import _load_json, _write_json_atomic
+
+SIDEREAL_DAY_S = 86164.0905
+RING = 50                      # window slots; a sidereal day spans at most RING - 1
+SLOT_S = SIDEREAL_DAY_S / (RING - 2)
+TAU_BASELINE_S = 7 * 86400.0   # baseline EWMA time constant
+DRIFT_DELTA = 0.05             # deg/day (~4 km of semi-major axis)
+INCL_DELTA = 0.05              # deg
+MAX_EVENTS = 32                # recent events kept in state
+GEO_MEAN_MOTION = (0.95, 1.05) # rev/day
+GEO_MAX_ECC = 0.01             # eccentric orbits swing in longitude every day, which reads as drift
+
+
+def is_geo(tle2):
+    """
+    GEO regime (catalog_index.orbital_regime) narrowed to the near-circular,
+    near-synchronous orbits the longitude-drift detector models.
+    """
+    if orbital_regime(tle2) != "GEO":
+        return False
+    mean_motion = float(tle2[52:63])
+    ecc = float("0." + tle2[26:33].strip())
+    return GEO_MEAN_MOTION[0] <= mean_motion <= GEO_MEAN_MOTION[1] and ecc < GEO_MAX_ECC
+
+
+def _new_state():
+    return {
+        "t": None, "lon": None, "lon_u": 0.0,
+        "win": [], "anchor": None,
+        "w_n": 0, "s_alt": 0.0, "s_alt2": 0.0, "s_lat": 0.0,
+        "drift_base": None, "incl_base": None, "hold": None, "rebase": False,
+        "n": 0, "events": [],
+    }
+
+
+# ============================================================
+# DETECTOR
+# ============================================================
+class GeoManeuverDetector:
+    """Online detector for one object; `state` round-trips through JSON."""
+
+    def __init__(self, state=None):
+        self.state = state if state is not None else _new_state()
+
+    def _window_add(self, t, lon_u, alt, lat):
+        s = self.state
+        win, k = s["win"], int(t // SLOT_S)
+        # Slots leave the window once their newest sample is a sidereal day
+        # old (exact when samples are >= SLOT_S apart); the newest sample of
+        # the last slot to leave is kept as the drift anchor
+        while win and (win[0][0] <= t - SIDEREAL_DAY_S or win[0][0] // SLOT_S <= k - RING):
+            at, alon, n, a, a2, la = win.pop(0)       # at most RING slots live
+            s["anchor"] = [at, alon]
+            s["w_n"] -= n
+            s["s_alt"] -= a
+            s["s_alt2"] -= a2
+            s["s_lat"] -= la
+        if not win or win[-1][0] // SLOT_S != k:     # slot: newest t, lon_u, then n and sums
+            win.append([t, lon_u, 0, 0.0, 0.0, 0.0])
+        slot = win[-1]
+        slot[:] = [t, lon_u, slot[2] + 1, slot[3] + alt, slot[4] + alt * alt, slot[5] + abs(lat)]
+        s["w_n"] += 1
+        s["s_alt"] += alt
+        s["s_alt2"] += alt * alt
+        s["s_lat"] += abs(lat)
+
+    def _window_reset(self):
+        s = self.state
+        s["win"], s["anchor"] = [], None
+        s["w_n"], s["s_alt"], s["s_alt2"], s["s_lat"] = 0, 0.0, 0.0, 0.0
+
+    def update(self, epoch, lat, lon, alt):
+        """Feed one position (Unix seconds, deg, deg, km). Returns new events."""
+        s = self.state
+        if s["t"] is not None:
+            if epoch <= s["t"]:
+                return []
+            if epoch - s["t"] > SIDEREAL_DAY_S:
+                self._window_reset()  # gap longer than the window: start it over
+            s["lon_u"] += (lon - s["lon"] + 180.0) % 360.0 - 180.0
+        else:
+            s["lon_u"] = lon
+        dt = epoch - s["t"] if s["t"] is not None else 0.0
+        s["t"], s["lon"] = epoch, lon
+        s["n"] += 1
+        self._window_add(epoch, s["lon_u"], alt, lat)
+
+        anchor = s["anchor"]
+        if anchor is None or epoch - anchor[0] > 1.5 * SIDEREAL_DAY_S:
+            return []  # not a full day of history yet
+        drift = (s["lon_u"] - anchor[1]) / (epoch - anchor[0]) * 86400.0
+        incl = self.inclination()
+
+        if s["hold"] is not None and epoch < s["hold"]:
+            return []
+        if s["drift_base"] is None or s["rebase"]:
+            s["drift_base"], s["incl_base"] = drift, incl
+            s["rebase"] = False
+            return []
+
+        events = []
+        if abs(drift - s["drift_base"]) > DRIFT_DELTA:
+            events.append(self._event(epoch, "drift", drift, s["drift_base"]))
+        if abs(incl - s["incl_base"]) > INCL_DELTA:
+            events.append(self._event(epoch, "inclination", incl, s["incl_base"]))
+        if events:
+            s["hold"], s["rebase"] = epoch + SIDEREAL_DAY_S, True
+            s["events"] = (s["events"] + events)[-MAX_EVENTS:]
+            return events
+
+        alpha = 1.0 - math.exp(-dt / TAU_BASELINE_S)
+        s["drift_base"] += alpha * (drift - s["drift_base"])
+        s["incl_base"] += alpha * (incl - s["incl_base"])
+        return []
+
+    def _event(self, epoch, kind, value, baseline):
+        return {
+            "ts": datetime.fromtimestamp(epoch, timezone.utc).isoformat(),
+            "epoch": epoch, "kind": kind,
+            "value": round(value, 4), "baseline": round(baseline, 4),
+        }
+
+    def feed(self, positions):
+        """Feed pipeline position dicts; already-seen epochs are skipped."""
+        events = []
+        for p in positions:
+            events += self.update(p["epoch"], p["lat"], p["lon"], p["alt"])
+        return events
+
+    def inclination(self):
+        s = self.state
+        return s["s_lat"] / s["w_n"] * math.pi / 2 if s["w_n"] else 0.0
+
+    def summary(self, since=None):
+        """Current rolling values plus remembered events at or after `since`."""
+        s = self.state
+        n = s["w_n"]
+        mean_alt = s["s_alt"] / n if n else 0.0
+        var_alt = max(0.0, s["s_alt2"] / n - mean_alt * mean_alt) if n else 0.0
+        drift = None
+        if s["anchor"] is not None and n:
+            drift = (s["lon_u"] - s["anchor"][1]) / (s["t"] - s["anchor"][0]) * 86400.0
+        return {
+            "drift": round(drift, 4) if drift is not None else None,
+            "incl": round(self.inclination(), 4),
+            "alt_std": round(math.sqrt(var_alt), 2),
+            "events": [e for e in s["events"] if since is None or e["epoch"] >= since],
+        }
+
+
+# ============================================================
+# PERSISTENCE
+# ============================================================
+class ManeuverStateStore:
+    """NORAD ID -> detector state, alongside keys.json / chains.json."""
+
+    def __init__(self, state_dir):
+        self.path = os.path.join(state_dir, "maneuvers.json")
+        self._states = _load_json(self.path)
+
+    def get(self, norad):
+        return self._states.get(str(norad))
+
+    def put(self, norad, state):
+        self._states[str(norad)] = state
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        _write_json_atomic(self.path, self._states)
+
+
+if __name__ == "__main__":
+    import json
+    from satellite_catalog import get_full_catalog
+    from propagation import propagate_catalog, positions_from_batch
+
+    catalog = get_full_catalog()
+    luch = catalog["LUCH (OLYMP-K1)"]
+    end = datetime(2025, 2, 16, tzinfo=timezone.utc)
+    batch = propagate_catalog([("LUCH", luch["tle1"], luch["tle2"])], end, 10 * 24, 30)
+    (_, positions), = positions_from_batch(batch)
+
+    # Unperturbed SGP4 arc: no maneuvers
+    quiet = GeoManeuverDetector().feed(positions)
+
+    # Synthetic relocation: start drifting 0.5 deg/day east at day 4, stop at day 7
+    burn, stop = positions[0]["epoch"] + 4 * 86400, positions[0]["epoch"] + 7 * 86400
+    moved = []
+    for p in positions:
+        shift = 0.5 * (min(p["epoch"], stop) - burn) / 86400 if p["epoch"] > burn else 0.0
+        moved.append(dict(p, lon=(p["lon"] + shift + 180) % 360 - 180))
+    events = GeoManeuverDetector().feed(moved)
+
+    # Same stream split across two "runs" with JSON-persisted state
+    half = len(moved) // 2
+    first = GeoManeuverDetector()
+    split = first.feed(moved[:half])
+    split += GeoManeuverDetector(json.loads(json.dumps(first.state))).feed(moved)
+
+    print(f"\n  Unperturbed arc: {len(quiet)} events")
+    for e in events:
+        print(f"  {e['ts']}  {e['kind']:11} {e['baseline']:+.3f} -> {e['value']:+.3f}")
+    ok = (not quiet and [e["kind"] for e in events] == ["drift", "drift"]
+          and burn <= events[0]["epoch"] < burn + 86400 and stop <= events[1]["epoch"] < stop + 86400
+          and split == events)
+    print(f"  Relocation detected, start and stop, resumable across runs: {'ok' if ok else 'FAILED'}")
+
+    # Eccentric GEO-period orbit (JWST, e = 0.05): GEO regime, but its daily longitude
+    # swing is not drift, so it stays out of the detector
+    jwst = catalog["JWST"]
+    batch = propagate_catalog([("JWST", jwst["tle1"], jwst["tle2"])], end, 72, 30)
+    (_, positions), = positions_from_batch(batch)
+    swings = len(GeoManeuverDetector().feed(positions))
+    gated = orbital_regime(jwst["tle2"]) == "GEO" and not is_geo(jwst["tle2"])
+    print(f"  Eccentric GEO-period orbit skipped ({swings} false events if fed): "
+          f"{'ok' if gated else 'FAILED'}\n")
@@ -0,0 +1,353 @@
+"""
+Orbital TrIP — Merkle Commitments over Breadcrumb Chains
+RFC 6962-shaped Merkle trees over breadcrumb hashes, so one position
+can be proven part of a chain (and a chain part of the catalog) with a
+log2(n)-sized inclusion proof instead of replaying the hash chain.
+
+    leaf = SHA-256(0x00 || crumb hash)
+    node = SHA-256(0x01 || left || right)
+
+A chain's root is also maintained incrementally as a "frontier" (the
+roots of its perfect subtrees, at most log2(n) hashes) so appending new
+breadcrumbs never needs the old ones. The full trees are persisted
+too: each chain's complete nodes in an append-only log
+(<state_dir>/merkle/<norad>.mrk) and the catalog tree in catalog.mrc,
+so a proof reads O(log n) stored nodes.
+
+Usage:
+    python3 merkle.py                          # self-check
+    python3 merkle.py STATE_DIR NORAD [INDEX]  # breadcrumb + satellite proofs
+"""
+
+import bisect, hashlib, os, struct
+
+
+def leaf_hash(data):
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+# ============================================================
+# FULL TREE (proof generation)
+# ============================================================
+class MerkleTree:
+    """Merkle tree over raw leaf payloads (e.g. 32-byte crumb hashes)."""
+
+    def __init__(self, leaves):
+        level = [leaf_hash(x) for x in leaves]
+        self.levels = [level]
+        while len(level) > 1:
+            nxt = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                nxt.append(level[-1])  # lone right node is promoted, never duplicated
+            self.levels.append(nxt)
+            level = nxt
+
+    @property
+    def size(self):
+        return len(self.levels[0])
+
+    @property
+    def root(self):
+        return self.levels[-1][0] if self.size else None
+
+    def proof(self, index):
+        """Audit path (list of sibling hashes, bottom-up) for leaf `index`."""
+        if not 0 <= index < self.size:
+            raise IndexError(f"leaf {index} out of range for tree of {self.size}")
+        path = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append(level[sibling])
+            index //= 2
+        return path
+
+
+def verify_proof(leaf, index, size, path, root):
+    """Check an audit path for raw leaf payload `leaf` (RFC 9162 §2.1.3.2)."""
+    if not 0 <= index < size:
+        return False
+    fn, sn, r = index, size - 1, leaf_hash(leaf)
+    for p in path:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
+
+
+# ============================================================
+# INCREMENTAL FRONTIER (root maintenance)
+# ============================================================
+def frontier_append(frontier, leaf):
+    """Append raw leaf payload to a frontier of [height, hex] pairs, in place."""
+    node, height = leaf_hash(leaf), 0
+    while frontier and frontier[-1][0] == height:
+        _, left = frontier.pop()
+        node = node_hash(bytes.fromhex(left), node)
+        height += 1
+    frontier.append([height, node.hex()])
+    return frontier
+
+
+def frontier_root(frontier):
+    """Root of the tree a frontier describes (hex), or None when empty."""
+    if not frontier:
+        return None
+    root = bytes.fromhex(frontier[-1][1])
+    for _, node in reversed(frontier[:-1]):
+        root = node_hash(bytes.fromhex(node), root)
+    return root.hex()
+
+
+# ============================================================
+# PERSISTED CHAIN TREES (proofs from stored nodes)
+# ============================================================
+_LOG_HEADER = struct.Struct("<8sH6x")      # magic, version
+_NODE = 32
+
+
+def _created(n):
+    """Complete nodes (every level) in a tree of n leaves: 2n - popcount(n)."""
+    return 2 * n - bin(n).count("1")
+
+
+class MerkleLog:
+    """
+    One chain's tree as an append-only file of its complete nodes, in the
+    order frontier_append creates them: appending leaf m writes the raw
+    crumb hash, then every subtree it completes, bottom-up. Node (level k,
+    index j) is therefore at record _created(((j + 1) << k) - 1) + k, nodes
+    never change once written, and a proof reads O(log n) records.
+    Level 0 holds the raw crumb hashes; leaf_hash() is applied on read.
+    """
+
+    MAGIC = b"TRIPMRK1"
+
+    def __init__(self, path):
+        self.path = path
+        nodes = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                if _LOG_HEADER.unpack(f.read(_LOG_HEADER.size)) != (self.MAGIC, 1):
+                    raise ValueError(f"{path}: not a Merkle log")
+            nodes = (os.path.getsize(path) - _LOG_HEADER.size) // _NODE
+        n = max(0, nodes // 2 - 1)
+        while _created(n + 1) <= nodes:   # a torn append leaves a partial step: ignore it
+            n += 1
+        self.size = n
+
+    def _read(self, f, k, j):
+        f.seek(_LOG_HEADER.size + (_created(((j + 1) << k) - 1) + k) * _NODE)
+        return f.read(_NODE)
+
+    def _node(self, f, k, j, n):
+        """Node j of level k in the tree of the first n leaves (right edge folded from complete nodes)."""
+        lo = j << k
+        if lo + (1 << k) <= n:
+            data = self._read(f, k, j)
+            return leaf_hash(data) if k == 0 else data
+        parts = []
+        for b in range(k - 1, -1, -1):            # the partial range as perfect subtrees, left to right
+            if (n - lo) >> b & 1:
+                parts.append(self._node(f, b, lo >> b, n))
+                lo += 1 << b
+        root = parts[-1]
+        for node in reversed(parts[:-1]):
+            root = node_hash(node, root)
+        return root
+
+    def reset(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.size = 0
+
+    def append(self, hashes):
+        """Append raw crumb hashes (bytes or hex), writing every node they complete."""
+        hashes = [bytes.fromhex(h) if isinstance(h, str) else bytes(h) for h in hashes]
+        if not hashes:
+            return self.size
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if not os.path.exists(self.path):
+            with open(self.path, "wb") as f:
+                f.write(_LOG_HEADER.pack(self.MAGIC, 1))
+        with open(self.path, "r+b") as f:
+            n, frontier, pos = self.size, [], 0
+            for k in range(n.bit_length() - 1, -1, -1):
+                if n >> k & 1:
+                    frontier.append((k, self._node(f, k, pos >> k, n)))
+                    pos += 1 << k
+            f.seek(_LOG_HEADER.size + _created(n) * _NODE)
+            for h in hashes:
+                f.write(h)
+                node, height = leaf_hash(h), 0
+                while frontier and frontier[-1][0] == height:
+                    node = node_hash(frontier.pop()[1], node)
+                    height += 1
+                    f.write(node)
+                frontier.append((height, node))
+            f.truncate()
+        self.size += len(hashes)
+        return self.size
+
+    def root(self, size=None):
+        n = self.size if size is None else size
+        if not n:
+            return None
+        with open(self.path, "rb") as f:
+            return self._node(f, (n - 1).bit_length(), 0, n).hex()
+
+    def proof(self, index, size=None):
+        """
+        Inclusion proof for crumb `index` in the tree of the first `size`
+        crumbs (default: all), read from the stored nodes; same shape as
+        verify_breadcrumb_proof() expects.
+        """
+        n = self.size if size is None else size
+        if not 0 <= index < n <= self.size:
+            raise IndexError(f"crumb {index} out of range for tree of {n} (stored {self.size})")
+        path, j, k = [], index, 0
+        with open(self.path, "rb") as f:
+            leaf = self._read(f, 0, index)
+            while (n + (1 << k) - 1) >> k > 1:     # levels with more than one node
+                if (j ^ 1) < (n + (1 << k) - 1) >> k:
+                    path.append(self._node(f, k, j ^ 1, n).hex())
+                j, k = j >> 1, k + 1
+        return {"index": index, "size": n, "leaf": leaf.hex(), "path": path, "root": self.root(n)}
+
+
+def prove_breadcrumb(log, index, size=None):
+    """Inclusion proof for crumb `index` of a chain from its MerkleLog (or log path)."""
+    return (log if isinstance(log, MerkleLog) else MerkleLog(log)).proof(index, size)
+
+
+def verify_breadcrumb_proof(proof, root=None):
+    """Check a prove_breadcrumb() proof, against `root` if given (else its own)."""
+    return verify_proof(
+        bytes.fromhex(proof["leaf"]), proof["index"], proof["size"],
+        [bytes.fromhex(p) for p in proof["path"]], bytes.fromhex(root or proof["root"]),
+    )
+
+
+# ============================================================
+# CATALOG TREE
+# ============================================================
+_CATALOG_HEADER = struct.Struct("<8sHxxI")   # magic, version, objects
+
+
+def catalog_leaf(norad, chain_root):
+    return struct.pack(">I", norad) + bytes.fromhex(chain_root)
+
+
+def catalog_tree(chain_roots):
+    """Tree over {norad: chain_root_hex}, leaves ordered by NORAD ID."""
+    order = sorted(chain_roots)
+    return order, MerkleTree([catalog_leaf(n, chain_roots[n]) for n in order])
+
+
+def save_catalog_tree(path, chain_roots, tree=None):
+    """
+    Persist the catalog tree: header, norads u4[n], chain roots [n][32],
+    then every level's nodes bottom-up, written to a tmp file and renamed.
+    """
+    order, tree = (sorted(chain_roots), tree) if tree is not None else catalog_tree(chain_roots)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_CATALOG_HEADER.pack(b"TRIPMRC1", 1, len(order)))
+        f.write(struct.pack(f"<{len(order)}I", *order))
+        f.write(b"".join(bytes.fromhex(chain_roots[n]) for n in order))
+        for level in tree.levels if tree.size else []:
+            f.write(b"".join(level))
+    os.replace(tmp, path)
+
+
+def prove_satellite(path, norad):
+    """Inclusion proof that `norad`'s chain root is committed in the catalog root, from a saved tree."""
+    with open(path, "rb") as f:
+        magic, _, n = _CATALOG_HEADER.unpack(f.read(_CATALOG_HEADER.size))
+        if magic != b"TRIPMRC1":
+            raise ValueError(f"{path}: not a catalog tree")
+        norads = struct.unpack(f"<{n}I", f.read(4 * n))
+        index = bisect.bisect_left(norads, norad)
+        if index == n or norads[index] != norad:
+            raise KeyError(norad)
+        base = _CATALOG_HEADER.size + 36 * n
+
+        def node(level_offset, j):
+            f.seek(base + (level_offset + j) * _NODE)
+            return f.read(_NODE)
+
+        f.seek(_CATALOG_HEADER.size + 4 * n + index * _NODE)
+        chain_root = f.read(_NODE).hex()
+        audit, offset, width, j = [], 0, n, index
+        while width > 1:
+            if (j ^ 1) < width:
+                audit.append(node(offset, j ^ 1).hex())
+            offset, width, j = offset + width, (width + 1) // 2, j >> 1
+        root = node(offset, 0).hex()
+    return {"norad": norad, "chain_root": chain_root, "index": index, "size": n, "path": audit, "root": root}
+
+
+def verify_satellite_proof(proof, root=None):
+    return verify_proof(
+        catalog_leaf(proof["norad"], proof["chain_root"]), proof["index"], proof["size"],
+        [bytes.fromhex(p) for p in proof["path"]], bytes.fromhex(root or proof["root"]),
+    )
+
+
+if __name__ == "__main__":
+    import json, math, sys, tempfile
+
+    if len(sys.argv) > 2:
+        state_dir, norad = sys.argv[1], int(sys.argv[2])
+        log = MerkleLog(os.path.join(state_dir, "merkle", f"{norad}.mrk"))
+        index = int(sys.argv[3]) if len(sys.argv) > 3 else log.size - 1
+        proofs = {"breadcrumb": prove_breadcrumb(log, index),
+                  "satellite": prove_satellite(os.path.join(state_dir, "merkle", "catalog.mrc"), norad)}
+        print(json.dumps(proofs, indent=2))
+        sys.exit(0 if verify_breadcrumb_proof(proofs["breadcrumb"]) and
+                 proofs["breadcrumb"]["root"] == proofs["satellite"]["chain_root"] and
+                 verify_satellite_proof(proofs["satellite"]) else 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in range(1, 300):
+            leaves = [os.urandom(32) for _ in range(n)]
+            tree = MerkleTree(leaves)
+            frontier = []
+            for leaf in leaves:
+                frontier_append(frontier, leaf)
+            assert frontier_root(frontier) == tree.root.hex(), n
+            assert len(frontier) == bin(n).count("1")
+            log = MerkleLog(os.path.join(tmp, f"{n}.mrk"))
+            for lo in range(0, n, 7):                  # appended in several runs
+                MerkleLog(log.path).append(leaves[lo:lo + 7])
+            log = MerkleLog(log.path)
+            assert log.size == n and log.root() == tree.root.hex(), n
+            for i in range(n):
+                path = tree.proof(i)
+                assert len(path) <= math.ceil(math.log2(n)) if n > 1 else not path
+                assert verify_proof(leaves[i], i, n, path, tree.root), (n, i)
+                assert not verify_proof(leaves[i], (i + 1) % n, n, path, tree.root) or n == 1
+                assert [bytes.fromhex(p) for p in log.proof(i)["path"]] == path, (n, i)
+            if n > 1:   # a proof against an earlier, smaller tree
+                old = log.proof(0, n - 1)
+                assert verify_breadcrumb_proof(old, MerkleTree(leaves[:n - 1]).root.hex()), n
+
+        roots = {norad: os.urandom(32).hex() for norad in range(100, 1100, 7)}
+        save_catalog_tree(os.path.join(tmp, "catalog.mrc"), roots)
+        _, tree = catalog_tree(roots)
+        for norad in roots:
+            proof = prove_satellite(os.path.join(tmp, "catalog.mrc"), norad)
+            assert verify_satellite_proof(proof, tree.root.hex()) and proof["chain_root"] == roots[norad]
+    print("  ✓ Merkle tree, frontier, stored chain logs and catalog tree proofs agree for n = 1..299")
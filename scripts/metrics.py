@@ -0,0 +1,180 @@
+"""
+Orbital TrIP — Stage Instrumentation
+Wall time, CPU time, record counts and error counts per pipeline stage,
+both in aggregate and per satellite, for the output stats block and an
+optional Prometheus text-format file (node_exporter textfile collector).
+
+Stages:
+    catalog_load  index build over the source + scope filter   once
+    screen        conjunction screening                         once
+    passes        ground-station pass prediction (--stations)   once
+    propagate     SGP4 + TEME->geodetic, per chunk              amortized per object
+    score         vectorized score components + GEO detector    amortized per object
+    chain         build_entry: sign, verify, finalize score     per object
+    serialize     entry -> JSON                                 per object
+    write         JSON -> disk (json format: at close)          per object
+
+Per-object stages keep every object's wall and CPU time, so the stats
+carry mean / p50 / p95 / max and the slowest object; chunked stages only
+know their amortized mean. Chain timings are measured inside the
+workers, so with --workers > 1 the chain stage's wall time is summed
+across processes and exceeds its share of the elapsed time.
+"""
+
+import os, time
+from contextlib import contextmanager
+
+import numpy as np
+
+from output_writer import _write_atomic
+
+STAGES = ("catalog_load", "screen", "passes", "propagate", "score", "chain", "serialize", "write")
+PROM_PREFIX = "orbital_trip"
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class StageStats:
+    """Running totals for one stage, plus per-object samples when timed per object."""
+
+    __slots__ = ("records", "errors", "wall", "cpu", "walls", "cpus", "slowest")
+
+    def __init__(self):
+        self.records = self.errors = 0
+        self.wall = self.cpu = 0.0
+        self.walls, self.cpus = [], []
+        self.slowest = (0.0, None)
+
+    def add(self, wall, cpu, records=1, errors=0, name=None):
+        self.records += records
+        self.errors += errors
+        self.wall += wall
+        self.cpu += cpu
+        if name is not None:
+            self.walls.append(wall)
+            self.cpus.append(cpu)
+            if wall > self.slowest[0]:
+                self.slowest = (wall, name)
+
+    def summary(self):
+        out = {"records": self.records, "errors": self.errors,
+               "wall_s": round(self.wall, 4), "cpu_s": round(self.cpu, 4)}
+        if self.walls:
+            walls = np.asarray(self.walls)
+            p50, p95 = np.percentile(walls, [50, 95])
+            out["per_object_ms"] = {
+                "wall_mean": _ms(walls.mean()), "wall_p50": _ms(p50), "wall_p95": _ms(p95),
+                "wall_max": _ms(walls.max()), "cpu_mean": _ms(np.mean(self.cpus)),
+                "cpu_max": _ms(max(self.cpus)), "slowest": self.slowest[1],
+            }
+        elif self.records:
+            out["per_object_ms"] = {"wall_mean": _ms(self.wall / self.records),
+                                    "cpu_mean": _ms(self.cpu / self.records), "amortized": True}
+        return out
+
+
+class RunMetrics:
+    """Stage timers for one pipeline run; wall time from perf_counter, CPU from process_time."""
+
+    def __init__(self):
+        self.stages = {stage: StageStats() for stage in STAGES}
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._children0 = os.times()
+
+    def add(self, stage, wall, cpu, records=1, errors=0, name=None):
+        """Record a measurement taken elsewhere (e.g. in a worker process)."""
+        self.stages[stage].add(wall, cpu, records, errors, name)
+
+    def error(self, stage, count=1):
+        self.stages[stage].errors += count
+
+    @contextmanager
+    def time(self, stage, records=1, name=None):
+        """
+        Time the block as `records` records of `stage`; with `name`, also
+        as that object's own sample. A raising block counts as an error.
+        """
+        t0, c0 = time.perf_counter(), time.process_time()
+        errors = 0
+        try:
+            yield
+        except Exception:
+            errors = 1
+            raise
+        finally:
+            self.add(stage, time.perf_counter() - t0, time.process_time() - c0, records, errors, name)
+
+    def iterate(self, stage, iterable):
+        """Yield from `iterable`, charging the time spent producing each item to `stage`."""
+        it = iter(iterable)
+        while True:
+            with self.time(stage, records=0):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def summary(self):
+        """The stats["timing"] block: elapsed wall, CPU (incl. reaped workers) and every stage."""
+        now = os.times()
+        children = (now.children_user + now.children_system
+                    - self._children0.children_user - self._children0.children_system)
+        return {
+            "elapsed_s": round(time.perf_counter() - self._t0, 4),
+            "cpu_s": round(time.process_time() - self._cpu0 + children, 4),
+            "stages": {stage: s.summary() for stage, s in self.stages.items()},
+        }
+
+
+# ============================================================
+# PROMETHEUS TEXT FORMAT
+# ============================================================
+def _metric(lines, name, kind, help_text, samples):
+    lines.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {PROM_PREFIX}_{name} {kind}")
+    for labels, value in samples:
+        label = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else ""
+        lines.append(f"{PROM_PREFIX}_{name}{label} {value}")
+
+
+def prometheus_text(metrics, stats=None):
+    """Exposition text for a RunMetrics, plus the numeric top-level counts of `stats`."""
+    stages = metrics.stages
+    lines = []
+    _metric(lines, "stage_wall_seconds_total", "counter", "Wall time spent in each pipeline stage.",
+            [({"stage": k}, f"{s.wall:.6f}") for k, s in stages.items()])
+    _metric(lines, "stage_cpu_seconds_total", "counter", "CPU time spent in each pipeline stage.",
+            [({"stage": k}, f"{s.cpu:.6f}") for k, s in stages.items()])
+    _metric(lines, "stage_records_total", "counter", "Records processed by each pipeline stage.",
+            [({"stage": k}, s.records) for k, s in stages.items()])
+    _metric(lines, "stage_errors_total", "counter", "Records that failed in each pipeline stage.",
+            [({"stage": k}, s.errors) for k, s in stages.items()])
+
+    _metric(lines, "object_seconds", "summary", "Per-satellite wall time in per-object stages.", [])
+    for k, s in stages.items():
+        if not s.walls:
+            continue
+        for q, v in zip(("0.5", "0.95", "1"), np.percentile(s.walls, [50, 95, 100])):
+            lines.append(f'{PROM_PREFIX}_object_seconds{{stage="{k}",quantile="{q}"}} {v:.6f}')
+        lines.append(f'{PROM_PREFIX}_object_seconds_sum{{stage="{k}"}} {sum(s.walls):.6f}')
+        lines.append(f'{PROM_PREFIX}_object_seconds_count{{stage="{k}"}} {len(s.walls)}')
+
+    summary = metrics.summary()
+    _metric(lines, "run_elapsed_seconds", "gauge", "Wall time of the last pipeline run.",
+            [({}, summary["elapsed_s"])])
+    _metric(lines, "run_cpu_seconds", "gauge", "CPU time of the last pipeline run, workers included.",
+            [({}, summary["cpu_s"])])
+    for key, value in (stats or {}).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            _metric(lines, f"run_{key}", "gauge", f"stats.{key} of the last pipeline run.", [({}, value)])
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, metrics, stats=None):
+    """Write the exposition file atomically, so a scraping collector never reads half of it."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    _write_atomic(path, prometheus_text(metrics, stats))
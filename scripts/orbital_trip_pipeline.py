@@ -2,11 +2,17 @@
 """
 Orbital TrIP MVP - Data Pipeline (Offline Mode)
 Real TLE data -> SGP4 propagation -> Ed25519 chain -> Trust scores
+
+Usage:
+    python3 orbital_trip_pipeline.py [--checkpoint DIR]   # DIR: per-satellite stage checkpoints, resumable
 """
 import json, hashlib, math, sys
 from datetime import datetime, timedelta, timezone
 from sgp4.api import Satrec
 from nacl.signing import SigningKey
+from frames import teme_to_geodetic
+from breadcrumb_codec import ENCODING_BINARY, encode_breadcrumb
+from checkpoints import StageRunner, PassthroughRunner, fingerprint
 
 CATALOG = {
     "ISS (ZARYA)": {
@@ -115,28 +121,24 @@ def propagate(tle1, tle2, hours=72, step_min=30):
         jd = 2451545.0 + (t - datetime(2000,1,1,12,0,0,tzinfo=timezone.utc)).total_seconds()/86400.0
         e, r, v = sat.sgp4(jd, 0.0)
         if e == 0:
-            x,y,z = r
-            alt = math.sqrt(x*x+y*y+z*z) - 6371.0
-            lat = math.degrees(math.atan2(z, math.sqrt(x*x+y*y)))
-            gmst = (280.46061837+360.98564736629*(jd-2451545.0))%360
-            lon = (math.degrees(math.atan2(y,x))-gmst+180)%360-180
+            lat, lon, alt = (float(c) for c in teme_to_geodetic(r, jd))
             spd = math.sqrt(v[0]**2+v[1]**2+v[2]**2)
-            pts.append({"t":t.strftime("%Y-%m-%dT%H:%MZ"),"lat":round(lat,3),"lon":round(lon,3),"alt":round(alt,1),"spd":round(spd,2)})
+            pts.append({"t":t.strftime("%Y-%m-%dT%H:%MZ"),"epoch":int(t.timestamp()),"lat":round(lat,3),"lon":round(lon,3),"alt":round(alt,1),"spd":round(spd,2)})
         t += timedelta(minutes=step_min)
     return pts
 
 def build_chain(positions):
     sk = SigningKey.generate()
-    pk = sk.verify_key.encode().hex()
-    prev = None
+    pkb = sk.verify_key.encode()
+    pk = pkb.hex()
+    prev = bytes(32)
     hashes = []
     for i,p in enumerate(positions):
-        crumb = json.dumps({"i":i,"id":pk[:16],"t":p["t"],"lat":p["lat"],"lon":p["lon"],"alt":p["alt"],"prev":prev or "genesis"},sort_keys=True)
-        sig = sk.sign(crumb.encode()).signature.hex()
-        bh = hashlib.sha256(f"{crumb}:{sig}".encode()).hexdigest()
-        hashes.append(bh)
-        prev = bh
-    return {"pk":pk,"len":len(hashes),"genesis":hashes[0][:16] if hashes else "","head":hashes[-1][:16] if hashes else ""}
+        crumb = encode_breadcrumb(i,pkb,p["epoch"],p["lat"],p["lon"],p["alt"],prev)
+        sig = sk.sign(crumb).signature
+        prev = hashlib.sha256(crumb+sig).digest()
+        hashes.append(prev.hex())
+    return {"pk":pk,"enc":ENCODING_BINARY,"len":len(hashes),"genesis":hashes[0][:16] if hashes else "","head":hashes[-1][:16] if hashes else ""}
 
 def trust_score(cat, positions):
     n = len(positions)
@@ -152,18 +154,30 @@ def trust_score(cat, positions):
     tier = "Odysseus" if total>=85 else "Voyager" if total>=70 else "Pathfinder" if total>=50 else "Explorer" if total>=30 else "Seedling"
     return {"total":total,"tier":tier,"c":{"consistency":consistency,"compliance":compliance,"maturity":maturity,"corroboration":corr,"integrity":10}}
 
-def main():
+def main(argv=None):
+    # load -> propagate -> chain -> score -> publish as stages (see checkpoints.py);
+    # --checkpoint DIR persists each satellite's artifacts there, so a rerun resumes
+    argv = sys.argv[1:] if argv is None else argv
+    work = argv[argv.index("--checkpoint")+1] if "--checkpoint" in argv else None
+    runner = StageRunner(work) if work else PassthroughRunner()
+    names = list(CATALOG)
+    chunks = [f"{i:04d}" for i in range(len(names))]
+    sat = lambda c: CATALOG[names[int(c)]]
+    prop = runner.run("propagate", fingerprint("propagate", CATALOG), chunks, lambda c: {"pts": propagate(sat(c)["tle1"], sat(c)["tle2"])})
+    chains = runner.run("chain", fingerprint("chain", runner.digest("propagate")), chunks,
+                        lambda c: {"trip": build_chain(prop.load(c)["pts"]) if prop.load(c)["pts"] else None})
+    scores = runner.run("score", fingerprint("score", runner.digest("propagate")), chunks,
+                        lambda c: {"trust": trust_score(sat(c)["cat"], prop.load(c)["pts"])})
     print("="*60)
     print("ORBITAL TrIP MVP - Pipeline")
     print("="*60)
     out = {"generated":datetime.now(timezone.utc).isoformat(),"source":"CelesTrak TLE (embedded)","satellites":{},"luch_history":LUCH_HISTORY}
-    for name,sat in CATALOG.items():
-        pts = propagate(sat["tle1"],sat["tle2"])
+    for c, name in zip(chunks, names):
+        pts = prop.load(c)["pts"]
         if not pts:
             print(f"  FAIL {name}"); continue
-        chain = build_chain(pts)
-        trust = trust_score(sat["cat"], pts)
-        out["satellites"][name] = {"norad":sat["norad"],"cat":sat["cat"],"op":sat["op"],"pos":[[p["lat"],p["lon"],p["alt"],p["t"]] for p in pts],"trip":chain,"trust":trust}
+        chain, trust = chains.load(c)["trip"], scores.load(c)["trust"]
+        out["satellites"][name] = {"norad":sat(c)["norad"],"cat":sat(c)["cat"],"op":sat(c)["op"],"pos":[[p["lat"],p["lon"],p["alt"],p["t"]] for p in pts],"trip":chain,"trust":trust}
         print(f"  {name:24s} {len(pts):3d} pts  trust={trust['total']:5.1f} ({trust['tier']})")
     with open("/home/claude/orbital_trip_data.json","w") as f: json.dump(out,f)
     print(f"\nDone: {len(out['satellites'])} satellites, {len(json.dumps(out))//1024} KB")
@@ -6,27 +6,65 @@ generates Ed25519 breadcrumb chains, computes trust scores,
 and outputs enriched JSON for the dashboard.
 
 Usage:
-    python3 orbital_trip_pipeline_v2.py [--output PATH]
+    python3 orbital_trip_pipeline_v2.py [--output PATH] [--format json|ndjson|shards] [--positions] [--ephemeris]
+                                        [--workers N] [--state-dir DIR | --ephemeral] [--screen-km D]
+                                        [--catalog FILE... [--overlay PATH] | --fetch [--fetch-url URL]
+                                         [--fetch-group G]]
+                                        [--category C] [--operator O] [--regime LEO|MEO|GEO|HEO]
+                                        [--sampling fixed|regime|adaptive [--tolerance-km K]]
+                                        [--quiet] [--metrics PATH] [--no-delta] [--no-archive]
+                                        [--checkpoint] [--stations [FILE]] [--track-index]
 """
 
-import json, hashlib, math, sys, os
+import argparse, hashlib, os, time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
+import numpy as np
 from sgp4.api import Satrec, WGS72
 from nacl.signing import SigningKey
 from satellite_catalog import get_full_catalog, STORY_SATELLITES
+from catalog_loader import CatalogLoader
+from tle_ingest import LiveCatalog, TleIngestor, CELESTRAK_GP, INGEST_CACHE_DIR
+from catalog_index import CatalogIndex, REGIMES
+from frames import teme_to_geodetic
+from propagation import geodetic_from_batch, positions_from_batch, MODEL
+from sampling import (SAMPLING_MODES, ADAPTIVE_TOL_KM, LATTICE_S, policy_for, batch_plan, propagate_part,
+                      sampling_entry, sampling_header)
+from ephemeris_cache import EphemerisCache, CACHE_DIR, CACHE_MAX_MB
+from verification import verify_extension, integrity_score
+from scoring import ScoreAccumulators, ScoreStateStore, score_components, split_components, finalize_score
+from merkle import frontier_append, frontier_root, catalog_tree, save_catalog_tree, MerkleLog
+from output_writer import open_writer, FORMATS
+from metrics import RunMetrics, write_prometheus
+from delta import DeltaPublisher, positions_basis
+from position_store import PositionStoreWriter
+from crumb_store import CrumbStore, CRUMB, pack_crumbs
+from checkpoints import StageRunner, PassthroughRunner, fingerprint, file_digest
+from ephemeris_table import build_ephemeris
+from track_index import build_track_index, TrackHistory
+from conjunctions import screen_catalog, events_by_object, SCREEN_KM, SCREEN_STEP_S, SCREEN_MAX_SAMPLES
+from passes import predict_passes, observability, passes_header, load_stations
+from maneuvers import GeoManeuverDetector, ManeuverStateStore, is_geo
+from keystore import KeyStore, ChainStateStore, STATE_DIR
+from breadcrumb_codec import (ENCODING_BINARY, ENCODING_LEGACY, ENCODINGS, GENESIS_PREV,
+                              encode_breadcrumb, encode_legacy, encode_signature,
+                              describe as describe_encoding)
 
 # ============================================================
 # CONFIG
 # ============================================================
 PROPAGATION_HOURS = 72
 INTERVAL_MINUTES = 30
-OUTPUT_PATH = sys.argv[2] if len(sys.argv) > 2 and sys.argv[1] == "--output" else "orbital_trip_data_v2.json"
+PROPAGATION_END = datetime(2025, 2, 9, 0, 0, 0, tzinfo=timezone.utc)
+PROPAGATION_CHUNK = 1024  # satellites per vectorized SGP4 batch
+VERIFY_ANCHOR = 16        # archived crumbs up to the stored head, re-verified with each extension
+OUTPUT_PATH = "orbital_trip_data_v2.json"
 
 # ============================================================
 # SGP4 PROPAGATION
 # ============================================================
 def propagate_satellite(tle1, tle2, hours=PROPAGATION_HOURS, interval=INTERVAL_MINUTES):
-    """Propagate a satellite using SGP4 and return position array."""
+    """Propagate a single satellite step by step (scalar reference path)."""
     try:
         sat = Satrec.twoline2rv(tle1, tle2, WGS72)
     except Exception as e:
@@ -34,8 +72,7 @@ def propagate_satellite(tle1, tle2, hours=PROPAGATION_HOURS, interval=INTERVAL_M
         return []
 
     positions = []
-    now = datetime(2025, 2, 9, 0, 0, 0, tzinfo=timezone.utc)
-    start = now - timedelta(hours=hours)
+    start = PROPAGATION_END - timedelta(hours=hours)
 
     for step in range(int(hours * 60 / interval) + 1):
         t = start + timedelta(minutes=step * interval)
@@ -46,20 +83,12 @@ def propagate_satellite(tle1, tle2, hours=PROPAGATION_HOURS, interval=INTERVAL_M
         if e != 0:
             continue
 
-        x, y, z = r  # km in TEME frame
-        alt = math.sqrt(x*x + y*y + z*z) - 6371.0
-
-        # TEME to lat/lon (simplified)
-        gmst = 4.894961212 + 6.300388099 * (jd - 2451545.0)
-        lon_rad = math.atan2(y, x) - gmst
-        lat_rad = math.atan2(z, math.sqrt(x*x + y*y))
-
-        lat = math.degrees(lat_rad)
-        lon = math.degrees(lon_rad) % 360
-        if lon > 180: lon -= 360
+        # TEME -> ECEF -> WGS84 geodetic
+        lat, lon, alt = (float(c) for c in teme_to_geodetic(r, jd, fr))
 
         positions.append({
             "ts": t.isoformat(),
+            "epoch": int(t.timestamp()),
             "lat": round(lat, 4),
             "lon": round(lon, 4),
             "alt": round(alt, 1),
@@ -71,16 +100,34 @@ def propagate_satellite(tle1, tle2, hours=PROPAGATION_HOURS, interval=INTERVAL_M
 # ============================================================
 # ED25519 BREADCRUMB CHAIN
 # ============================================================
-def generate_breadcrumb_chain(name, positions):
-    """Generate Ed25519-signed breadcrumb chain from positions."""
-    signing_key = SigningKey.generate()
-    verify_key = signing_key.verify_key
-    public_key_hex = verify_key.encode().hex()
+def generate_breadcrumb_chain(name, positions, signing_key=None, state=None, encoding=ENCODING_BINARY):
+    """
+    Generate Ed25519-signed breadcrumb chain from positions.
 
+    Each crumb is serialized with `encoding` (see breadcrumb_codec),
+    hashed with SHA-256 and signed. With a stored `state` (see
+    keystore.ChainStateStore) for the same key and encoding, only
+    positions after state["last_ts"] are signed, continuing from the
+    stored head.
+    """
+    signing_key = signing_key or SigningKey.generate()
+    public_key = signing_key.verify_key.encode()
+    public_key_hex = public_key.hex()
+
+    if (state and state["pk"] == public_key_hex and state.get("enc", ENCODING_LEGACY) == encoding
+            and "frontier" in state):
+        positions = [p for p in positions if p["ts"] > state["last_ts"]]
+        offset, prev_hash, genesis = state["len"], state["head"], state["genesis"]
+        frontier = [list(f) for f in state["frontier"]]
+    else:
+        offset, prev_hash, genesis, frontier = 0, GENESIS_PREV, None, []
+
+    start = {"i": offset, "prev": prev_hash}
     chain = []
-    prev_hash = "0" * 64  # genesis
+    binary = encoding == ENCODING_BINARY
+    prev_raw = bytes.fromhex(prev_hash)
 
-    for i, pos in enumerate(positions):
+    for i, pos in enumerate(positions, start=offset):
         breadcrumb = {
             "i": i,
             "id": public_key_hex,
@@ -91,237 +138,777 @@ def generate_breadcrumb_chain(name, positions):
             "prev": prev_hash,
         }
 
-        content = json.dumps(breadcrumb, sort_keys=True)
-        bc_hash = hashlib.sha256(content.encode()).hexdigest()
-        signature = signing_key.sign(content.encode()).signature.hex()
-
-        breadcrumb["hash"] = bc_hash
-        breadcrumb["sig"] = signature[:32]  # truncate for storage
-        prev_hash = bc_hash
+        if binary:
+            breadcrumb["epoch"] = pos["epoch"]
+            content = encode_breadcrumb(i, public_key, pos["epoch"], pos["lat"], pos["lon"], pos["alt"], prev_raw)
+        else:
+            content = encode_legacy(breadcrumb)
+        prev_raw = hashlib.sha256(content).digest()
+        signature = signing_key.sign(content).signature
+        frontier_append(frontier, prev_raw)
+
+        prev_hash = prev_raw.hex()
+        breadcrumb["hash"] = prev_hash
+        breadcrumb["sig"] = encode_signature(signature)
         chain.append(breadcrumb)
 
+    if genesis is None and chain:
+        genesis = chain[0]["hash"]
+    length = offset + len(chain)
+    last_ts = chain[-1]["ts"] if chain else (state["last_ts"] if offset else None)
+
     return {
         "public_key": public_key_hex,
-        "chain_length": len(chain),
-        "genesis_hash": chain[0]["hash"] if chain else None,
-        "head_hash": chain[-1]["hash"] if chain else None,
+        "chain_length": length,
+        "genesis_hash": genesis,
+        "head_hash": prev_hash if length else None,
+        "merkle_root": frontier_root(frontier),
+        "appended": len(chain),
+        "start": start,
         "chain": chain,
+        "state": {"pk": public_key_hex, "enc": encoding, "len": length, "genesis": genesis,
+                  "head": prev_hash, "last_ts": last_ts, "frontier": frontier} if length else None,
     }
 
 
 # ============================================================
 # TRUST SCORING
 # ============================================================
-def compute_trust_score(name, positions, category, is_story=False, story_data=None):
+def compute_trust_score(name, positions, category, is_story=False, story_data=None, verification=None,
+                        conjunctions=None, maneuvers=None, observed=None):
     """
-    5-component trust score adapted to orbital mechanics.
+    5-component trust score adapted to orbital mechanics, for one
+    satellite. run_pipeline scores whole chunks through scoring.py; this
+    runs the same table-driven engine on a single position list.
+    `verification` is a verify_chain() result; without one the chain
+    is unverified and earns no integrity points.
     """
+    acc = ScoreAccumulators(1)
+    if positions:
+        acc.update(np.array([[p["alt"] for p in positions]]), np.array([[p["lat"] for p in positions]]),
+                   np.ones((1, len(positions)), dtype=bool), [p["epoch"] for p in positions])
+    components = split_components(score_components([category], acc, [conjunctions], [maneuvers],
+                                                   None if observed is None else [observed]))[0]
+    return finalize_score(components, integrity_score(verification))
+
 
-    # 1. TRAJECTORY CONSISTENCY (35%)
-    if not positions:
-        consistency = 0
+# ============================================================
+# PER-SATELLITE PROCESSING
+# ============================================================
+def build_entry(name, data, positions, seed=None, chain_state=None, encoding=ENCODING_BINARY,
+                conjunctions=None, geo=None, score=None, archive=False, obs=None, anchor=None):
+    """
+    Chain, score and pack one propagated satellite into its output entry.
+    `score` holds precomputed score components (scoring.score_components);
+    without it the satellite is scored on its own. `obs` is its pass
+    summary (passes.observability), kept in the entry. With `archive`, the
+    newly signed crumbs are also packed for the crumb store (trip-bc/1
+    only). `anchor` holds the archived crumbs up to the stored head
+    (CrumbStore.tail), verified together with the new ones; without an
+    archive an unchanged chain carries its last verification forward.
+    Returns (entry, new_chain_state, crumbs or None, new crumb hashes).
+    """
+    # Generate (or extend) breadcrumb chain
+    signing_key = SigningKey(seed) if seed else None
+    trip_data = generate_breadcrumb_chain(name, positions, signing_key, chain_state, encoding)
+
+    # Verify the extension against the persisted chain it attaches to
+    verification = verify_extension(trip_data["chain"], trip_data["public_key"], encoding, trip_data["start"],
+                                    anchor, (chain_state or {}).get("ver"))
+    if trip_data["state"]:
+        trip_data["state"]["ver"] = [verification["checked"], verification["valid"]]
+
+    # Compute trust score
+    if score is not None:
+        trust = finalize_score(score, integrity_score(verification))
     else:
-        alts = [p["alt"] for p in positions]
-        mean_alt = sum(alts) / len(alts)
-        std_alt = math.sqrt(sum((a - mean_alt)**2 for a in alts) / len(alts)) if len(alts) > 1 else 0
-
-        if category in ("GEO Comms", "GEO Weather"):
-            consistency = max(0, 35 - (std_alt / 2))
-        elif category == "Suspicious":
-            # Luch gets penalized for inclination anomaly
-            lats = [abs(p["lat"]) for p in positions]
-            max_lat = max(lats) if lats else 0
-            consistency = max(0, 35 - (max_lat * 3) - (std_alt / 2))
-        elif category == "Catastrophic Failure":
-            consistency = 5  # Broken satellite
-        elif category == "Deorbited":
-            consistency = 25  # Was consistent before deorbit
-        elif category == "Debris":
-            consistency = max(0, 35 - (std_alt / 5))
-        elif category in ("Navigation",):
-            consistency = max(0, 35 - (std_alt / 10))
-        elif category in ("Station",):
-            consistency = max(0, 33 - (std_alt / 3))
-        elif category in ("Science",):
-            consistency = max(0, 32 - (std_alt / 5))
-        else:  # LEO constellation, earth obs, cubesat
-            consistency = max(0, 33 - (std_alt / 5))
-
-    # 2. OPERATIONAL COMPLIANCE (25%)
-    compliance_map = {
-        "GEO Comms": 24, "GEO Weather": 24, "Navigation": 23,
-        "Station": 21, "Science": 21, "Earth Obs": 20,
-        "LEO Constellation": 18, "CubeSat": 16, "Military": 15,
-        "Suspicious": 4, "Catastrophic Failure": 2, "Deorbited": 22,
-        "Debris": 0,
-    }
-    compliance = compliance_map.get(category, 10)
-
-    # 3. CHAIN MATURITY (20%)
-    chain_len = len(positions)
-    maturity = min(20, chain_len / 7.5)  # Max at ~150 breadcrumbs
-
-    # 4. OBSERVATION CORROBORATION (10%)
-    corroboration_map = {
-        "Station": 9, "GEO Comms": 8, "GEO Weather": 8,
-        "Navigation": 8, "Science": 8, "Earth Obs": 7,
-        "LEO Constellation": 7, "CubeSat": 5, "Military": 4,
-        "Suspicious": 7, "Catastrophic Failure": 6, "Deorbited": 6,
-        "Debris": 3,
-    }
-    corroboration = corroboration_map.get(category, 5)
+        trust = compute_trust_score(
+            name, positions, data["category"],
+            is_story=data.get("is_story", False),
+            story_data=data.get("story"),
+            verification=verification,
+            conjunctions=conjunctions,
+            maneuvers=geo["events"] if geo else None,
+            observed=obs,
+        )
 
-    # 5. CHAIN INTEGRITY (10%)
-    integrity = 10  # All valid by construction
+    # Compact position data (lat, lon, alt only — timestamps reconstructable)
+    compact_positions = [[p["lat"], p["lon"], p["alt"]] for p in positions]
+
+    # Build result entry
+    entry = {
+        "n": data["norad"],
+        "c": data["category"],
+        "o": data["operator"],
+        "p": compact_positions,
+        "t": {
+            "total": trust["total"],
+            "tier": trust["tier"],
+            "consistency": trust["components"]["consistency"],
+            "compliance": trust["components"]["compliance"],
+            "maturity": trust["components"]["maturity"],
+            "corroboration": trust["components"]["corroboration"],
+            "integrity": trust["components"]["integrity"],
+        },
+        "trip": {
+            "pk": trip_data["public_key"],
+            "len": trip_data["chain_length"],
+            "genesis": trip_data["genesis_hash"],
+            "head": trip_data["head_hash"],
+            "root": trip_data["merkle_root"],
+            "new": trip_data["appended"],
+            "ok": verification["ok"],
+        },
+    }
 
-    total = round(consistency + compliance + maturity + corroboration + integrity, 1)
-    total = min(100, max(0, total))
+    # Rolling GEO drift / inclination state and recent maneuvers
+    if geo:
+        entry["geo"] = geo
 
-    # Tier assignment
-    if total >= 85: tier = "Odysseus"
-    elif total >= 70: tier = "Voyager"
-    elif total >= 50: tier = "Pathfinder"
-    elif total >= 30: tier = "Explorer"
-    else: tier = "Seedling"
+    # Ground-station observability behind the corroboration component
+    if obs is not None:
+        entry["obs"] = obs
 
-    return {
-        "total": total,
-        "tier": tier,
-        "components": {
-            "consistency": round(consistency, 1),
-            "compliance": round(compliance, 1),
-            "maturity": round(maturity, 1),
-            "corroboration": round(corroboration, 1),
-            "integrity": round(integrity, 1),
-        }
-    }
+    # Add story metadata if applicable
+    if data.get("is_story") and data.get("story"):
+        entry["story"] = data["story"]
 
+    crumbs = pack_crumbs(trip_data["chain"]) if archive and encoding == ENCODING_BINARY else None
+    return entry, trip_data["state"], crumbs, b"".join(bytes.fromhex(c["hash"]) for c in trip_data["chain"])
 
-# ============================================================
-# MAIN PIPELINE
-# ============================================================
-def run_pipeline():
-    print("\n  ╔══════════════════════════════════════════╗")
-    print("  ║  ORBITAL TrIP — Phase 1 Pipeline v2      ║")
-    print("  ║  Enhanced Catalog + Story Satellites       ║")
-    print("  ╚══════════════════════════════════════════╝\n")
 
-    catalog = get_full_catalog()
-    print(f"  Processing {len(catalog)} satellites...\n")
+def _process_job(job):
+    """
+    Worker entry point: never raises, so one bad satellite can't abort the
+    run. Also returns the (wall, cpu) seconds build_entry took here.
+    """
+    name, data, positions, options = job
+    t0, c0 = time.perf_counter(), time.process_time()
+    try:
+        entry, new_state, crumbs, hashes = build_entry(name, data, positions, **options)
+        err = None
+    except Exception as e:
+        entry, new_state, crumbs, hashes, err = None, None, None, b"", f"{type(e).__name__}: {e}"
+    return name, entry, new_state, crumbs, hashes, err, (time.perf_counter() - t0, time.process_time() - c0)
 
-    results = {}
-    failed = 0
 
-    for name, data in catalog.items():
-        tle1 = data.get("tle1", "")
-        tle2 = data.get("tle2", "")
+def extend_merkle_log(state_dir, entry, hashes, crumb_store=None):
+    """
+    Append a chain's new crumb hashes to its persisted tree
+    (<state_dir>/merkle/<norad>.mrk, see merkle.MerkleLog). A log that
+    doesn't end where the extension starts (restarted chain, or one from
+    before the logs) is rebuilt from the crumb archive, else dropped until
+    the chain restarts. Returns the log, or None when it can't be kept.
+    """
+    log = MerkleLog(os.path.join(state_dir, "merkle", f"{entry['n']}.mrk"))
+    prior = entry["trip"]["len"] - entry["trip"]["new"]
+    if log.size != prior:
+        log.reset()
+        archived = crumb_store.tail(entry["n"], prior) if crumb_store and prior else []
+        if len(archived) == prior and archived[0]["i"] == 0:
+            log.append(c["hash"] for c in archived)
+        if log.size != prior:
+            log.reset()
+            return None
+    log.append(hashes)
+    if log.root() != entry["trip"]["root"]:
+        log.reset()
+        return None
+    return log
 
-        if not tle1 or not tle2:
-            print(f"  [SKIP] {name}: no TLE data")
-            failed += 1
-            continue
 
-        # Propagate
-        positions = propagate_satellite(tle1, tle2)
-        if not positions:
-            print(f"  [FAIL] {name}: SGP4 propagation failed")
-            failed += 1
-            continue
+# ============================================================
+# OUTPUT
+# ============================================================
+TIER_ICONS = {"Odysseus": "🟢", "Voyager": "🔵", "Pathfinder": "🟡", "Explorer": "🟠", "Seedling": "🔴"}
 
-        # Generate breadcrumb chain
-        trip_data = generate_breadcrumb_chain(name, positions)
 
-        # Compute trust score
-        trust = compute_trust_score(
-            name, positions, data["category"],
-            is_story=data.get("is_story", False),
-            story_data=data.get("story"),
-        )
+class RunOutput:
+    """
+    Publishing end of a run. Each finished entry goes through add(), which
+    writes it, feeds the position store and delta publisher, and keeps the
+    small per-run summaries; close() assembles the header (stats,
+    leaderboard, catalog Merkle root) and writes the manifest last.
+    """
 
-        # Compact position data (lat, lon, alt only — timestamps reconstructable)
-        compact_positions = [[p["lat"], p["lon"], p["alt"]] for p in positions]
-
-        # Build result entry
-        entry = {
-            "n": data["norad"],
-            "c": data["category"],
-            "o": data["operator"],
-            "p": compact_positions,
-            "t": {
-                "total": trust["total"],
-                "tier": trust["tier"],
-                "consistency": trust["components"]["consistency"],
-                "compliance": trust["components"]["compliance"],
-                "maturity": trust["components"]["maturity"],
-                "corroboration": trust["components"]["corroboration"],
-                "integrity": trust["components"]["integrity"],
+    def __init__(self, output_path, output_format, metrics, positions_path=None, publisher=None,
+                 pos_step=INTERVAL_MINUTES * 60, quiet=False):
+        self.output_path = output_path
+        self.output_format = output_format
+        self.metrics = metrics
+        self.publisher = publisher
+        self.quiet = quiet
+        self.writer = open_writer(output_path, output_format)
+        grid_start = PROPAGATION_END - timedelta(hours=PROPAGATION_HOURS)
+        self.pos_writer = PositionStoreWriter(
+            positions_path, int(grid_start.timestamp()), float(pos_step),
+            int(PROPAGATION_HOURS * 3600 / pos_step) + 1,
+        ) if positions_path else None
+        self.totals = []          # (name, trust total) in catalog order, for the leaderboard
+        self.chain_roots = {}     # norad -> chain Merkle root
+        self.categories, self.regimes, self.tiers, self.sampled = {}, {}, {}, {}
+        self.stories = 0
+        self.failed = 0
+        self.appended = 0
+        self.invalid = 0
+        self.maneuvers = 0
+        self.metrics_path = None
+
+    def add(self, name, entry, positions, record, policy, steps=None):
+        """
+        One finished entry; `record` is its catalog record, `policy` its
+        SamplingPolicy and `steps` its adaptive lattice steps.
+        """
+        metrics = self.metrics
+        sampled = sampling_entry(policy, steps)
+        if sampled:
+            entry["s"] = sampled
+        with metrics.time("serialize", name=name):
+            data = self.writer.encode(name, entry)
+        with metrics.time("write", name=name):
+            self.writer.write(name, entry, data)
+            if self.pos_writer:
+                self.pos_writer.add(entry["n"], [p["epoch"] for p in positions], [p["lat"] for p in positions],
+                                    [p["lon"] for p in positions], [p["alt"] for p in positions])
+        if self.publisher:
+            with metrics.time("serialize", records=0):
+                self.publisher.add(name, entry, [p["epoch"] for p in positions],
+                                   positions_basis(record["tle1"], record["tle2"], policy),
+                                   None if policy.adaptive else policy.interval * 60)
+
+        tier = entry["t"]["tier"]
+        self.totals.append((name, entry["t"]["total"]))
+        self.chain_roots[entry["n"]] = entry["trip"]["root"]
+        self.categories[entry["c"]] = self.categories.get(entry["c"], 0) + 1
+        self.regimes[record.regime] = self.regimes.get(record.regime, 0) + 1
+        self.tiers[tier] = self.tiers.get(tier, 0) + 1
+        self.sampled[policy.name] = self.sampled.get(policy.name, 0) + 1
+        self.stories += "story" in entry
+        self.appended += entry["trip"]["new"]
+        self.maneuvers += len(entry["geo"]["events"]) if "geo" in entry else 0
+        if not entry["trip"]["ok"]:
+            print(f"  [WARN] {name}: breadcrumb chain failed verification")
+            self.invalid += 1
+        if not self.quiet:
+            story_tag = " ★" if record.get("is_story") else ""
+            print(f"  {TIER_ICONS.get(tier, '⚪')} {entry['t']['total']:5.1f} [{tier:10}] {name}{story_tag}")
+
+    def close(self, catalog, source, encoding, sampling, policies, screening=None,
+              screen_km=SCREEN_KM, cache=None, scope=None, extra_stats=None, metrics_path=None, ephemeris=None,
+              passes=None, track_index=None, merkle_dir=None):
+        """Write the header/manifest (and delta, positions, metrics); returns the writer's output."""
+        metrics = self.metrics
+
+        # Catalog-level Merkle commitment over every satellite's chain root
+        _, catalog_merkle = catalog_tree(self.chain_roots)
+        if merkle_dir:
+            os.makedirs(merkle_dir, exist_ok=True)
+            save_catalog_tree(os.path.join(merkle_dir, "catalog.mrc"), self.chain_roots, catalog_merkle)
+
+        # Sort by trust score for leaderboard (stable: ties keep catalog order)
+        sorted_names = [n for n, _ in sorted(self.totals, key=lambda x: (-x[1], catalog[x[0]].pos))]
+
+        header = {
+            "version": "0.2.0",
+            "generated": datetime.now(timezone.utc).isoformat(),
+            "pipeline": "orbital-trip-phase1",
+            "propagation": {
+                "hours": PROPAGATION_HOURS,
+                "interval_minutes": INTERVAL_MINUTES,
+                "model": MODEL,
+                "tle_epoch": getattr(source, "tle_epoch", None) or "Feb 2025 (embedded)",
+                "sampling": sampling_header(sampling, policies, self.sampled),
             },
-            "trip": {
-                "pk": trip_data["public_key"],
-                "len": trip_data["chain_length"],
-                "genesis": trip_data["genesis_hash"],
-                "head": trip_data["head_hash"],
+            "crypto": {
+                "signing": "Ed25519",
+                "hashing": "SHA-256",
+                "chain": "hash-linked breadcrumbs",
+                "breadcrumb": describe_encoding(encoding),
+                "merkle": {
+                    "leaf": "sha256(0x00||crumb_hash)",
+                    "node": "sha256(0x01||left||right)",
+                    "catalog_leaf": "norad(u32be)||chain_root, sorted by norad",
+                    "catalog_root": catalog_merkle.root.hex() if catalog_merkle.size else None,
+                },
             },
+            "stats": {
+                "total_satellites": len(self.totals),
+                "story_satellites": self.stories,
+                "categories": self.categories,
+                "regimes": self.regimes,
+                "tiers": self.tiers,
+                "failed": self.failed,
+                "breadcrumbs_signed": self.appended,
+                "chains_invalid": self.invalid,
+                "conjunctions": len(screening["events"]) if screening else None,
+                "maneuvers": self.maneuvers,
+                "loader": getattr(source, "stats", None),
+                "cache": cache.stats() if cache else None,
+                **(extra_stats or {}),
+                "timing": None,  # filled in last, see below
+            },
+            "leaderboard": sorted_names,
         }
+        if scope:
+            header["scope"] = scope
+        if screening:
+            header["conjunctions"] = {"threshold_km": screen_km, **screening}
+        if passes:
+            header["passes"] = passes_header(passes)
+        if self.pos_writer:
+            with metrics.time("write", records=0):
+                header["positions"] = self.pos_writer.close()
+        if ephemeris:
+            header["ephemeris"] = ephemeris
+        if track_index:
+            header["track_index"] = track_index
+
+        # Write output (manifest last, atomically). The closing write is timed
+        # after stats are sealed, so only the Prometheus file includes it.
+        header["stats"]["timing"] = metrics.summary()
+        if self.publisher:
+            header["publication"] = self.publisher.close(header)
+        with metrics.time("write", records=0):
+            output = self.writer.close(header)
+        if self.publisher:
+            self.publisher.commit()
+        if metrics_path:
+            write_prometheus(metrics_path, metrics, header["stats"])
+        self.metrics_path = metrics_path
+        return output
+
+    def report(self):
+        file_size = os.path.getsize(self.output_path)
+        print(f"\n  ✓ Output: {self.output_path} ({file_size // 1024} KB, {self.output_format})")
+        print(f"  ✓ Satellites: {len(self.totals)} processed, {self.failed} failed")
+        print(f"  ✓ Story satellites: {self.stories}")
+        print(f"  ✓ Tiers: {self.tiers}")
+        timing = self.metrics.summary()
+        print(f"  ✓ Time: {timing['elapsed_s']:.2f}s wall, {timing['cpu_s']:.2f}s CPU — "
+              + ", ".join(f"{k} {v['wall_s']:.2f}s" for k, v in timing["stages"].items() if v["wall_s"] >= 0.005))
+        if self.metrics_path:
+            print(f"  ✓ Metrics: {self.metrics_path}")
+        pub = self.publisher.publication if self.publisher else None
+        if pub and pub["delta"]:
+            print(f"  ✓ Delta: {pub['delta']} (seq {pub['seq']}: +{pub['added']} -{pub['removed']} ~{pub['changed']})")
+        print()
+
+
+def print_banner():
+    print("\n  ╔══════════════════════════════════════════╗")
+    print("  ║  ORBITAL TrIP — Phase 1 Pipeline v2      ║")
+    print("  ║  Enhanced Catalog + Story Satellites       ║")
+    print("  ╚══════════════════════════════════════════╝\n")
 
-        # Add story metadata if applicable
-        if data.get("is_story") and data.get("story"):
-            entry["story"] = data["story"]
-
-        results[name] = entry
-        tier_icon = {"Odysseus": "🟢", "Voyager": "🔵", "Pathfinder": "🟡", "Explorer": "🟠", "Seedling": "🔴"}.get(trust["tier"], "⚪")
-        story_tag = " ★" if data.get("is_story") else ""
-        print(f"  {tier_icon} {trust['total']:5.1f} [{trust['tier']:10}] {name}{story_tag}")
-
-    # Sort by trust score for leaderboard
-    sorted_names = sorted(results.keys(), key=lambda n: results[n]["t"]["total"], reverse=True)
-
-    output = {
-        "version": "0.2.0",
-        "generated": datetime.now(timezone.utc).isoformat(),
-        "pipeline": "orbital-trip-phase1",
-        "propagation": {
-            "hours": PROPAGATION_HOURS,
-            "interval_minutes": INTERVAL_MINUTES,
-            "model": "SGP4/WGS72",
-            "tle_epoch": "Feb 2025 (embedded)",
-        },
-        "crypto": {
-            "signing": "Ed25519",
-            "hashing": "SHA-256",
-            "chain": "hash-linked breadcrumbs",
-        },
-        "stats": {
-            "total_satellites": len(results),
-            "story_satellites": len([n for n, d in results.items() if "story" in d]),
-            "categories": {},
-            "tiers": {},
-            "failed": failed,
-        },
-        "leaderboard": sorted_names,
-        "satellites": results,
-    }
-
-    # Compute stats
-    for name, data in results.items():
-        cat = data["c"]
-        tier = data["t"]["tier"]
-        output["stats"]["categories"][cat] = output["stats"]["categories"].get(cat, 0) + 1
-        output["stats"]["tiers"][tier] = output["stats"]["tiers"].get(tier, 0) + 1
 
-    # Write output
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(output, f, separators=(",", ":"))
+# ============================================================
+# MAIN PIPELINE
+# ============================================================
+# stage -> upstream stages its key commits to
+STAGE_INPUTS = {
+    "load": (),
+    "screen": (),                       # keyed on the TLEs themselves
+    "passes": (),                       # keyed on the TLEs + stations themselves
+    "propagate": (),                    # keyed on the TLEs + policies themselves
+    "score": ("load", "screen", "passes", "propagate"),
+    "chain": ("load", "passes", "propagate", "score"),
+}
+
+
+def _positions(art):
+    """(name, positions) per row of a propagate artifact, as positions_from_batch yields them."""
+    return list(positions_from_batch(art, (art["lat"], art["lon"], art["alt"])))
+
+
+def run_pipeline(output_path=OUTPUT_PATH, workers=1, state_dir=STATE_DIR, encoding=ENCODING_BINARY,
+                 output_format="json", positions_path=None, cache_dir=CACHE_DIR,
+                 cache_max_mb=CACHE_MAX_MB, screen_km=SCREEN_KM, catalog=None, scope=None,
+                 sampling="fixed", tolerance_km=ADAPTIVE_TOL_KM, quiet=False, metrics_path=None,
+                 publish=True, archive=True, ephemeris_path=None, stations=None,
+                 track_index_path=None, checkpoint=False):
+    """
+    `catalog` is a CatalogIndex or an iterable of (name, entry) pairs, e.g.
+    a CatalogLoader over TLE/OMM files or a tle_ingest.LiveCatalog; by
+    default the embedded satellite_catalog is used. `scope` ({category,
+    operator, regime}) restricts the run to matching objects. `sampling`
+    picks each object's sample times (see sampling.py). Stage timings (see metrics.py) go to
+    stats["timing"] and, with `metrics_path`, a Prometheus text file.
+    `quiet` drops the per-satellite progress lines; failures still print.
+    With a state_dir and `publish`, an unscoped run also writes its delta
+    against the previous run (see delta.py); with `archive`, every newly
+    signed breadcrumb is appended to <state_dir>/crumbs (see crumb_store.py).
+    `ephemeris_path` also writes a trip-eph/1 interpolation table there
+    (see ephemeris_table.py), and `track_index_path` a trip-geo/1 ground-track
+    index over that table (see track_index.py), which a state_dir also keeps
+    in <state_dir>/tracks for queries over past runs. With `stations` (passes.load_stations),
+    corroboration is scored from predicted ground-station passes. A
+    state_dir also keeps each chain's Merkle nodes and the catalog tree
+    under <state_dir>/merkle, so inclusion proofs are read from disk (see
+    merkle.py).
+
+    The run is a graph of stages with declared inputs (STAGE_INPUTS):
+
+        load       catalog source                       -> TLEs, records      always runs
+        screen     TLEs, window, threshold              -> screening result   one chunk
+        passes     TLEs, window, stations               -> pass arrays        one chunk, with stations
+        propagate  TLEs, sampling policies, window      -> lat/lon/alt/e      per batch_plan() part
+        score      load, screen, passes, propagate,
+                   scores.json, maneuvers.json          -> components, state  per propagate chunk
+        chain      load, passes, propagate, score, encoding,
+                   chains.json, keys.json,
+                   crumb archive (stored head tails)    -> entries, heads,    per propagate chunk
+                                                           signed crumbs
+        publish    everything above                     -> output, delta, crumb archive,
+                                                           state stores, Merkle logs,
+                                                           .eph/.geo tables
+
+    With `checkpoint` (needs a state_dir) each stage persists its chunk
+    artifacts under <state_dir>/run/ (see checkpoints.py): a run that
+    crashes resumes from the last completed chunk of the stage it was in,
+    and a rerun skips every stage whose inputs did not change, e.g. a
+    re-publish after a state reset propagates nothing. Publish is the sink
+    and always runs; it alone writes the state stores, after which the
+    score and chain checkpoints are dropped. stats["checkpoints"] reports
+    per stage how many chunks were reused. Without it the same stages run
+    through checkpoints.PassthroughRunner, which streams one propagate
+    chunk at a time through score, chain and publish, so peak memory is
+    bounded by the chunk, not the catalog. The output is identical.
+    """
+    if checkpoint and not state_dir:
+        raise ValueError("checkpointed runs need a state directory")
+    metrics = RunMetrics()
+    runner = StageRunner(os.path.join(state_dir, "run")) if checkpoint else PassthroughRunner()
+    print_banner()
+
+    source = catalog if catalog is not None else get_full_catalog().items()
+
+    # Stable identities + incremental chains (state_dir=None: ephemeral keys)
+    keystore = KeyStore(state_dir) if state_dir else None
+    chain_states = ChainStateStore(state_dir) if state_dir else None
+    maneuver_states = ManeuverStateStore(state_dir) if state_dir else None
+    score_states = ScoreStateStore(state_dir) if state_dir else None
+    crumb_store = CrumbStore(os.path.join(state_dir, "crumbs")) if state_dir and archive \
+        and encoding == ENCODING_BINARY else None
+
+    # Content-addressed ephemeris cache (cache_dir=None: always propagate)
+    cache = EphemerisCache(cache_dir, cache_max_mb * 1024 * 1024) if cache_dir else None
+
+    grid_start = PROPAGATION_END - timedelta(hours=PROPAGATION_HOURS)
+    window = [grid_start.isoformat(), PROPAGATION_END.isoformat(), PROPAGATION_HOURS]
+
+    def key(stage, *config):
+        if not checkpoint:
+            return None
+        return fingerprint(stage, [runner.digest(s) for s in STAGE_INPUTS[stage]], *config)
+
+    def state_digest(store):
+        return file_digest(store.path) if checkpoint and store else None
+
+    # ── load: the source may have changed under us, so it always runs. One
+    # pass over the (possibly streamed) source builds the index; the scope
+    # filter then walks only the matching index buckets
+    with metrics.time("catalog_load", records=0):
+        catalog = source if isinstance(source, CatalogIndex) else CatalogIndex(source)
+        scope = {k: v for k, v in (scope or {}).items() if v}
+
+        def load(_):
+            tles, skipped = [], []
+            for name, data in catalog.filter(**scope):
+                if not data.get("tle1") or not data.get("tle2"):
+                    skipped.append(name)
+                    continue
+                tles.append((name, data["tle1"], data["tle2"]))
+            return {"tles": tles, "skipped": skipped}
+
+        loaded = runner.run("load", key("load", scope), ["catalog"], load, fresh=True).load("catalog")
+        tles = [tuple(t) for t in loaded["tles"]]
+    for name in loaded["skipped"]:
+        print(f"  [SKIP] {name}: no TLE data")
+    failed = len(loaded["skipped"])
+    metrics.add("catalog_load", 0.0, 0.0, records=len(tles) + failed, errors=failed)
+
+    # Entries go straight to the writer; only small summaries stay in memory.
+    # Unscoped runs with state also publish a delta against the previous run.
+    publisher = DeltaPublisher(state_dir, output_path, (int(grid_start.timestamp()),
+                               int(PROPAGATION_END.timestamp()))) if state_dir and publish and not scope else None
+    out = RunOutput(output_path, output_format, metrics, positions_path, publisher,
+                    INTERVAL_MINUTES * 60 if sampling == "fixed" else LATTICE_S, quiet)
+    out.failed = failed
+    scoped = f"{len(tles) + failed} of {len(catalog)}" if scope else f"{len(catalog)}"
+    print(f"  Processing {scoped} satellites ({workers} worker{'s' if workers > 1 else ''}"
+          f"{', checkpointed' if checkpoint else ''})...\n")
+
+    # Per-object sampling policy from its orbital regime
+    policies = {name: policy_for(catalog[name].regime, sampling, INTERVAL_MINUTES, tolerance_km)
+                for name, _, _ in tles}
+
+    # ── screen: runs first, its events feed every object's score
+    screening, close_approaches = None, {}
+    if screen_km:
+        def screen(_):
+            with metrics.time("screen", records=len(tles)):
+                return screen_catalog(tles, grid_start, PROPAGATION_END, screen_km)
+        screening = runner.run("screen", key("screen", tles, screen_km, SCREEN_STEP_S, SCREEN_MAX_SAMPLES, window), ["all"], screen).load("all")
+        close_approaches = events_by_object(screening["events"])
+        print(f"  Conjunction screening: {len(screening['events'])} approaches < {screen_km:g} km "
+              f"among {screening['objects']} objects\n")
+
+    # ── passes: so does pass prediction, observability replaces the corroboration baseline
+    passes, observed = None, {}
+    if stations:
+        def predict(_):
+            with metrics.time("passes", records=len(tles)):
+                return predict_passes(tles, stations, PROPAGATION_END, PROPAGATION_HOURS)
+        passes = runner.run("passes", key("passes", tles, stations, window), ["all"], predict).load("all")
+        observed = observability(passes)
+        print(f"  Pass prediction: {len(passes['obj'])} passes over {len(stations)} stations, "
+              f"{sum(1 for o in observed.values() if o['passes'])} of {len(observed)} objects observed\n")
+
+    # ── propagate: vectorized chunks, one sampling policy per chunk (batch_plan)
+    plan = batch_plan(tles, policies, PROPAGATION_CHUNK)
+    chunks = [f"{i:05d}" for i in range(len(plan))]
+
+    def propagate(chunk):
+        policy, part = plan[int(chunk)]
+        with metrics.time("propagate", records=len(part)):
+            batch = propagate_part(policy, part, PROPAGATION_END, PROPAGATION_HOURS, cache)
+            lat, lon, alt = geodetic_from_batch(batch)
+        metrics.error("propagate", len(batch["failed"]))
+        return {"names": batch["names"], "failed": batch["failed"], "timestamps": batch["timestamps"],
+                "epochs": list(batch["epochs"]), "steps": batch.get("steps", {}),
+                "lat": lat, "lon": lon, "alt": alt, "e": np.asarray(batch["e"])}
+
+    prop = runner.run("propagate", key("propagate", [[t, list(policies[t[0]])] for t in tles], window, MODEL,
+                                       PROPAGATION_CHUNK), chunks, propagate)
+
+    # ── score: GEO objects stream through their maneuver detector, resuming
+    # from persisted state; then the whole chunk is scored at once and the
+    # accumulators absorb only samples newer than what they have already seen
+    def score(chunk):
+        art = prop.load(chunk)
+        names = art["names"]
+        geos, geo_states, maneuver_events = {}, {}, [None] * len(names)
+        with metrics.time("score", records=len(names)):
+            for row, (name, positions) in enumerate(_positions(art)):
+                if not positions or not is_geo(catalog[name]["tle2"]):
+                    continue
+                detector = GeoManeuverDetector(maneuver_states.get(catalog[name]["norad"])
+                                               if maneuver_states else None)
+                for event in detector.feed(positions):
+                    if not quiet:
+                        print(f"  [WARN] {name}: {event['kind']} maneuver at {event['ts']}")
+                geos[name], geo_states[name] = detector.summary(since=positions[0]["epoch"]), detector.state
+                maneuver_events[row] = geos[name]["events"]
+
+            acc = ScoreAccumulators(len(names), [score_states.get(catalog[n]["norad"]) for n in names]
+                                    if score_states else None)
+            acc.update(art["alt"], art["lat"], art["e"] == 0, art["epochs"])
+            comps = split_components(score_components(
+                [catalog[n]["category"] for n in names], acc,
+                conjunctions=[close_approaches.get(n) for n in names], maneuvers=maneuver_events,
+                observed=[observed.get(n) for n in names] if passes else None,
+            ))
+        return {"score": dict(zip(names, comps)), "acc": {n: acc.state(i) for i, n in enumerate(names)},
+                "geo": geos, "geo_state": geo_states}
+
+    scored = runner.run("score", key("score", state_digest(score_states), state_digest(maneuver_states)),
+                        chunks, score)
+
+    # ── chain: sign + verify, optionally across a process pool. map() preserves
+    # job order, so results/leaderboard come out identical to a serial run.
+    # Seeds are created up front so a resumed chunk signs with the same keys
+    if keystore:
+        for name, _, _ in tles:
+            keystore.seed(catalog[name]["norad"])
+        keystore.save()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def chain(chunk):
+        art, sc = prop.load(chunk), scored.load(chunk)
+        jobs = [(name, catalog[name], positions, {
+            "seed": keystore.seed(catalog[name]["norad"]) if keystore else None,
+            "chain_state": chain_states.get(catalog[name]["norad"]) if chain_states else None,
+            "encoding": encoding,
+            "conjunctions": close_approaches.get(name),
+            "geo": sc["geo"].get(name),
+            "score": sc["score"][name],
+            "archive": crumb_store is not None,
+            "obs": observed.get(name) if passes else None,
+            "anchor": crumb_store.tail(catalog[name]["norad"], VERIFY_ANCHOR) if crumb_store else None,
+        }) for name, positions in _positions(art) if positions]
+        if pool:
+            processed = pool.map(_process_job, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+        else:
+            processed = map(_process_job, jobs)
+        results, signed, hashes = [], [np.zeros(0, dtype=CRUMB)], []
+        for name, entry, new_state, crumbs, new_hashes, err, (wall, cpu) in processed:
+            metrics.add("chain", wall, cpu, errors=bool(err), name=name)
+            results.append([name, entry, new_state, err, 0 if crumbs is None else len(crumbs)])
+            if crumbs is not None:
+                signed.append(crumbs)
+            hashes.append(new_hashes)
+        return {"results": results, "crumbs": np.concatenate(signed),
+                "hashes": np.frombuffer(b"".join(hashes), dtype=np.uint8).reshape(-1, 32)}
+
+    # ── publish: the sink, always runs and alone writes the state stores
+    try:
+        archive_digest = file_digest(crumb_store.manifest_path) if checkpoint and crumb_store else None
+        chained = runner.run("chain", key("chain", encoding, state_digest(chain_states), state_digest(keystore),
+                                          archive_digest), chunks, chain)
+        for chunk, (policy, _) in zip(chunks, plan):
+            art, sc, ch = prop.load(chunk), scored.load(chunk), chained.load(chunk)
+            for name, err in art["failed"].items():
+                print(f"  [FAIL] {name}: TLE parse error: {err}")
+                out.failed += 1
+            propagated = dict(_positions(art))
+            for name, positions in propagated.items():
+                if not positions:
+                    print(f"  [FAIL] {name}: SGP4 propagation failed")
+                    out.failed += 1
+                    metrics.error("propagate")
+            if maneuver_states:
+                for name, state in sc["geo_state"].items():
+                    maneuver_states.put(catalog[name]["norad"], state)
+
+            offsets = np.cumsum([0] + [r[4] for r in ch["results"]])
+            leaf_offsets = np.cumsum([0] + [r[1]["trip"]["new"] if r[1] else 0 for r in ch["results"]])
+            for (name, entry, new_state, err, _), lo, hi, first in zip(ch["results"], offsets, offsets[1:],
+                                                                       leaf_offsets):
+                if err:
+                    print(f"  [FAIL] {name}: {err}")
+                    out.failed += 1
+                    continue
+                out.add(name, entry, propagated[name], catalog[name], policy, art["steps"].get(name))
+                if chain_states and new_state:
+                    chain_states.put(entry["n"], new_state)
+                if score_states:
+                    score_states.put(entry["n"], sc["acc"][name])
+                if state_dir:
+                    with metrics.time("write", records=0):
+                        extend_merkle_log(state_dir, entry, ch["hashes"][first:first + entry["trip"]["new"]],
+                                          crumb_store)
+                if crumb_store:
+                    with metrics.time("write", records=0):
+                        crumb_store.add(entry["n"], entry["trip"]["pk"], ch["crumbs"][lo:hi])
+    finally:
+        if pool:
+            pool.shutdown()
+
+    ephemeris = None
+    if ephemeris_path:
+        with metrics.time("propagate", records=0):
+            ephemeris = build_ephemeris(tles, {n: catalog[n].norad for n, _, _ in tles}, ephemeris_path,
+                                        PROPAGATION_END, PROPAGATION_HOURS, cache=cache)
+    track_index = None
+    if ephemeris and track_index_path:
+        with metrics.time("write", records=0):
+            track_index = build_track_index(ephemeris_path, track_index_path)
+            if state_dir:
+                track_index["history"] = TrackHistory(os.path.join(state_dir, "tracks")).add(track_index_path,
+                                                                                           ephemeris_path)
+    # The archive commits before the chain heads, so it never falls behind them
+    archived = crumb_store.commit() if crumb_store else None
+    if keystore:
+        keystore.save()
+        chain_states.save()
+        maneuver_states.save()
+        score_states.save()
+    runner.discard("score", "chain")
+    if cache:
+        cache.evict()
+
+    extra_stats = {"archive": archived}
+    if checkpoint:
+        extra_stats["checkpoints"] = {stage: {k: v for k, v in r.items() if k != "key"}
+                                      for stage, r in runner.report.items()}
+    output = out.close(catalog, source, encoding, sampling, policies, screening, screen_km,
+                       cache, scope, extra_stats=extra_stats, metrics_path=metrics_path,
+                       ephemeris=ephemeris, passes=passes, track_index=track_index,
+                       merkle_dir=os.path.join(state_dir, "merkle") if state_dir else None)
+    out.report()
+    if checkpoint:
+        print("  ✓ Checkpoints: " + ", ".join(f"{s} {r['reused']}/{r['chunks']} reused"
+                                              for s, r in extra_stats["checkpoints"].items()) + "\n")
+    return output
 
-    file_size = os.path.getsize(OUTPUT_PATH)
-    print(f"\n  ✓ Output: {OUTPUT_PATH} ({file_size // 1024} KB)")
-    print(f"  ✓ Satellites: {len(results)} processed, {failed} failed")
-    print(f"  ✓ Story satellites: {output['stats']['story_satellites']}")
-    print(f"  ✓ Tiers: {output['stats']['tiers']}")
-    print()
 
-    return output
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Orbital TrIP Phase 1 pipeline")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="output JSON (or manifest) path")
+    parser.add_argument("--format", choices=FORMATS, default="json",
+                        help="json: one document; ndjson/shards: streamed per satellite + manifest")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes for chain signing + scoring (default: 1, serial)")
+    parser.add_argument("--state-dir", default=STATE_DIR,
+                        help="keystore + chain head directory (default: %(default)s)")
+    parser.add_argument("--ephemeral", action="store_true",
+                        help="fresh keys and full chains every run; no state is read or written")
+    parser.add_argument("--encoding", choices=ENCODINGS, default=ENCODING_BINARY,
+                        help="breadcrumb signing payload (default: %(default)s)")
+    parser.add_argument("--positions", action="store_true",
+                        help="also write the columnar trip-pos/1 store next to the output (<stem>.pos)")
+    parser.add_argument("--ephemeris", action="store_true",
+                        help="also write the trip-eph/1 interpolation table next to the output (<stem>.eph)")
+    parser.add_argument("--track-index", action="store_true",
+                        help="also write the trip-geo/1 ground-track index (<stem>.geo, implies --ephemeris)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="propagation cache directory (default: %(default)s)")
+    parser.add_argument("--cache-max-mb", type=int, default=CACHE_MAX_MB,
+                        help="LRU size bound for the cache (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="always re-propagate every TLE")
+    parser.add_argument("--screen-km", type=float, default=SCREEN_KM,
+                        help="conjunction screening distance, 0 to skip (default: %(default)s)")
+    parser.add_argument("--catalog", nargs="+", metavar="FILE",
+                        help="TLE/3LE or OMM (.json/.csv/.xml) files instead of the embedded catalog")
+    parser.add_argument("--overlay", help="category/operator/story metadata keyed by NORAD ID (JSON)")
+    parser.add_argument("--fetch", action="store_true",
+                        help="fetch live TLEs for the embedded catalog (conditional, cached; see tle_ingest.py)")
+    parser.add_argument("--fetch-url", default=CELESTRAK_GP, help="GP API endpoint (default: %(default)s)")
+    parser.add_argument("--fetch-group", action="append", help="with --fetch: whole CelesTrak group(s) instead")
+    parser.add_argument("--fetch-cache-dir", default=INGEST_CACHE_DIR,
+                        help="ingestion response cache (default: %(default)s)")
+    parser.add_argument("--category", action="append", help="only this category (repeatable)")
+    parser.add_argument("--operator", action="append", help="only this operator (repeatable)")
+    parser.add_argument("--regime", action="append", choices=REGIMES, help="only this orbital regime (repeatable)")
+    parser.add_argument("--sampling", choices=SAMPLING_MODES, default="fixed",
+                        help="fixed grid, per-regime intervals, or error-bounded adaptive (default: %(default)s)")
+    parser.add_argument("--tolerance-km", type=float, default=ADAPTIVE_TOL_KM,
+                        help="adaptive sampling interpolation tolerance (default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true", help="no per-satellite progress lines")
+    parser.add_argument("--metrics", metavar="PATH", help="also write stage metrics in Prometheus text format")
+    parser.add_argument("--no-delta", action="store_true", help="do not publish a delta against the previous run")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="do not append signed breadcrumbs to the <state-dir>/crumbs archive")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="checkpoint every stage under <state-dir>/run, resumable (see run_pipeline)")
+    parser.add_argument("--stations", nargs="?", const="", metavar="FILE",
+                        help="score corroboration from ground-station passes; FILE is a JSON station list "
+                             "(default: the built-in network, see passes.py)")
+    args = parser.parse_args(argv)
+    if args.checkpoint and args.ephemeral:
+        parser.error("--checkpoint needs a state directory, not --ephemeral")
+    if args.catalog:
+        catalog = CatalogLoader(args.catalog, args.overlay)
+    elif args.fetch:
+        catalog = LiveCatalog(groups=args.fetch_group, ingestor=TleIngestor(args.fetch_url, args.fetch_cache_dir))
+    else:
+        catalog = None
+    return run_pipeline(output_path=args.output, workers=max(1, args.workers),
+                        state_dir=None if args.ephemeral else args.state_dir,
+                        encoding=args.encoding, output_format=args.format,
+                        positions_path=os.path.splitext(args.output)[0] + ".pos" if args.positions else None,
+                        ephemeris_path=os.path.splitext(args.output)[0] + ".eph" if args.ephemeris or args.track_index else None,
+                        track_index_path=os.path.splitext(args.output)[0] + ".geo" if args.track_index else None,
+                        cache_dir=None if args.no_cache else args.cache_dir, cache_max_mb=args.cache_max_mb,
+                        screen_km=args.screen_km,
+                        catalog=catalog,
+                        scope={"category": args.category, "operator": args.operator, "regime": args.regime},
+                        sampling=args.sampling, tolerance_km=args.tolerance_km,
+                        quiet=args.quiet, metrics_path=args.metrics, publish=not args.no_delta,
+                        archive=not args.no_archive,
+                        stations=None if args.stations is None else load_stations(args.stations or None),
+                        checkpoint=args.checkpoint)
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    main()
@@ -0,0 +1,173 @@
+"""
+Orbital TrIP — Pipeline Output Writers
+Satellites are handed to a writer one at a time as they finish, so the
+pipeline never needs the whole catalog's entries in memory.
+
+Formats:
+    json    single minified document (legacy dashboard format; entries
+            are streamed to a temporary body file and spliced in behind
+            the header at close)
+    ndjson  <stem>.ndjson with one {"name", ...entry} line per satellite,
+            plus a manifest at the output path with byte offsets so a
+            consumer can Range-fetch one satellite
+    shards  <stem>/<norad>.json per satellite, plus a manifest at the
+            output path mapping name -> shard file; shards the manifest
+            does not list (satellites dropped since an earlier run) are
+            removed at close
+
+The manifest (stats, leaderboard, index) and every file are written to
+a temporary name and renamed into place, so readers never see a
+half-written artifact.
+
+add(name, entry) is encode() followed by write(), the two halves kept
+apart so the pipeline can time serialization and I/O separately.
+"""
+
+import json, os, shutil
+
+FORMATS = ("json", "ndjson", "shards")
+
+
+def _dumps(obj):
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _stem(path):
+    return os.path.splitext(path)[0]
+
+
+# ============================================================
+# WRITERS
+# ============================================================
+class JsonWriter:
+    """Legacy monolithic document: header fields + "satellites" mapping."""
+
+    def __init__(self, path):
+        self.path = path
+        self._body = f"{path}.body.tmp.{os.getpid()}"
+        self._f = open(self._body, "w")
+        self.index = {}
+
+    def encode(self, name, entry):
+        return _dumps(entry)
+
+    def write(self, name, entry, data):
+        self._f.write(f"{',' if self.index else ''}{_dumps(name)}:{data}")
+        self.index[name] = {"n": entry["n"]}
+
+    def add(self, name, entry):
+        self.write(name, entry, self.encode(name, entry))
+
+    def close(self, header):
+        # Entries were streamed to the body file as they arrived; splice it in after the header
+        self._f.close()
+        tmp = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp, "w") as out, open(self._body) as body:
+            out.write(_dumps(header)[:-1] + ',"satellites":{')
+            shutil.copyfileobj(body, out, 1 << 20)
+            out.write("}}")
+        os.replace(tmp, self.path)
+        os.remove(self._body)
+        return dict(header, satellites=self.index)
+
+
+class NdjsonWriter:
+    """One JSON line per satellite, streamed to disk as it arrives."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data_path = _stem(path) + ".ndjson"
+        self._tmp = f"{self.data_path}.tmp.{os.getpid()}"
+        self._f = open(self._tmp, "wb")
+        self.index = {}
+
+    def encode(self, name, entry):
+        return (_dumps(dict(name=name, **entry)) + "\n").encode()
+
+    def write(self, name, entry, data):
+        self.index[name] = {"n": entry["n"], "offset": self._f.tell(), "length": len(data)}
+        self._f.write(data)
+
+    def add(self, name, entry):
+        self.write(name, entry, self.encode(name, entry))
+
+    def close(self, header):
+        self._f.close()
+        os.replace(self._tmp, self.data_path)
+        manifest = dict(header, format="ndjson",
+                        data=os.path.basename(self.data_path), satellites=self.index)
+        _write_atomic(self.path, _dumps(manifest))
+        return manifest
+
+
+class ShardWriter:
+    """One small JSON file per satellite under <stem>/, keyed by NORAD ID."""
+
+    def __init__(self, path):
+        self.path = path
+        self.shard_dir = _stem(path)
+        os.makedirs(self.shard_dir, exist_ok=True)
+        self.index = {}
+
+    def encode(self, name, entry):
+        return _dumps(dict(name=name, **entry))
+
+    def write(self, name, entry, data):
+        rel = f"{os.path.basename(self.shard_dir)}/{entry['n']}.json"
+        _write_atomic(os.path.join(self.shard_dir, f"{entry['n']}.json"), data)
+        self.index[name] = {"n": entry["n"], "shard": rel}
+
+    def add(self, name, entry):
+        self.write(name, entry, self.encode(name, entry))
+
+    def close(self, header):
+        manifest = dict(header, format="shards", satellites=self.index)
+        _write_atomic(self.path, _dumps(manifest))
+        # Shards of satellites an earlier, larger run wrote are no longer listed
+        listed = {f"{ref['n']}.json" for ref in self.index.values()}
+        for shard in os.listdir(self.shard_dir):
+            if shard.endswith(".json") and shard not in listed:
+                os.remove(os.path.join(self.shard_dir, shard))
+        return manifest
+
+
+def open_writer(path, fmt="json"):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fmt == "json":
+        return JsonWriter(path)
+    if fmt == "ndjson":
+        return NdjsonWriter(path)
+    if fmt == "shards":
+        return ShardWriter(path)
+    raise ValueError(f"unknown output format {fmt!r}")
+
+
+# ============================================================
+# READERS
+# ============================================================
+def read_satellite(manifest_path, name):
+    """Load one satellite's entry without parsing the rest of the catalog."""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    base = os.path.dirname(manifest_path)
+    fmt = manifest.get("format", "json")
+
+    if fmt == "json":
+        return manifest["satellites"][name]
+    ref = manifest["satellites"][name]
+    if fmt == "ndjson":
+        with open(os.path.join(base, manifest["data"]), "rb") as f:
+            f.seek(ref["offset"])
+            record = json.loads(f.read(ref["length"]))
+    else:
+        with open(os.path.join(base, ref["shard"])) as f:
+            record = json.load(f)
+    record.pop("name", None)
+    return record
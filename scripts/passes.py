@@ -0,0 +1,351 @@
+"""
+Orbital TrIP — Ground-Station Pass Prediction
+Rise, culmination and set of every catalog object over a network of
+ground stations, so corroboration can be scored from how well an object
+is actually observed rather than from its category alone:
+
+    1. Each object is propagated on its trip-eph/1 Hermite step (SGP4
+       only every few minutes for LEO) and scanned at Hermite points in
+       between, at least PASS_SCAN_DIVISOR per period, in batches of
+       objects that share both steps.
+    2. Elevation above every station's mask comes out of two matrix
+       products over the whole batch, sin(el) = (r·u - s·u) / |r - s| in
+       ECEF with s, u the station position and local up vector, so no
+       object x time x station x 3 topocentric array is ever built.
+    3. Sign changes of sin(el) - sin(mask) bracket rises and sets; a few
+       Illinois (regula falsi) iterations on the Hermite-interpolated
+       orbit pin them down. Culmination comes from successive parabolas
+       around the highest scan sample of each pass.
+
+Passes already under way when the window opens have no rise, those still
+in progress when it closes no set. A pass shorter than about one scan
+step can fall between samples and be missed.
+
+Stations are JSON: [{"name", "lat", "lon", "alt_km", "min_el"}, ...]
+(degrees; alt_km and min_el optional). DEFAULT_STATIONS is used without.
+
+Usage:
+    python3 passes.py [--stations FILE] [N]   # timing on N synthetic objects + brute-force check
+"""
+
+import json
+
+import numpy as np
+
+from frames import teme_to_ecef, WGS84_A, WGS84_E2
+from propagation import parse_tles, propagate_catalog
+from sampling import hermite
+from ephemeris_table import estimated_step, _julian
+from array_utils import ragged_arange
+
+PASS_SCAN_DIVISOR = 100     # scan samples per orbital period, at least
+PASS_BATCH = 1 << 23        # objects x samples x stations per elevation batch
+ROOT_ITERATIONS = 6         # Illinois steps; well under a second on these near-linear brackets
+DEFAULT_MIN_EL = 10.0       # degrees
+
+DEFAULT_STATIONS = [
+    {"name": "Svalbard", "lat": 78.23, "lon": 15.39, "alt_km": 0.50},
+    {"name": "Kiruna", "lat": 67.86, "lon": 20.96, "alt_km": 0.40},
+    {"name": "Fairbanks", "lat": 64.86, "lon": -147.85, "alt_km": 0.30},
+    {"name": "Wallops", "lat": 37.94, "lon": -75.46, "alt_km": 0.01},
+    {"name": "Goldstone", "lat": 35.43, "lon": -116.89, "alt_km": 1.00},
+    {"name": "Madrid", "lat": 40.43, "lon": -4.25, "alt_km": 0.83},
+    {"name": "Usuda", "lat": 36.13, "lon": 138.36, "alt_km": 1.46},
+    {"name": "Hawaii", "lat": 19.01, "lon": -155.66, "alt_km": 0.40},
+    {"name": "Kourou", "lat": 5.25, "lon": -52.80, "alt_km": 0.01},
+    {"name": "Singapore", "lat": 1.35, "lon": 103.82, "alt_km": 0.02},
+    {"name": "Malindi", "lat": -2.99, "lon": 40.19, "alt_km": 0.01},
+    {"name": "Hartebeesthoek", "lat": -25.89, "lon": 27.69, "alt_km": 1.54},
+    {"name": "Santiago", "lat": -33.15, "lon": -70.67, "alt_km": 0.72},
+    {"name": "Perth", "lat": -31.80, "lon": 115.89, "alt_km": 0.02},
+    {"name": "Canberra", "lat": -35.40, "lon": 148.98, "alt_km": 0.69},
+    {"name": "Troll", "lat": -72.01, "lon": 2.53, "alt_km": 1.27},
+]
+
+
+# ============================================================
+# STATIONS
+# ============================================================
+def load_stations(path=None):
+    """Station list from a JSON file (DEFAULT_STATIONS without), defaults filled in."""
+    if path:
+        with open(path) as f:
+            stations = json.load(f)
+    else:
+        stations = DEFAULT_STATIONS
+    return [{"name": s["name"], "lat": float(s["lat"]), "lon": float(s["lon"]),
+             "alt_km": float(s.get("alt_km", 0.0)), "min_el": float(s.get("min_el", DEFAULT_MIN_EL))}
+            for s in stations]
+
+
+def station_vectors(stations):
+    """WGS84 ECEF positions (S, 3), local up vectors (S, 3) and sin(mask) (S,)."""
+    lat = np.radians([s["lat"] for s in stations])
+    lon = np.radians([s["lon"] for s in stations])
+    alt = np.array([s["alt_km"] for s in stations], dtype=np.float64)
+    sl, cl = np.sin(lat), np.cos(lat)
+    n = WGS84_A / np.sqrt(1.0 - WGS84_E2 * sl * sl)
+    up = np.stack([cl * np.cos(lon), cl * np.sin(lon), sl], axis=-1)
+    pos = np.stack([(n + alt) * cl * np.cos(lon), (n + alt) * cl * np.sin(lon),
+                    (n * (1.0 - WGS84_E2) + alt) * sl], axis=-1)
+    return pos, up, np.sin(np.radians([s["min_el"] for s in stations]))
+
+
+def scan_grid(sat):
+    """
+    (step, factor): propagate every `step` seconds, the object's trip-eph/1
+    Hermite step, and scan `factor` Hermite points per step, enough for
+    PASS_SCAN_DIVISOR samples per period.
+    """
+    step = estimated_step(sat)
+    return step, int(np.ceil(step * PASS_SCAN_DIVISOR * sat.no_kozai / (2 * np.pi * 60.0)))
+
+
+# ============================================================
+# ELEVATION
+# ============================================================
+def elevation_margin(r, pos, up, sin_mask):
+    """sin(elevation) - sin(mask) of ECEF positions r (..., 3) from every station: (..., S), in r's dtype."""
+    dtype = r.dtype
+    rho = r @ (-2.0 * pos.T).astype(dtype)
+    rho += np.einsum("...i,...i->...", r, r)[..., None]
+    rho += (pos * pos).sum(axis=1).astype(dtype)
+    np.sqrt(np.maximum(rho, 1e-12, out=rho), out=rho)
+    margin = r @ up.T.astype(dtype)
+    margin -= (pos * up).sum(axis=1).astype(dtype)
+    margin /= rho
+    margin -= sin_mask.astype(dtype)
+    return margin
+
+
+def _margin_at(ra, va, rb, vb, t0, h, s, pos, up, sin_mask):
+    """elevation_margin at fraction s of Hermite intervals, one station per row."""
+    jd, fr = _julian(t0 + s * h)
+    d = teme_to_ecef(hermite(ra, va, rb, vb, h, s[:, None]), jd, fr) - pos
+    return (d * up).sum(axis=1) / np.linalg.norm(d, axis=1) - sin_mask
+
+
+def _refine(ra, va, rb, vb, t0, h, pos, up, sin_mask, a, b, fa, fb):
+    """Fraction of each Hermite interval, within [a, b], at which the margin crosses zero."""
+    lo, hi = a, b
+    for _ in range(ROOT_ITERATIONS):
+        s = b - fb * (b - a) / (fb - fa)
+        fs = _margin_at(ra, va, rb, vb, t0, h, s, pos, up, sin_mask)
+        flip = fs * fb < 0
+        a, fa = np.where(flip, b, a), np.where(flip, fb, fa / 2)   # Illinois: halve the stale end
+        b, fb = s, fs
+    return np.clip(np.where(np.isfinite(b), b, (lo + hi) / 2), lo, hi)
+
+
+# ============================================================
+# PASSES
+# ============================================================
+def _upsample(r, v, step, factor):
+    """Hermite positions at `factor` points per interval of an (n, T, 3) grid, plus its last point."""
+    if factor == 1:
+        return r
+    s = np.arange(factor) / factor
+    s2, s3 = s * s, s * s * s
+    basis = np.stack([2 * s3 - 3 * s2 + 1, (s3 - 2 * s2 + s) * step, -2 * s3 + 3 * s2, (s3 - s2) * step], axis=1)
+    ends = np.stack([r[:, :-1], v[:, :-1], r[:, 1:], v[:, 1:]], axis=2)   # (n, T-1, 4, 3)
+    fine = basis @ ends                                                     # sampling.hermite, as one product
+    return np.concatenate([fine.reshape(len(r), -1, 3), r[:, -1:]], axis=1)
+
+
+def _batch_passes(batch, step, factor, pos, up, sin_mask):
+    """Coverage per object and every pass of one batch propagated every `step` seconds."""
+    r, v, ok = batch["r"], batch["v"], batch["e"] == 0
+    epochs = np.asarray(batch["epochs"], dtype=np.float64)
+    scan, last = step / factor, len(epochs) - 2
+
+    # Scan grid: Hermite-upsampled, elevation in float32 (it only brackets crossings and peaks)
+    t_scan = epochs[0] + scan * np.arange((last + 1) * factor + 1)
+    valid = np.concatenate([np.repeat(ok[:, :-1] & ok[:, 1:], factor, axis=1), ok[:, -1:]], axis=1)
+    valid[:, ::factor] = ok
+    r_scan = teme_to_ecef(_upsample(r, v, step, factor), *_julian(t_scan)).astype(np.float32)
+    margin = elevation_margin(r_scan, pos, up, sin_mask)
+    del r_scan
+    margin[~valid] = -1.0
+    above = margin > 0
+    coverage = above.any(axis=2).mean(axis=1)
+    steps = margin.shape[1]
+
+    # Sign changes bracket rises and sets. A pass under way at either end of
+    # the window gets a virtual crossing just outside it (k = -1 or steps - 1),
+    # so crossings alternate rise, set within every (object, station)
+    change = np.diff(above.view(np.int8), axis=1)
+    obj, k, sta = np.nonzero(change)
+    o0, s0 = np.nonzero(above[:, 0])
+    o1, s1 = np.nonzero(above[:, -1])
+    obj, sta = np.concatenate([obj, o0, o1]), np.concatenate([sta, s0, s1])
+    k = np.concatenate([k, np.full(len(o0), -1), np.full(len(o1), steps - 1)])
+    order = np.lexsort((k, sta, obj))
+    obj, sta, k = obj[order], sta[order], k[order]
+
+    # Refine each bracket on the Hermite interval of the propagated grid holding it
+    t = np.full(len(k), np.nan)
+    real = (k >= 0) & (k < steps - 1)
+    i, q, j = obj[real], k[real], sta[real]
+    kc = np.minimum(q // factor, last)
+    s = _refine(r[i, kc], v[i, kc], r[i, kc + 1], v[i, kc + 1], epochs[kc], float(step), pos[j], up[j], sin_mask[j],
+                q / factor - kc, (q + 1) / factor - kc,
+                margin[i, q, j].astype(np.float64), margin[i, q + 1, j].astype(np.float64))
+    t[real] = epochs[kc] + s * step
+
+    po, ps, first, end = obj[0::2], sta[0::2], k[0::2] + 1, k[1::2] + 1   # scan samples [first, end) in view
+    if not len(po):
+        return coverage, {"obj": po, "station": ps, "rise": t[0::2], "culm": t[0::2],
+                          "set": t[1::2], "max_el": t[0::2]}
+
+    # Highest scan sample of each pass, then successive parabolas through the
+    # peak and points either side, closing in, on the Hermite orbit
+    lengths = end - first
+    seg = np.repeat(np.arange(len(po)), lengths)
+    samples = ragged_arange(first, lengths)
+    values = margin[po[seg], samples, ps[seg]]
+    peak = np.maximum.reduceat(values, np.cumsum(lengths) - lengths)
+    hit = np.flatnonzero(values == peak[seg])
+    _, top = np.unique(seg[hit], return_index=True)
+    km = samples[hit[top]]
+    del margin, above, values
+
+    def margin_at(tq):
+        kq = np.clip(((tq - epochs[0]) // step).astype(np.int64), 0, last)
+        return _margin_at(r[po, kq], v[po, kq], r[po, kq + 1], v[po, kq + 1], epochs[kq], float(step),
+                          (tq - epochs[kq]) / step, pos[ps], up[ps], sin_mask[ps])
+
+    tc = t_scan[km]
+    for h in (scan / 2, scan / 10):
+        tc = np.clip(tc, t_scan[0] + h, t_scan[-1] - h)   # keep all three points in the window
+        fm, fc, fp = margin_at(tc - h), margin_at(tc), margin_at(tc + h)
+        curv = fm - 2 * fc + fp
+        d = np.where(curv < 0, 0.5 * (fm - fp) / np.where(curv < 0, curv, -1.0), np.sign(fp - fm))
+        d = np.where(np.isfinite(d), d, 0.0).clip(-1.0, 1.0)
+        tc = tc + d * h
+    el = fc + 0.5 * (fp - fm) * d + 0.5 * curv * d * d                           # the last parabola at tc
+    el = np.where(np.isfinite(el), el, peak) + sin_mask[ps]
+    return coverage, {"obj": po, "station": ps, "rise": t[0::2], "culm": tc,
+                      "set": t[1::2], "max_el": np.degrees(np.arcsin(np.clip(el, -1.0, 1.0)))}
+
+
+def predict_passes(tles, stations, end, hours):
+    """
+    Every pass of every (name, tle1, tle2) over `stations` (load_stations
+    format) in the `hours` ending at `end`. Returns a dict of arrays, one
+    row per pass ordered by object then culmination: obj (index into
+    names), station (index into stations), rise, culm, set (Unix seconds;
+    NaN where the window cuts the pass) and max_el (degrees). Alongside:
+    names, stations, steps (scan step -> objects) and per-object coverage,
+    the fraction of scan samples in view of at least one station.
+    """
+    pos, up, sin_mask = station_vectors(stations)
+    sats, names, _ = parse_tles(tles)
+    by_name = {tle[0]: tle for tle in tles}
+    index = {name: i for i, name in enumerate(names)}
+    groups = {}
+    for sat, name in zip(sats, names):
+        groups.setdefault(scan_grid(sat), []).append(by_name[name])
+
+    coverage, parts = np.zeros(len(names)), []
+    for step, factor in sorted(groups, reverse=True):
+        group = groups[step, factor]
+        chunk = max(1, PASS_BATCH // ((int(hours * 3600 // step) * factor + 1) * len(stations)))
+        for lo in range(0, len(group), chunk):
+            batch = propagate_catalog(group[lo:lo + chunk], end, hours, step / 60)
+            rows = np.array([index[name] for name in batch["names"]], dtype=np.int64)
+            coverage[rows], found = _batch_passes(batch, step, factor, pos, up, sin_mask)
+            found["obj"] = rows[found["obj"]]
+            parts.append(found)
+
+    fields = ("obj", "station", "rise", "culm", "set", "max_el")
+    result = {f: np.concatenate([p[f] for p in parts]) if parts else np.zeros(0) for f in fields}
+    result["obj"] = result["obj"].astype(np.int32)
+    result["station"] = result["station"].astype(np.int16)
+    order = np.lexsort((result["culm"], result["obj"]))
+    result = {f: a[order] for f, a in result.items()}
+    steps = {}
+    for (step, factor), group in sorted(groups.items(), key=lambda g: -g[0][0] / g[0][1]):
+        steps[f"{step / factor:g}"] = steps.get(f"{step / factor:g}", 0) + len(group)
+    return dict(result, names=names, stations=stations, coverage=coverage, steps=steps)
+
+
+def observability(result):
+    """name -> {passes, stations seen, cover} from a predict_passes result."""
+    n, n_stations = len(result["names"]), len(result["stations"])
+    counts = np.bincount(result["obj"], minlength=n)
+    pairs = np.unique(result["obj"].astype(np.int64) * n_stations + result["station"])
+    seen = np.bincount(pairs // n_stations, minlength=n)
+    return {name: {"passes": int(c), "stations": int(s), "cover": round(float(f), 4)}
+            for name, c, s, f in zip(result["names"], counts.tolist(), seen.tolist(), result["coverage"])}
+
+
+def passes_header(result):
+    """The output header's "passes" block."""
+    return {
+        "stations": result["stations"],
+        "scan_steps": result["steps"],
+        "passes": len(result["obj"]),
+        "observed": int(len(np.unique(result["obj"]))),
+        "objects": len(result["names"]),
+    }
+
+
+# ============================================================
+# SELF-CHECK
+# ============================================================
+if __name__ == "__main__":
+    import argparse, time
+    from satellite_catalog import get_full_catalog
+    from synthetic_catalog import synthetic_catalog
+    from orbital_trip_pipeline_v2 import PROPAGATION_END as end, PROPAGATION_HOURS as hours
+
+    parser = argparse.ArgumentParser(description="pass prediction timing and brute-force check")
+    parser.add_argument("objects", type=int, nargs="?", default=2000, help="synthetic catalog size")
+    parser.add_argument("--stations", help="station list (JSON); default network without")
+    args = parser.parse_args()
+    stations = load_stations(args.stations)
+
+    # Accuracy: the embedded catalog against a 1-second SGP4 scan
+    embedded = [(n, d["tle1"], d["tle2"]) for n, d in get_full_catalog().items() if d.get("tle1")]
+    found = predict_passes(embedded, stations, end, hours)
+    pos, up, sin_mask = station_vectors(stations)
+    rise_err, el_err, missed = [], [], []
+    for tle in embedded[:12]:
+        fine = propagate_catalog([tle], end, hours, 1 / 60)
+        m = elevation_margin(teme_to_ecef(fine["r"][0], fine["jd"], fine["fr"]), pos, up, sin_mask)
+        m = np.where(fine["e"][0, :, None] == 0, m, -1.0)
+        t = np.asarray(fine["epochs"], dtype=np.float64)
+        mine = found["obj"] == found["names"].index(tle[0])
+        for j in range(len(stations)):
+            ours = np.flatnonzero(mine & (found["station"] == j))
+            rises = np.flatnonzero(np.diff((m[:, j] > 0).astype(np.int8)) > 0)
+            sets = np.flatnonzero(np.diff((m[:, j] > 0).astype(np.int8)) < 0)
+            for k in rises:
+                tr = t[k] + m[k, j] / (m[k, j] - m[k + 1, j])
+                near = np.abs(found["rise"][ours] - tr)
+                if not len(near) or np.nanmin(near) > 30:
+                    after = sets[sets > k]
+                    missed.append((t[after[0]] if len(after) else t[-1]) - tr)
+                else:
+                    rise_err.append(np.nanmin(near))
+            for k in ours:
+                span = (t >= np.nan_to_num(found["rise"][k], nan=t[0])) & (t <= np.nan_to_num(found["set"][k], nan=t[-1]))
+                el_err.append(np.degrees(np.arcsin(min(1.0, m[span, j].max() + sin_mask[j]))) - found["max_el"][k])
+    el_err = np.abs(el_err)
+    print(f"\n  Embedded catalog: {len(found['obj'])} passes of {len(embedded)} objects over "
+          f"{len(stations)} stations")
+    print(f"  vs 1 s SGP4 scan ({len(rise_err) + len(missed)} rises of 12 objects): rise error max "
+          f"{max(rise_err):.2f} s, p95 {np.percentile(rise_err, 95):.2f} s; max elevation error p95 "
+          f"{np.percentile(el_err, 95):.3f}° (max {el_err.max():.3f}°)")
+    print(f"  missed {len(missed)} passes, longest {max(missed, default=0):.0f} s above the mask")
+
+    # Throughput on a synthetic catalog
+    catalog = [(n, d["tle1"], d["tle2"]) for n, d in synthetic_catalog(args.objects)]
+    t0 = time.perf_counter()
+    result = predict_passes(catalog, stations, end, hours)
+    wall = time.perf_counter() - t0
+    obs = observability(result)
+    print(f"  Synthetic catalog: {args.objects} objects x {len(stations)} stations over {hours} h: "
+          f"{len(result['obj'])} passes in {wall:.2f}s (scan steps {result['steps']})")
+    print(f"  observed by >= 1 station: {sum(1 for o in obs.values() if o['passes'])}, "
+          f"mean cover {np.mean([o['cover'] for o in obs.values()]):.3f}\n")
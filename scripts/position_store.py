@@ -0,0 +1,140 @@
+"""
+Orbital TrIP — Columnar Binary Position Store (trip-pos/1)
+Compact, memory-mappable companion to the JSON "p" arrays. Each
+satellite is stored as four int32 columns — grid step, lat, lon, alt —
+quantized and delta-encoded along time, so one satellite or one time
+range can be sliced out without reading the rest of the file.
+
+File layout (little-endian):
+    header   magic "TRIPPOS1", version, epoch_start, step_seconds,
+             n_steps, n_sats, latlon_scale, alt_scale, index_offset
+    data     per satellite: steps[count] lat[count] lon[count] alt[count]
+             (int32; first value absolute, then deltas)
+    index    n_sats x (norad u32, offset u64 in int32 words, count u32)
+
+Usage:
+    python3 position_store.py PATH [NORAD]   # summary / dump one satellite
+"""
+
+import os, struct
+import numpy as np
+
+MAGIC = b"TRIPPOS1"
+VERSION = 1
+FORMAT = "trip-pos/1"
+LATLON_SCALE = 100_000  # 1e-5 deg
+ALT_SCALE = 1000        # km -> m
+
+_HEADER = struct.Struct("<8sHxxqdIIIIQ")
+_INDEX = np.dtype([("norad", "<u4"), ("offset", "<u8"), ("count", "<u4")])
+
+
+def _delta(a):
+    out = np.empty_like(a)
+    if len(a):
+        out[0] = a[0]
+        np.subtract(a[1:], a[:-1], out=out[1:])
+    return out
+
+
+# ============================================================
+# WRITER
+# ============================================================
+class PositionStoreWriter:
+    """Streams satellites into a trip-pos/1 file; index + header at close()."""
+
+    def __init__(self, path, epoch_start, step_seconds, n_steps):
+        self.path = path
+        self.epoch_start, self.step_seconds, self.n_steps = epoch_start, step_seconds, n_steps
+        self._tmp = f"{path}.tmp.{os.getpid()}"
+        self._f = open(self._tmp, "wb")
+        self._f.write(b"\0" * _HEADER.size)
+        self._words = 0
+        self._index = []
+
+    def add(self, norad, epochs, lat, lon, alt):
+        """Append one satellite; `epochs` are Unix seconds on the store's grid."""
+        steps = np.rint((np.asarray(epochs, dtype=np.float64) - self.epoch_start) / self.step_seconds)
+        cols = (
+            steps.astype(np.int32),
+            np.rint(np.asarray(lat) * LATLON_SCALE).astype(np.int32),
+            np.rint(np.asarray(lon) * LATLON_SCALE).astype(np.int32),
+            np.rint(np.asarray(alt) * ALT_SCALE).astype(np.int32),
+        )
+        count = len(cols[0])
+        self._index.append((norad, self._words, count))
+        for col in cols:
+            self._f.write(_delta(col).astype("<i4").tobytes())
+        self._words += 4 * count
+
+    def close(self):
+        index_offset = self._f.tell()
+        self._f.write(np.array(self._index, dtype=_INDEX).tobytes())
+        self._f.seek(0)
+        self._f.write(_HEADER.pack(MAGIC, VERSION, self.epoch_start, self.step_seconds, self.n_steps,
+                                   len(self._index), LATLON_SCALE, ALT_SCALE, index_offset))
+        self._f.close()
+        os.replace(self._tmp, self.path)
+        return {"file": os.path.basename(self.path), "format": FORMAT,
+                "epoch_start": self.epoch_start, "step_seconds": self.step_seconds,
+                "satellites": len(self._index)}
+
+
+# ============================================================
+# READER
+# ============================================================
+class PositionStore:
+    """Memory-mapped reader; only the slices you ask for are touched."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = _HEADER.unpack(f.read(_HEADER.size))
+        magic, version, self.epoch_start, self.step_seconds, self.n_steps, n_sats, \
+            self.latlon_scale, self.alt_scale, index_offset = header
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a {FORMAT} file")
+
+        self.index = np.memmap(path, dtype=_INDEX, mode="r", offset=index_offset, shape=(n_sats,))
+        n_words = (index_offset - _HEADER.size) // 4
+        self.data = np.memmap(path, dtype="<i4", mode="r", offset=_HEADER.size, shape=(n_words,))
+        self._rows = {int(n): i for i, n in enumerate(self.index["norad"])}
+
+    @property
+    def norads(self):
+        return list(self._rows)
+
+    def _columns(self, norad):
+        row = self.index[self._rows[norad]]
+        off, count = int(row["offset"]), int(row["count"])
+        return [np.cumsum(self.data[off + k * count: off + (k + 1) * count], dtype=np.int64) for k in range(4)]
+
+    def satellite(self, norad):
+        """Dict of epoch (s), lat, lon (deg), alt (km) arrays for one satellite."""
+        steps, lat, lon, alt = self._columns(norad)
+        return {
+            "epoch": self.epoch_start + steps * self.step_seconds,
+            "lat": lat / self.latlon_scale,
+            "lon": lon / self.latlon_scale,
+            "alt": alt / self.alt_scale,
+        }
+
+    def time_range(self, norad, t0, t1):
+        """Points of one satellite with t0 <= epoch <= t1 (Unix seconds)."""
+        sat = self.satellite(norad)
+        lo, hi = np.searchsorted(sat["epoch"], [t0, t1 + 1e-9])
+        return {k: v[lo:hi] for k, v in sat.items()}
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        sys.exit(__doc__[__doc__.index("Usage:"):].rstrip())
+
+    store = PositionStore(sys.argv[1])
+    print(f"  {FORMAT}: {len(store.norads)} satellites, {store.n_steps} steps "
+          f"of {store.step_seconds:g}s from epoch {store.epoch_start}")
+    if len(sys.argv) > 2:
+        sat = store.satellite(int(sys.argv[2]))
+        for t, la, lo, al in zip(sat["epoch"], sat["lat"], sat["lon"], sat["alt"]):
+            print(f"  {t:.0f}  {la:9.4f} {lo:9.4f} {al:9.1f}")
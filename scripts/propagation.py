@@ -0,0 +1,196 @@
+"""
+Orbital TrIP — Batched SGP4 Propagation Engine
+Loads a whole catalog into an sgp4 SatrecArray and evaluates a shared
+Julian-date grid in one vectorized call, instead of one sat.sgp4()
+call per satellite per timestep.
+
+Usage:
+    python3 propagation.py            # correctness check vs scalar path
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from sgp4.api import Satrec, SatrecArray, WGS72, jday
+from ephemeris_cache import cache_key
+from frames import teme_to_geodetic
+
+MODEL = "SGP4/WGS72"
+
+
+# ============================================================
+# TIME GRID
+# ============================================================
+def time_grid(end, hours, interval):
+    """
+    Build the propagation grid ending at `end` (UTC datetime).
+    Returns (jd, fr, timestamps, epochs) with jd/fr as float64 arrays
+    split the way sgp4 expects, plus ISO timestamps and Unix epoch
+    seconds for each step.
+    """
+    start = end - timedelta(hours=hours)
+    steps = int(hours * 60 / interval) + 1
+
+    jd0, fr0 = jday(start.year, start.month, start.day,
+                    start.hour, start.minute, start.second + start.microsecond / 1e6)
+    fr = fr0 + np.arange(steps, dtype=np.float64) * (interval / 1440.0)
+    whole = np.floor(fr)
+    jd = np.full(steps, jd0, dtype=np.float64) + whole
+    fr = fr - whole
+
+    times = [start + timedelta(minutes=i * interval) for i in range(steps)]
+    return jd, fr, [t.isoformat() for t in times], [int(t.timestamp()) for t in times]
+
+
+# ============================================================
+# CATALOG LOADING
+# ============================================================
+def parse_tles(tles):
+    """
+    Parse (name, tle1, tle2) triples into Satrec objects.
+    Returns (sats, names, failed) where `failed` maps name -> error
+    string for TLEs that could not be parsed.
+    """
+    sats, names, failed = [], [], {}
+    for name, tle1, tle2 in tles:
+        try:
+            sat = Satrec.twoline2rv(tle1, tle2, WGS72)
+        except Exception as e:
+            failed[name] = str(e)
+            continue
+        if sat.error != 0:
+            failed[name] = f"sgp4 init error {sat.error}"
+            continue
+        sats.append(sat)
+        names.append(name)
+    return sats, names, failed
+
+
+def load_satrec_array(tles):
+    """Like parse_tles, but returns (SatrecArray or None, names, failed)."""
+    sats, names, failed = parse_tles(tles)
+    return (SatrecArray(sats) if sats else None), names, failed
+
+
+# ============================================================
+# BATCH PROPAGATION
+# ============================================================
+def propagate_catalog(tles, end, hours, interval, cache=None):
+    """
+    Propagate every (name, tle1, tle2) over the same grid in one call.
+    With an EphemerisCache, satellites whose (TLE, window) was already
+    propagated are loaded from disk and only the misses go through SGP4.
+
+    Returns a dict with:
+        names       satellite names in array order
+        failed      name -> parse error for TLEs that were dropped
+        jd, fr      (N_steps,) Julian date grid
+        timestamps  ISO timestamp per step
+        epochs      Unix epoch seconds per step
+        r, v        (N_sats, N_steps, 3) TEME position (km) / velocity (km/s)
+        e           (N_sats, N_steps) sgp4 error codes (0 = ok)
+    """
+    jd, fr, timestamps, epochs = time_grid(end, hours, interval)
+    grid = {"jd": jd, "fr": fr, "timestamps": timestamps, "epochs": epochs}
+
+    cached, keys, misses = {}, {}, tles
+    if cache is not None:
+        misses = []
+        for name, tle1, tle2 in tles:
+            key = cache_key(tle1, tle2, MODEL, timestamps[0], hours, interval)
+            hit = cache.get(key)
+            if hit is None:
+                keys[name] = key
+                misses.append((name, tle1, tle2))
+            else:
+                cached[name] = hit
+
+    sat_array, names, failed = load_satrec_array(misses)
+    if sat_array is not None:
+        e, r, v = sat_array.sgp4(jd, fr)
+    else:
+        r = v = np.empty((0, len(jd), 3))
+        e = np.empty((0, len(jd)), dtype=np.uint8)
+
+    if cache is not None:
+        for i, name in enumerate(names):
+            cache.put(keys[name], r[i], v[i], e[i])
+    if not cached:
+        return dict(grid, names=names, failed=failed, r=r, v=v, e=e)
+
+    # Merge cache hits and fresh results back into catalog order
+    fresh = {name: i for i, name in enumerate(names)}
+    order = [name for name, _, _ in tles if name in cached or name in fresh]
+    rows = [cached[n] if n in cached else (r[fresh[n]], v[fresh[n]], e[fresh[n]]) for n in order]
+    return dict(grid, names=order, failed=failed,
+                r=np.stack([x[0] for x in rows]), v=np.stack([x[1] for x in rows]),
+                e=np.stack([x[2] for x in rows]))
+
+
+# ============================================================
+# GEODETIC OUTPUT
+# ============================================================
+def geodetic_from_batch(batch):
+    """(N_sats, N_steps) lat, lon (deg, 4 dp) and alt (km, 1 dp) arrays."""
+    lat, lon, alt = teme_to_geodetic(batch["r"], batch["jd"], batch["fr"])
+    return np.round(lat, 4), np.round(lon, 4), np.round(alt, 1)
+
+
+def positions_from_batch(batch, geodetic=None):
+    """
+    Yield (name, positions) with WGS84 geodetic positions in the same
+    list-of-dicts shape `propagate_satellite` returns; steps with sgp4
+    errors are dropped. `geodetic` reuses arrays from geodetic_from_batch.
+    """
+    lat, lon, alt = geodetic if geodetic is not None else geodetic_from_batch(batch)
+    timestamps, epochs = batch["timestamps"], batch["epochs"]
+
+    for i, name in enumerate(batch["names"]):
+        ok = batch["e"][i] == 0
+        positions = [
+            {"ts": timestamps[j], "epoch": epochs[j], "lat": la, "lon": lo, "alt": al}
+            for j, la, lo, al in zip(np.flatnonzero(ok).tolist(), lat[i, ok].tolist(),
+                                     lon[i, ok].tolist(), alt[i, ok].tolist())
+        ]
+        yield name, positions
+
+
+# ============================================================
+# CORRECTNESS CHECK
+# ============================================================
+def check_against_scalar(catalog, end, hours, interval, tol_deg=1e-3, tol_km=0.2):
+    """
+    Compare batched propagation against the scalar per-step path.
+    Returns a list of (name, reason) mismatches; empty means agreement.
+    """
+    from orbital_trip_pipeline_v2 import propagate_satellite
+
+    tles = [(n, d["tle1"], d["tle2"]) for n, d in catalog.items() if d.get("tle1") and d.get("tle2")]
+    batch = propagate_catalog(tles, end, hours, interval)
+    mismatches = []
+
+    for name, positions in positions_from_batch(batch):
+        d = catalog[name]
+        scalar = propagate_satellite(d["tle1"], d["tle2"], hours, interval)
+        if len(scalar) != len(positions):
+            mismatches.append((name, f"length {len(positions)} != {len(scalar)}"))
+            continue
+        for a, b in zip(positions, scalar):
+            dlon = abs((a["lon"] - b["lon"] + 180) % 360 - 180)
+            if (a["ts"] != b["ts"] or a["epoch"] != b["epoch"] or abs(a["lat"] - b["lat"]) > tol_deg
+                    or dlon > tol_deg or abs(a["alt"] - b["alt"]) > tol_km):
+                mismatches.append((name, f"{a} != {b}"))
+                break
+
+    return mismatches
+
+
+if __name__ == "__main__":
+    from satellite_catalog import get_full_catalog
+    from orbital_trip_pipeline_v2 import PROPAGATION_END, PROPAGATION_HOURS, INTERVAL_MINUTES
+
+    catalog = get_full_catalog()
+    bad = check_against_scalar(catalog, PROPAGATION_END, PROPAGATION_HOURS, INTERVAL_MINUTES)
+    for name, reason in bad:
+        print(f"  [MISMATCH] {name}: {reason}")
+    print(f"  ✓ {len(catalog) - len(bad)}/{len(catalog)} satellites match scalar SGP4 path")
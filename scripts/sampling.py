@@ -0,0 +1,233 @@
+"""
+Orbital TrIP — Regime-Aware and Adaptive Sampling
+Chooses how often each object is sampled, so propagation, hashing and
+signing go where the trajectory needs them instead of one 30-minute grid
+for every orbit.
+
+Modes:
+    fixed     every object on the pipeline's INTERVAL_MINUTES grid (legacy)
+    regime    fixed interval per orbital regime (REGIME_INTERVALS)
+    adaptive  start at MAX_INTERVAL and bisect wherever cubic Hermite
+              interpolation from the neighbouring samples (TEME position +
+              velocity) misses the true midpoint by more than tol_km
+
+All sample times sit on a LATTICE_S lattice from the window start, so
+every mode stays compatible with the trip-pos/1 store and with ISO
+timestamps on whole minutes. Objects sharing a fixed interval are
+propagated together through SatrecArray; adaptive objects are refined
+one Satrec at a time (all midpoints of a pass in one sgp4_array call)
+and returned on the union of their sample times, with error code
+NOT_SAMPLED where an object has no sample.
+
+Usage:
+    python3 sampling.py     # samples vs interpolation error per mode
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from propagation import time_grid, parse_tles, propagate_catalog
+
+SAMPLING_MODES = ("fixed", "regime", "adaptive")
+LATTICE_S = 60
+REGIME_INTERVALS = {"LEO": 10, "MEO": 30, "GEO": 60, "HEO": 15}    # minutes
+ADAPTIVE_TOL_KM = 5.0
+MAX_INTERVAL = 160      # minutes, adaptive starting grid (halves to 80, 40, 20, 10 ...)
+ADAPTIVE_CHUNK = 128    # objects per adaptive batch (union grids are wide)
+NOT_SAMPLED = 255       # batch error code: no sample for this object here
+
+SamplingPolicy = namedtuple("SamplingPolicy", "name interval adaptive tol_km")
+
+
+def policy_for(regime, mode, interval, tol_km=ADAPTIVE_TOL_KM):
+    """SamplingPolicy for an object of `regime` under `mode`."""
+    if mode == "fixed":
+        return SamplingPolicy("fixed", interval, False, None)
+    if mode == "regime":
+        minutes = REGIME_INTERVALS.get(regime, interval)
+        return SamplingPolicy(regime or "fixed", minutes, False, None)
+    if mode == "adaptive":
+        return SamplingPolicy("adaptive", MAX_INTERVAL, True, tol_km)
+    raise ValueError(f"unknown sampling mode {mode!r}")
+
+
+# ============================================================
+# ADAPTIVE REFINEMENT
+# ============================================================
+def hermite(ra, va, rb, vb, h, s):
+    """Cubic Hermite position at fraction s of an interval of h seconds."""
+    s2, s3 = s * s, s * s * s
+    return ((2 * s3 - 3 * s2 + 1) * ra + (s3 - 2 * s2 + s) * h * va
+            + (-2 * s3 + 3 * s2) * rb + (s3 - s2) * h * vb)
+
+
+def adaptive_steps(sat, jd, fr, tol_km, max_steps):
+    """
+    Lattice step indices for one Satrec over the lattice (jd, fr) so that
+    the Hermite midpoint of every kept interval is within tol_km.
+    Returns (steps, r, v, e) sorted by step.
+    """
+    n = len(jd)
+    steps = np.unique(np.append(np.arange(0, n, max_steps), n - 1))
+    e, r, v = sat.sgp4_array(jd[steps], fr[steps])
+    pending = np.arange(len(steps) - 1)  # intervals (steps[i], steps[i+1]) still to test
+
+    while len(pending):
+        a, b = steps[pending], steps[pending + 1]
+        split = (b - a > 1) & (e[pending] == 0) & (e[pending + 1] == 0)
+        pending, a, b = pending[split], a[split], b[split]
+        if not len(pending):
+            break
+        mid = (a + b) // 2
+        em, rm, vm = sat.sgp4_array(jd[mid], fr[mid])
+        guess = hermite(r[pending], v[pending], r[pending + 1], v[pending + 1],
+                        ((b - a) * LATTICE_S)[:, None], ((mid - a) / (b - a))[:, None])
+        bad = (np.linalg.norm(guess - rm, axis=1) > tol_km) | (em != 0)
+        if not bad.any():
+            break
+
+        # Insert the failing midpoints; both halves are re-tested next pass
+        at = pending[bad] + 1
+        steps = np.insert(steps, at, mid[bad])
+        e = np.insert(e, at, em[bad])
+        r = np.insert(r, at, rm[bad], axis=0)
+        v = np.insert(v, at, vm[bad], axis=0)
+        new_pos = at + np.arange(len(at))      # indices of inserted samples after insertion
+        pending = np.sort(np.concatenate([new_pos - 1, new_pos]))
+    return steps, r, v, e
+
+
+def propagate_adaptive(tles, end, hours, tol_km=ADAPTIVE_TOL_KM, max_interval=MAX_INTERVAL):
+    """
+    Adaptive counterpart of propagation.propagate_catalog: same batch dict,
+    on the union of the objects' sample times, plus "steps" (name -> lattice
+    indices) recording each object's sampling. Steps where SGP4 failed are
+    left out of "steps", as positions_from_batch leaves them out of "p".
+    """
+    jd, fr, timestamps, epochs = time_grid(end, hours, LATTICE_S / 60)
+    sats, names, failed = parse_tles(tles)
+    per_sat = [adaptive_steps(sat, jd, fr, tol_km, max(1, int(max_interval * 60 // LATTICE_S)))
+               for sat in sats]
+
+    union = np.unique(np.concatenate([s[0] for s in per_sat])) if per_sat else np.empty(0, dtype=int)
+    col = np.searchsorted(union, np.arange(len(jd)))
+    r = np.zeros((len(sats), len(union), 3))
+    v = np.zeros((len(sats), len(union), 3))
+    e = np.full((len(sats), len(union)), NOT_SAMPLED, dtype=np.uint8)
+    for i, (steps, ri, vi, ei) in enumerate(per_sat):
+        c = col[steps]
+        r[i, c], v[i, c], e[i, c] = ri, vi, ei
+
+    return {
+        "jd": jd[union], "fr": fr[union],
+        "timestamps": [timestamps[k] for k in union.tolist()],
+        "epochs": [epochs[k] for k in union.tolist()],
+        "names": names, "failed": failed, "r": r, "v": v, "e": e,
+        "steps": {name: steps[ei == 0].tolist() for name, (steps, _, _, ei) in zip(names, per_sat)},
+    }
+
+
+# ============================================================
+# BATCHING
+# ============================================================
+def batch_plan(tles, policies, chunk=1024):
+    """
+    [(policy, part)] for (name, tle1, tle2) triples grouped by their policy
+    in `policies` (name -> SamplingPolicy), in first-seen order, each part
+    one propagation batch.
+    """
+    groups = {}
+    for tle in tles:
+        groups.setdefault(policies[tle[0]], []).append(tle)
+
+    plan = []
+    for policy, group in groups.items():
+        size = ADAPTIVE_CHUNK if policy.adaptive else chunk
+        plan += [(policy, group[i:i + size]) for i in range(0, len(group), size)]
+    return plan
+
+
+def propagate_part(policy, part, end, hours, cache=None):
+    """The batch dict for one batch_plan() part."""
+    if policy.adaptive:
+        return propagate_adaptive(part, end, hours, policy.tol_km, policy.interval)
+    return propagate_catalog(part, end, hours, policy.interval, cache)
+
+
+def sampled_batches(tles, policies, end, hours, cache=None, chunk=1024):
+    """Yield (policy, batch) for every batch_plan() part, propagated one at a time."""
+    for policy, part in batch_plan(tles, policies, chunk):
+        yield policy, propagate_part(policy, part, end, hours, cache)
+
+
+def sampling_entry(policy, steps=None):
+    """
+    Per-object sampling block for its output entry: the policy name and,
+    for adaptive objects, the lattice step index of every position in "p".
+    None in fixed mode, where every object shares the header's interval.
+    """
+    if policy.name == "fixed":
+        return None
+    block = {"policy": policy.name}
+    if policy.adaptive:
+        block["steps"] = list(steps)
+    return block
+
+
+def sampling_header(mode, policies, counts):
+    """
+    Output header block: lattice and the policies in use, each with its
+    object count (`counts`: policy name -> objects written). Per-object
+    policies and adaptive step indices live in the entries (sampling_entry).
+    """
+    used = {p.name: {"max_interval_minutes": p.interval, "tol_km": p.tol_km} if p.adaptive
+            else {"interval_minutes": p.interval} for p in policies.values()}
+    for name, policy in used.items():
+        policy["objects"] = counts.get(name, 0)
+    return {"mode": mode, "lattice_s": LATTICE_S, "policies": used}
+
+
+if __name__ == "__main__":
+    import time
+    from sgp4.api import Satrec, WGS72
+    from satellite_catalog import get_catalog_index
+    from orbital_trip_pipeline_v2 import PROPAGATION_END, PROPAGATION_HOURS, INTERVAL_MINUTES
+
+    index = get_catalog_index()
+    tles = [(n, r.tle1, r.tle2) for n, r in index.items() if r.tle1]
+    jd, fr, _, _ = time_grid(PROPAGATION_END, PROPAGATION_HOURS, LATTICE_S / 60)
+
+    def worst_error(sat, steps):
+        """Max Hermite interpolation error (km) between kept samples, checked on the full lattice."""
+        e, truth, _ = sat.sgp4_array(jd, fr)
+        _, r, v = sat.sgp4_array(jd[steps], fr[steps])
+        k = np.clip(np.searchsorted(steps, np.arange(len(jd)), side="right") - 1, 0, len(steps) - 2)
+        span = steps[k + 1] - steps[k]
+        guess = hermite(r[k], v[k], r[k + 1], v[k + 1], (span * LATTICE_S)[:, None],
+                        ((np.arange(len(jd)) - steps[k]) / span)[:, None])
+        ok = e == 0
+        return float(np.linalg.norm(guess - truth, axis=1)[ok].max()) if ok.any() else 0.0
+
+    print(f"\n  {'mode':9} {'samples':>8} {'worst LEO':>10} {'worst GEO':>10} {'worst HEO':>10}  time")
+    for mode in SAMPLING_MODES:
+        policies = {n: policy_for(index[n].regime, mode, INTERVAL_MINUTES) for n, _, _ in tles}
+        t0 = time.perf_counter()
+        batches = list(sampled_batches(tles, policies, PROPAGATION_END, PROPAGATION_HOURS))
+        elapsed = time.perf_counter() - t0
+
+        samples, worst = 0, {}
+        for policy, batch in batches:
+            for i, name in enumerate(batch["names"]):
+                ok = batch["e"][i] != NOT_SAMPLED
+                samples += int(ok.sum())
+                if policy.adaptive:
+                    steps = np.array(batch["steps"][name])
+                else:
+                    steps = np.arange(ok.sum()) * int(policy.interval * 60 // LATTICE_S)
+                sat = Satrec.twoline2rv(index[name].tle1, index[name].tle2, WGS72)
+                regime = index[name].regime
+                worst[regime] = max(worst.get(regime, 0.0), worst_error(sat, steps))
+        print(f"  {mode:9} {samples:8d} {worst['LEO']:7.2f} km {worst['GEO']:7.2f} km {worst['HEO']:7.2f} km"
+              f"  {elapsed:.2f}s")
+    print("  (worst = max cubic Hermite error between samples, km, checked every 60 s)\n")
@@ -465,14 +465,14 @@ def get_full_catalog():
         full[name] = entry
     return full
 
+def get_catalog_index():
+    """The merged catalog as a CatalogIndex (NORAD / category / operator / regime lookups)."""
+    from catalog_index import CatalogIndex
+    return CatalogIndex(get_full_catalog().items())
+
 if __name__ == "__main__":
-    cat = get_full_catalog()
-    print(f"Total catalog: {len(cat)} satellites")
-    stories = [n for n, d in cat.items() if d.get("is_story")]
-    print(f"Story satellites: {len(stories)}")
-    cats = {}
-    for n, d in cat.items():
-        c = d.get("category", "Unknown")
-        cats[c] = cats.get(c, 0) + 1
-    for c, count in sorted(cats.items(), key=lambda x: -x[1]):
+    index = get_catalog_index()
+    print(f"Total catalog: {len(index)} satellites")
+    print(f"Story satellites: {len(STORY_SATELLITES)}")
+    for c, count in sorted(index.counts("category").items(), key=lambda x: -x[1]):
         print(f"  {c}: {count}")
@@ -0,0 +1,254 @@
+"""
+Orbital TrIP — Vectorized, Incremental Trust Scoring
+Scores a whole propagated chunk at once from the (N_sats, N_steps)
+geodetic arrays instead of one Python pass per satellite, with category
+behaviour read from CATEGORY_TABLE rather than an if/elif chain.
+
+Trajectory statistics live in Welford accumulators (n, mean, M2 of
+altitude, max |lat|, last and first epoch) per object. New samples are
+folded in with Chan's parallel update, so extending a chain by a few
+breadcrumbs costs only those breadcrumbs however long the history is.
+Accumulators persist per NORAD ID in <state_dir>/scores.json.
+
+Components (max points):
+    consistency    35  altitude scatter (and latitude excursion) vs category
+    compliance     25  category baseline, minus close-approach penalty
+    maturity       20  time covered, in 30-minute breadcrumb equivalents
+                       (~150 to max out), so sparse or adaptive sampling
+                       is not penalized for signing fewer breadcrumbs
+    corroboration  10  category baseline, or with ground-station passes
+                       (passes.py) how many stations see the object and
+                       for how much of the window
+    integrity      10  from chain verification, added by finalize_score()
+
+Usage:
+    python3 scoring.py      # vectorized vs scalar check + incremental timing
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from keystore import _load_json, _write_json_atomic
+
+CONJUNCTION_MAX_PENALTY = 6  # compliance points
+MANEUVER_PENALTY = 5         # consistency points per detected maneuver
+MANEUVER_MAX_PENALTY = 15
+MATURITY_INTERVAL_S = 1800   # one maturity "breadcrumb" per 30 minutes covered
+OBSERVED_STATIONS = 4        # distinct stations for full station corroboration
+OBSERVED_COVER = 0.25        # fraction of the window in view for full coverage corroboration
+
+# consistency = fixed if set, else max(0, base - max|lat| * lat_factor - alt_std / alt_div)
+Category = namedtuple("Category", "base alt_div lat_factor fixed compliance corroboration")
+
+CATEGORY_TABLE = {
+    "GEO Comms":            Category(35, 2, 0, None, 24, 8),
+    "GEO Weather":          Category(35, 2, 0, None, 24, 8),
+    "Suspicious":           Category(35, 2, 3, None, 4, 7),   # Luch: inclination anomaly
+    "Catastrophic Failure": Category(0, 1, 0, 5, 2, 6),       # broken satellite
+    "Deorbited":            Category(0, 1, 0, 25, 22, 6),     # was consistent before deorbit
+    "Debris":               Category(35, 5, 0, None, 0, 3),
+    "Navigation":           Category(35, 10, 0, None, 23, 8),
+    "Station":              Category(33, 3, 0, None, 21, 9),
+    "Science":              Category(32, 5, 0, None, 21, 8),
+    "Earth Obs":            Category(33, 5, 0, None, 20, 7),
+    "LEO Constellation":    Category(33, 5, 0, None, 18, 7),
+    "CubeSat":              Category(33, 5, 0, None, 16, 5),
+    "Military":             Category(33, 5, 0, None, 15, 4),
+}
+DEFAULT_CATEGORY = Category(33, 5, 0, None, 10, 5)
+
+TIERS = [(85, "Odysseus"), (70, "Voyager"), (50, "Pathfinder"), (30, "Explorer")]
+
+
+def tier_for(total):
+    for floor, tier in TIERS:
+        if total >= floor:
+            return tier
+    return "Seedling"
+
+
+# ============================================================
+# ACCUMULATORS
+# ============================================================
+class ScoreAccumulators:
+    """Column arrays of per-object Welford state for one chunk of the catalog."""
+
+    FIELDS = ("n", "mean", "m2", "max_lat", "last", "first")
+
+    def __init__(self, count, states=None):
+        self.n = np.zeros(count)
+        self.mean = np.zeros(count)
+        self.m2 = np.zeros(count)
+        self.max_lat = np.zeros(count)
+        self.last = np.full(count, -np.inf)
+        self.first = np.full(count, np.inf)
+        for i, state in enumerate(states or []):
+            if state is None:
+                continue
+            self.n[i], self.mean[i], self.m2[i], self.max_lat[i], self.last[i], self.first[i] = state
+
+    def state(self, i):
+        return [float(getattr(self, f)[i]) for f in self.FIELDS]
+
+    def update(self, alt, lat, valid, epochs):
+        """
+        Fold in samples of (N, T) alt/lat arrays where `valid` and newer
+        than each object's last absorbed epoch.
+        """
+        epochs = np.asarray(epochs, dtype=np.float64)
+        new = valid & (epochs[None, :] > self.last[:, None])
+        nb = new.sum(axis=1).astype(np.float64)
+        has = nb > 0
+
+        alt0 = np.where(new, alt, 0.0)
+        mean_b = np.divide(alt0.sum(axis=1), nb, out=np.zeros_like(nb), where=has)
+        m2_b = (np.where(new, alt - mean_b[:, None], 0.0) ** 2).sum(axis=1)
+
+        n = self.n + nb
+        delta = mean_b - self.mean
+        safe_n = np.where(n > 0, n, 1.0)
+        self.mean = np.where(has, self.mean + delta * nb / safe_n, self.mean)
+        self.m2 = np.where(has, self.m2 + m2_b + delta ** 2 * self.n * nb / safe_n, self.m2)
+        self.n = n
+        lat_b = np.where(new, np.abs(lat), 0.0).max(axis=1, initial=0.0)
+        self.max_lat = np.maximum(self.max_lat, lat_b)
+        last_b = np.where(new, epochs[None, :], -np.inf).max(axis=1, initial=-np.inf)
+        self.last = np.maximum(self.last, last_b)
+        first_b = np.where(new, epochs[None, :], np.inf).min(axis=1, initial=np.inf)
+        self.first = np.minimum(self.first, first_b)
+        return nb
+
+    def coverage(self, interval_s=MATURITY_INTERVAL_S):
+        """Time spanned by absorbed samples, as a count of interval_s-spaced samples."""
+        return np.where(self.n > 0, (self.last - self.first) / interval_s + 1, 0.0)
+
+    def std(self):
+        return np.sqrt(np.divide(self.m2, self.n, out=np.zeros_like(self.m2), where=self.n > 1))
+
+
+class ScoreStateStore:
+    """NORAD ID -> [n, mean, m2, max_lat, last, first], alongside chains.json."""
+
+    def __init__(self, state_dir):
+        self.path = os.path.join(state_dir, "scores.json")
+        self._states = _load_json(self.path)
+
+    def get(self, norad):
+        return self._states.get(str(norad))
+
+    def put(self, norad, state):
+        self._states[str(norad)] = state
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        _write_json_atomic(self.path, self._states)
+
+
+# ============================================================
+# SCORING
+# ============================================================
+def _conjunction_penalty(events):
+    penalty = sum(3 if c["miss_km"] < 1 else 1.5 if c["miss_km"] < 5 else 0.5 for c in events or ())
+    return min(penalty, CONJUNCTION_MAX_PENALTY)
+
+
+def observed_corroboration(observed):
+    """Corroboration from passes.observability() summaries (None: never observed)."""
+    stations = np.array([o["stations"] if o else 0 for o in observed], dtype=np.float64)
+    cover = np.array([o["cover"] if o else 0.0 for o in observed], dtype=np.float64)
+    return 10 * (0.6 * np.minimum(1, stations / OBSERVED_STATIONS) + 0.4 * np.minimum(1, cover / OBSERVED_COVER))
+
+
+def score_components(categories, acc, conjunctions=None, maneuvers=None, observed=None):
+    """
+    Consistency, compliance, maturity and corroboration arrays for every
+    object in `acc`. `conjunctions` / `maneuvers` are optional per-object
+    lists of screening and maneuver events; `observed` optional per-object
+    pass summaries, which replace the category corroboration baseline.
+    """
+    params = [CATEGORY_TABLE.get(c, DEFAULT_CATEGORY) for c in categories]
+    base, alt_div, lat_factor, compliance, corroboration = (
+        np.array([getattr(p, f) for p in params], dtype=np.float64)
+        for f in ("base", "alt_div", "lat_factor", "compliance", "corroboration"))
+    fixed = np.array([np.nan if p.fixed is None else p.fixed for p in params])
+
+    consistency = np.maximum(0, base - acc.max_lat * lat_factor - acc.std() / alt_div)
+    consistency = np.where(np.isnan(fixed), consistency, fixed)
+    consistency = np.where(acc.n > 0, consistency, 0.0)
+    if maneuvers is not None:
+        hits = np.array([len(m or ()) for m in maneuvers], dtype=np.float64)
+        consistency = np.maximum(0, consistency - np.minimum(hits * MANEUVER_PENALTY, MANEUVER_MAX_PENALTY))
+
+    if conjunctions is not None:
+        compliance = np.maximum(0, compliance - np.array([_conjunction_penalty(c) for c in conjunctions]))
+    if observed is not None:
+        corroboration = observed_corroboration(observed)
+
+    return {
+        "consistency": consistency,
+        "compliance": compliance,
+        "maturity": np.minimum(20, acc.coverage() / 7.5),
+        "corroboration": corroboration,
+    }
+
+
+def split_components(components):
+    """Column arrays -> one {component: float} dict per object."""
+    names = list(components)
+    return [dict(zip(names, row)) for row in zip(*(components[k].tolist() for k in names))]
+
+
+def finalize_score(components, integrity):
+    """Add the integrity component and assign the tier."""
+    total = round(components["consistency"] + components["compliance"] + components["maturity"]
+                  + components["corroboration"] + integrity, 1)
+    total = min(100, max(0, total))
+    return {
+        "total": total,
+        "tier": tier_for(total),
+        "components": {k: round(v, 1) for k, v in dict(components, integrity=integrity).items()},
+    }
+
+
+if __name__ == "__main__":
+    import time
+    from satellite_catalog import get_full_catalog
+    from propagation import propagate_catalog, geodetic_from_batch
+    from orbital_trip_pipeline_v2 import PROPAGATION_END, PROPAGATION_HOURS, INTERVAL_MINUTES
+
+    catalog = get_full_catalog()
+    tles = [(n, d["tle1"], d["tle2"]) for n, d in catalog.items() if d.get("tle1")]
+    batch = propagate_catalog(tles, PROPAGATION_END, PROPAGATION_HOURS, INTERVAL_MINUTES)
+    lat, _, alt = geodetic_from_batch(batch)
+    valid = batch["e"] == 0
+    cats = [catalog[n]["category"] for n in batch["names"]]
+
+    # Reference: plain two-pass mean/std per satellite over the same samples
+    acc = ScoreAccumulators(len(cats))
+    acc.update(alt, lat, valid, batch["epochs"])
+    comps = split_components(score_components(cats, acc))
+    worst = 0.0
+    for i, c in enumerate(comps):
+        a = alt[i, valid[i]].tolist()
+        mean = sum(a) / len(a)
+        std = (sum((x - mean) ** 2 for x in a) / len(a)) ** 0.5
+        worst = max(worst, abs(std - acc.std()[i]))
+    print(f"\n  Welford vs two-pass altitude std: max |diff| {worst:.2e} km over {len(cats)} objects")
+
+    # Same totals whether the window arrives at once or in slices
+    inc = ScoreAccumulators(len(cats))
+    for lo in range(0, alt.shape[1], 7):
+        inc.update(alt[:, lo:lo + 7], lat[:, lo:lo + 7], valid[:, lo:lo + 7], batch["epochs"][lo:lo + 7])
+    drift = np.abs(inc.std() - acc.std()).max()
+    print(f"  Incremental (7-step slices) vs one-shot std: max |diff| {drift:.2e} km")
+
+    # Cost of extending a 30k-object catalog by one step, whatever its history
+    n = 30_000
+    big = ScoreAccumulators(n, [[4000.0, 550.0, 1e4, 50.0, 0.0, -3999.0 * MATURITY_INTERVAL_S]] * n)
+    one = np.full((n, 1), 550.0)
+    t0 = time.perf_counter()
+    big.update(one, one * 0, np.ones((n, 1), bool), [1.0])
+    score_components(["LEO Constellation"] * n, big)
+    print(f"  30k objects, +1 step on a 4000-step history: {(time.perf_counter() - t0) * 1e3:.1f} ms\n")
@@ -0,0 +1,128 @@
+"""
+Orbital TrIP — Synthetic Catalog Generator
+Deterministic, checksum-valid element sets at any catalog size, for
+benchmarking the pipeline beyond the embedded list (up to and past the
+~30k-object public catalog).
+
+Mix (share of objects, regime as catalog_index.orbital_regime sees it):
+    LEO      55%  payloads, 350-1200 km, near-circular, any inclination
+    Debris   25%  LEO fragments, wider eccentricity and higher drag
+    MEO       8%  navigation shells, ~20,200 km at 55 deg
+    GEO       9%  comms / weather, station-kept (e < 0.0005, i < 0.1 deg)
+    HEO       3%  Molniya-like, e = 0.7 at 63.4 deg
+
+Elements are built with Satrec.sgp4init and written by sgp4's own TLE
+exporter, so every pair passes catalog_loader.tle_valid and propagates
+without error. Epochs are a few days before the pipeline window end.
+
+Usage:
+    python3 synthetic_catalog.py N OUT_DIR [--seed S]   # OUT_DIR/catalog.tle + overlay.json
+"""
+
+import json, math, os
+from datetime import datetime, timezone
+
+import numpy as np
+from sgp4.api import Satrec, WGS72
+from sgp4 import exporter
+
+MU = 398600.8          # km^3/s^2, WGS72 (the constants SGP4 runs with)
+EARTH_RADIUS = 6378.135
+FIRST_NORAD = 60000    # above the embedded catalog, clear of the real one for a while
+SGP4_EPOCH0 = datetime(1949, 12, 31, tzinfo=timezone.utc)
+
+# kind -> (share, categories)
+MIX = {
+    "LEO":    (0.55, ("LEO Constellation", "Earth Obs", "CubeSat", "Science", "Military")),
+    "Debris": (0.25, ("Debris",)),
+    "MEO":    (0.08, ("Navigation",)),
+    "GEO":    (0.09, ("GEO Comms", "GEO Weather")),
+    "HEO":    (0.03, ("Military",)),
+}
+
+
+def _mean_motion(a_km):
+    """Kozai mean motion, rad/min, for semi-major axis a_km."""
+    return math.sqrt(MU / a_km ** 3) * 60.0
+
+
+def _elements(kind, rng):
+    """(ecc, incl, mean motion rad/min, bstar) for one object of `kind`."""
+    if kind == "LEO":
+        alt = rng.uniform(350, 1200)
+        return rng.uniform(0, 0.003), rng.uniform(0, 100), _mean_motion(EARTH_RADIUS + alt), rng.uniform(1e-5, 3e-4)
+    if kind == "Debris":
+        alt = rng.uniform(400, 1500)
+        return rng.uniform(0, 0.03), rng.uniform(0, 110), _mean_motion(EARTH_RADIUS + alt), rng.uniform(1e-4, 2e-3)
+    if kind == "MEO":
+        return rng.uniform(0, 0.015), rng.normal(55, 1), _mean_motion(26560 + rng.uniform(-50, 50)), 0.0
+    if kind == "GEO":
+        return rng.uniform(0, 0.0005), rng.uniform(0, 0.1), _mean_motion(42164.2 + rng.uniform(-5, 5)), 0.0
+    return 0.7, 63.4, _mean_motion(26560 + rng.uniform(-100, 100)), rng.uniform(0, 1e-4)
+
+
+def synthetic_catalog(count, seed=0, epoch=datetime(2025, 2, 6, tzinfo=timezone.utc)):
+    """
+    Yield `count` (name, entry) pairs in the shape get_full_catalog()
+    produces. Same count and seed, same catalog.
+    """
+    if FIRST_NORAD + count > 100000:
+        raise ValueError(f"at most {100000 - FIRST_NORAD} synthetic objects (5-digit NORAD IDs)")
+    rng = np.random.default_rng(seed)
+    kinds = list(MIX)
+    picks = rng.choice(len(kinds), size=count, p=[MIX[k][0] for k in kinds])
+    year = epoch.year % 100
+
+    for i, pick in enumerate(picks.tolist()):
+        kind = kinds[pick]
+        norad = FIRST_NORAD + i
+        ecc, incl, no_kozai, bstar = _elements(kind, rng)
+        sat = Satrec()
+        sat.sgp4init(
+            WGS72, "i", norad,
+            (epoch - SGP4_EPOCH0).total_seconds() / 86400.0 + rng.uniform(0, 2),
+            bstar, 0.0, 0.0, ecc,
+            math.radians(rng.uniform(0, 360)),   # argument of perigee
+            math.radians(incl),
+            math.radians(rng.uniform(0, 360)),   # mean anomaly
+            no_kozai,
+            math.radians(rng.uniform(0, 360)),   # RAAN
+        )
+        sat.intldesg = f"{year:02d}{1 + i // 26 % 999:03d}{chr(65 + i % 26)}"
+        tle1, tle2 = exporter.export_tle(sat)
+
+        categories = MIX[kind][1]
+        yield f"SYN-{kind.upper()} {norad}", {
+            "norad": norad,
+            "cospar": f"{epoch.year}-{sat.intldesg[2:]}",
+            "operator": "Synthetic",
+            "category": categories[i % len(categories)],
+            "tle1": tle1,
+            "tle2": tle2,
+        }
+
+
+def write_synthetic(count, out_dir, seed=0):
+    """Write a synthetic catalog as OUT_DIR/catalog.tle + overlay.json (see catalog_loader)."""
+    os.makedirs(out_dir, exist_ok=True)
+    overlay = {}
+    with open(os.path.join(out_dir, "catalog.tle"), "w") as f:
+        for name, entry in synthetic_catalog(count, seed):
+            f.write(f"0 {name}\n{entry['tle1']}\n{entry['tle2']}\n")
+            overlay[str(entry["norad"])] = {"name": name, "category": entry["category"],
+                                            "operator": entry["operator"], "cospar": entry["cospar"]}
+    with open(os.path.join(out_dir, "overlay.json"), "w") as f:
+        json.dump(overlay, f, indent=1)
+    return len(overlay)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a synthetic TLE catalog + overlay")
+    parser.add_argument("count", type=int)
+    parser.add_argument("out_dir")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    n = write_synthetic(args.count, args.out_dir, args.seed)
+    print(f"  Wrote {n} synthetic satellites to {args.out_dir}/catalog.tle + overlay.json")
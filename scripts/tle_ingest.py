@@ -0,0 +1,451 @@
+"""
+Orbital TrIP — Async TLE Ingestion
+Fetches live element sets from the CelesTrak GP API (or any server
+speaking the same query interface) instead of the TLEs embedded in
+satellite_catalog.py, and hands them to the pipeline through
+catalog_loader.CatalogLoader.
+
+    * bounded concurrency: at most `concurrency` requests in flight
+    * keep-alive pooling: one pool of HTTP/1.1 connections per host,
+      reused across requests (stdlib asyncio streams, no extra dependency)
+    * conditional requests: ETag / Last-Modified from the previous
+      response are sent back as If-None-Match / If-Modified-Since, and a
+      304 reuses the cached body, so a refresh only downloads what changed
+    * retries: connection errors, timeouts, 429 and 5xx are retried with
+      jittered exponential backoff (Retry-After honoured)
+    * on-disk response cache: <cache_dir>/<key>.tle bodies plus index.json
+      validators; responses younger than `min_refresh_s` are not re-requested
+    * deadline: each request has a timeout and the whole fetch a deadline;
+      whatever is still pending is cancelled and falls back to its cached
+      body, so a slow upstream cannot stall the run
+
+Objects that could not be fetched at all keep their embedded TLE: the
+embedded catalog is exported next to the cache and loaded with it, and
+CatalogLoader keeps the newest epoch per NORAD ID.
+
+Usage:
+    python3 tle_ingest.py [--url URL] [--group NAME] [--cache-dir DIR]   # fetch + summary
+    python3 tle_ingest.py --stub                                         # run against a local stub server
+"""
+
+import asyncio, gzip, hashlib, os, random, ssl, time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from catalog_loader import CatalogLoader, export_embedded
+from keystore import _load_json, _write_json_atomic
+from output_writer import _write_atomic
+
+CELESTRAK_GP = "https://celestrak.org/NORAD/elements/gp.php"
+INGEST_CACHE_DIR = ".trip_tle"
+CONCURRENCY = 8
+TIMEOUT_S = 15.0        # per request, connect to last body byte
+DEADLINE_S = 120.0      # whole fetch; pending requests fall back to the cache
+RETRIES = 3
+BACKOFF_S = 0.5         # first retry delay, doubled per attempt (+/- 50% jitter)
+MIN_REFRESH_S = 7200    # CelesTrak updates GP data about every 2 h
+MAX_REDIRECTS = 5
+USER_AGENT = "orbital-trip-ingest/1"
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class HttpError(Exception):
+    """A response that is neither usable nor worth retrying."""
+
+
+# ============================================================
+# HTTP/1.1 CONNECTION POOL
+# ============================================================
+class HttpPool:
+    """
+    Minimal keep-alive HTTP/1.1 GET client over asyncio streams. Idle
+    connections are kept per (scheme, host, port) and reused; `connections`
+    counts how many were ever opened.
+    """
+
+    def __init__(self, max_idle=CONCURRENCY, timeout=TIMEOUT_S):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.connections = 0
+        self._idle = {}
+        self._ssl = ssl.create_default_context()
+
+    async def _connect(self, scheme, host, port):
+        self.connections += 1
+        return await asyncio.open_connection(host, port, ssl=self._ssl if scheme == "https" else None)
+
+    async def get(self, url, headers=None):
+        """(status, headers with lower-case names, body bytes) for one GET."""
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        lines = [f"GET {target} HTTP/1.1", f"Host: {parts.netloc}", f"User-Agent: {USER_AGENT}",
+                 "Accept-Encoding: gzip", "Connection: keep-alive"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        idle = self._idle.setdefault(key, [])
+        while idle:
+            reader, writer = idle.pop()
+            if writer.is_closing() or reader.at_eof():
+                writer.close()
+                continue
+            try:
+                # A pooled connection the server already dropped fails on first
+                # use; that is not the upstream's fault, so retry on a fresh one
+                return await asyncio.wait_for(self._exchange(key, reader, writer, request), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+        return await asyncio.wait_for(self._fresh(key, request), self.timeout)
+
+    async def _fresh(self, key, request):
+        reader, writer = await self._connect(*key)
+        return await self._exchange(key, reader, writer, request)
+
+    async def _exchange(self, key, reader, writer, request):
+        try:
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("connection closed before response")
+            version, status = status_line.decode("latin-1").split(None, 2)[:2]
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+
+            status = int(status)
+            if status in (204, 304) or 100 <= status < 200:
+                body = b""
+            elif headers.get("transfer-encoding", "").lower() == "chunked":
+                body = await _read_chunked(reader)
+            elif "content-length" in headers:
+                body = await reader.readexactly(int(headers["content-length"]))
+            else:
+                body = await reader.read()
+                headers["connection"] = "close"
+        except BaseException:
+            writer.close()
+            raise
+
+        if headers.get("content-encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        reusable = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        idle = self._idle.setdefault(key, [])
+        if reusable and len(idle) < self.max_idle:
+            idle.append((reader, writer))
+        else:
+            writer.close()
+        return status, headers, body
+
+    def close(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+
+
+async def _read_chunked(reader):
+    body = bytearray()
+    while True:
+        size = int((await reader.readline()).split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # trailers
+            return bytes(body)
+        body += await reader.readexactly(size)
+        await reader.readexactly(2)
+
+
+def _retry_after(headers):
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+
+# ============================================================
+# RESPONSE CACHE + INGESTOR
+# ============================================================
+class TleIngestor:
+    """
+    Fetches GP queries (dicts of query parameters, e.g. {"CATNR": 25544})
+    into the response cache and reports, per query, the cached body's path
+    and how it was obtained:
+
+        fresh         cached within min_refresh_s, not requested
+        modified      200, body downloaded
+        not_modified  304, cached body reused
+        stale         request failed or timed out, older cached body used
+        failed        request failed and nothing is cached
+    """
+
+    def __init__(self, base_url=CELESTRAK_GP, cache_dir=INGEST_CACHE_DIR, concurrency=CONCURRENCY,
+                 timeout=TIMEOUT_S, deadline=DEADLINE_S, retries=RETRIES, backoff=BACKOFF_S,
+                 min_refresh_s=MIN_REFRESH_S):
+        self.base_url = base_url
+        self.cache_dir = cache_dir
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.min_refresh_s = min_refresh_s
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.index = _load_json(self.index_path)
+        self.stats = {"requests": 0, "retries": 0, "bytes": 0, "connections": 0}
+
+    def url(self, query):
+        return f"{self.base_url}?{urlencode(dict(query, FORMAT='TLE'))}"
+
+    def _body_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest()[:24] + ".tle")
+
+    async def _request(self, pool, url, headers):
+        """GET with redirects and retries; returns (status, headers, body)."""
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt * (0.5 + random.random())
+            try:
+                target = url
+                for _ in range(MAX_REDIRECTS + 1):
+                    self.stats["requests"] += 1
+                    status, resp_headers, body = await pool.get(target, headers)
+                    if status not in (301, 302, 303, 307, 308):
+                        break
+                    target = urljoin(target, resp_headers["location"])
+                else:
+                    raise HttpError(f"too many redirects from {url}")
+                if status not in RETRY_STATUS:
+                    return status, resp_headers, body
+                err = HttpError(f"HTTP {status}")
+                retry_after = _retry_after(resp_headers)
+                delay = delay if retry_after is None else retry_after
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                err = e
+            if attempt == self.retries:
+                raise err
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    async def _fetch(self, pool, limit, url):
+        cached = self.index.get(url)
+        path = self._body_path(url)
+        if cached and not os.path.exists(path):
+            cached = None
+        if cached and time.time() - cached["fetched"] < self.min_refresh_s:
+            return url, "fresh", path
+
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with limit:
+            try:
+                status, resp_headers, body = await self._request(pool, url, headers)
+            except Exception as e:
+                print(f"  [WARN] {url}: {type(e).__name__}{f': {e}' if str(e) else ''}")
+                return url, "stale" if cached else "failed", path if cached else None
+
+        if status == 304 and cached:
+            cached["fetched"] = time.time()
+            return url, "not_modified", path
+        if status != 200:
+            print(f"  [WARN] {url}: HTTP {status}")
+            return url, "stale" if cached else "failed", path if cached else None
+
+        self.stats["bytes"] += len(body)
+        _write_atomic(path, body.decode("latin-1"))
+        self.index[url] = {"fetched": time.time(), "etag": resp_headers.get("etag"),
+                           "last_modified": resp_headers.get("last-modified")}
+        return url, "modified", path
+
+    async def fetch(self, queries):
+        """{url: (status, cached body path or None)} for every query, within the deadline."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        urls = list(dict.fromkeys(self.url(q) for q in queries))
+        pool = HttpPool(self.concurrency, self.timeout)
+        limit = asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.ensure_future(self._fetch(pool, limit, url)) for url in urls]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.deadline) if tasks else (set(), set())
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            pool.close()
+            self.stats["connections"] += pool.connections
+
+        results = {}
+        for url, task in zip(urls, tasks):
+            if task in done and not task.exception():
+                _, status, path = task.result()
+            else:
+                path = self._body_path(url) if url in self.index and os.path.exists(self._body_path(url)) else None
+                status = "stale" if path else "failed"
+            results[url] = (status, path)
+            self.stats[status] = self.stats.get(status, 0) + 1
+        _write_json_atomic(self.index_path, self.index)
+        return results
+
+    def fetch_sync(self, queries):
+        return asyncio.run(self.fetch(queries))
+
+
+# ============================================================
+# CATALOG SOURCE
+# ============================================================
+class LiveCatalog:
+    """
+    Iterable of (name, entry) pairs like CatalogLoader, over freshly
+    fetched element sets. By default every embedded NORAD ID is queried
+    (CATNR=...); `groups` queries whole CelesTrak groups instead (e.g.
+    "active"). Embedded metadata (category, operator, story) is joined by
+    NORAD ID, and embedded TLEs stand in for anything not fetched.
+    `stats` holds the fetch counters plus CatalogLoader's.
+    """
+
+    def __init__(self, norads=None, groups=None, ingestor=None, fallback=True):
+        self.ingestor = ingestor or TleIngestor()
+        self.norads = norads
+        self.groups = groups
+        self.fallback = fallback
+        self.stats = None
+        self.tle_epoch = None
+
+    def __iter__(self):
+        embedded_dir = os.path.join(self.ingestor.cache_dir, "embedded")
+        export_embedded(embedded_dir)
+        overlay = os.path.join(embedded_dir, "overlay.json")
+        if self.groups:
+            queries = [{"GROUP": g} for g in self.groups]
+        else:
+            norads = self.norads or [int(k) for k in _load_json(overlay)]
+            queries = [{"CATNR": n} for n in norads]
+
+        results = self.ingestor.fetch_sync(queries)
+        paths = [path for _, path in results.values() if path]
+        if self.fallback:
+            paths.append(os.path.join(embedded_dir, "catalog.tle"))  # last, so equal epochs keep the fetched set
+        loader = CatalogLoader(paths, overlay)
+        self.stats = {"fetch": self.ingestor.stats, "loader": loader.stats}
+        self.tle_epoch = (f"live ({urlsplit(self.ingestor.base_url).netloc}, "
+                          f"{datetime.now(timezone.utc).isoformat(timespec='minutes')})")
+        yield from loader
+
+
+# ============================================================
+# LOCAL STUB SERVER
+# ============================================================
+def serve_stub(slow=(), flaky=(), delay=5.0):
+    """
+    Start a GP-API stand-in on 127.0.0.1 serving the embedded TLEs by
+    CATNR, with ETag/Last-Modified validators and keep-alive. IDs in
+    `slow` answer after `delay` seconds; IDs in `flaky` fail their first
+    request with 503. Returns (server, base_url); stop with server.shutdown().
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs
+    from email.utils import formatdate
+    from catalog_loader import _with_checksum
+    from satellite_catalog import get_full_catalog
+
+    bodies = {d["norad"]: f"{n}\n{_with_checksum(d['tle1'])}\n{_with_checksum(d['tle2'])}\n".encode()
+              for n, d in get_full_catalog().items() if d.get("tle1")}
+    modified = formatdate(usegmt=True)
+    failed_once = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", headers=()):
+            self.send_response(status)
+            for k, v in headers:
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.server.requests += 1
+            query = parse_qs(urlsplit(self.path).query)
+            norad = int(query.get("CATNR", ["0"])[0])
+            if norad in flaky and norad not in failed_once:
+                failed_once.add(norad)
+                return self._send(503, b"busy", [("Retry-After", "0")])
+            if norad in slow:
+                time.sleep(delay)
+            body = bodies.get(norad, b"No GP data found\n")
+            etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers=[("ETag", etag)])
+            self._send(200, body, [("Content-Type", "text/plain"), ("ETag", etag), ("Last-Modified", modified)])
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+
+        def handle_error(self, request, client_address):
+            pass  # clients that time out hang up mid-response
+
+    server = Server(("127.0.0.1", 0), Handler)
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/NORAD/elements/gp.php"
+
+
+if __name__ == "__main__":
+    import argparse, tempfile
+
+    parser = argparse.ArgumentParser(description="Fetch live TLEs into the ingestion cache")
+    parser.add_argument("--url", default=CELESTRAK_GP, help="GP API endpoint (default: %(default)s)")
+    parser.add_argument("--group", action="append", help="fetch a whole CelesTrak group (repeatable)")
+    parser.add_argument("--cache-dir", default=INGEST_CACHE_DIR)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--stub", action="store_true",
+                        help="fetch twice from a local stub with slow and flaky objects, then check the results")
+    args = parser.parse_args()
+
+    if not args.stub:
+        source = LiveCatalog(groups=args.group, ingestor=TleIngestor(args.url, args.cache_dir, args.concurrency,
+                                                                      min_refresh_s=0))
+        count = sum(1 for _ in source)
+        print(f"\n  {count} satellites, {source.tle_epoch}\n  {source.stats}\n")
+    else:
+        # 25544 (ISS) stalls past the request timeout, 20580 (Hubble) gets one 503
+        server, url = serve_stub(slow={25544}, flaky={20580}, delay=3.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            for run in ("cold", "refresh"):
+                ingestor = TleIngestor(url, tmp, concurrency=4, timeout=1.0, retries=1, backoff=0.05,
+                                       deadline=10.0, min_refresh_s=0)
+                source = LiveCatalog(ingestor=ingestor)
+                t0 = time.perf_counter()
+                count = sum(1 for _ in source)
+                fetch = source.stats["fetch"]
+                print(f"  {run:8} {count} satellites in {time.perf_counter() - t0:.2f}s: "
+                      f"{fetch.get('modified', 0)} downloaded, {fetch.get('not_modified', 0)} unchanged, "
+                      f"{fetch.get('failed', 0) + fetch.get('stale', 0)} fell back, {fetch['retries']} retries, "
+                      f"{fetch['connections']} connections, {fetch['bytes']} bytes")
+                if run == "refresh":
+                    assert fetch.get("modified", 0) == 0 and fetch["bytes"] == 0, "refresh re-downloaded"
+                    assert fetch.get("failed", 0) == 1, "only the slow object should have fallen back"
+            # ISS is served only by the embedded fallback, every other ID by the stub
+            assert count == len(_load_json(os.path.join(tmp, "embedded", "overlay.json")))
+        server.shutdown()
+        print("  ✓ stub ingestion checks passed")
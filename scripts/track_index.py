@@ -0,0 +1,521 @@
+"""
+Orbital TrIP — Spatio-Temporal Ground-Track Index (trip-geo/1)
+Answers "which objects were over this box or polygon between T1 and T2,
+and when" without scanning every object's track.
+
+Sub-satellite points are sampled from the run's trip-eph/1 table, per
+band at a step short enough that the track never strays more than
+pad_deg (great-circle) from the nearest sample. Each run of consecutive
+samples in one lat/lon cell and one time bucket becomes a posting, keyed
+bucket-major on the cell's Morton code, so a quadtree cell at any level
+is one contiguous key range. A query:
+
+    1. covers the region's bounding box, dilated by pad_deg, with a few
+       quadtree blocks (Morton ranges), for every bucket in [T1, T2];
+    2. binary-searches each range in the sorted postings: the candidates
+       are the objects that had a sample near the region, with the time
+       around those samples;
+    3. re-evaluates only those windows on the Hermite orbit, at a fraction
+       of the sample step, tests the points against the region and
+       bisects the boundary crossings. Between two outside points the
+       track is split further only where its distance to the region's
+       bounding cap leaves room to clip it at the band's ground rate.
+
+The cost grows with the cover and the candidates, not with the catalog
+or the length of the history. Regions are lat/lon polygons with straight
+edges in degrees (longitudes may run past ±180 to cross the dateline).
+
+One index covers one run's window. TrackHistory keeps every run's index
+as a segment (the pipeline adds each run to <state_dir>/tracks), and a
+history query runs on the segments overlapping [T1, T2], the newest run
+answering where windows overlap.
+
+File layout (little-endian):
+    header    magic "TRIPGEO1", version, level, epoch_start, epoch_end,
+              bucket_s, pad_deg, n_objects, n_postings
+    objects   n_objects x (norad u4, sample_s f4)
+    postings  columns key u8[n] (bucket << 2*level | morton), object u4[n],
+              first i4[n], last i4[n] (sample times, seconds from
+              epoch_start), sorted by key; keys contiguous for the search
+
+Usage:
+    python3 track_index.py PATH|DIR [LAT0 LAT1 LON0 LON1 [T0 T1]]   # summary / box query (index or history)
+    python3 track_index.py --demo [N [HOURS]]                       # synthetic catalog, query timing
+"""
+
+import os, shutil, struct
+
+import numpy as np
+
+from keystore import _load_json, _write_json_atomic
+from ephemeris_table import EphemerisTable
+from array_utils import ragged_arange
+
+MAGIC = b"TRIPGEO1"
+VERSION = 1
+FORMAT = "trip-geo/1"
+TRACK_LEVEL = 6             # 64 x 64 cells of 5.6° lon x 2.8° lat at the finest level
+TRACK_BUCKET_S = 3600
+TRACK_PAD_DEG = 4.0         # max great-circle distance from the track to its nearest sample
+VERIFY_DIVISOR = 8          # verification points per sample step ...
+REFINE = 4                  # ... split further where the track could clip the region in between
+BISECTIONS = 7
+CAP_MARGIN_DEG = 0.25       # geodetic vs geocentric slack on the region's bounding cap
+EARTH_RATE = 7.2921159e-5   # rad/s, added to the inertial rate for the ground-track rate
+_BUILD_SAMPLES = 1 << 21    # samples x objects interpolated at once
+
+_HEADER = struct.Struct("<8sHBxqqIdIxxxxQ")    # 56 bytes: the u8 key column stays aligned
+_OBJECT = np.dtype([("norad", "<u4"), ("sample_s", "<f4")])
+_POSTING = np.dtype([("key", "<u8"), ("obj", "<u4"), ("first", "<i4"), ("last", "<i4")])
+
+
+# ============================================================
+# CELLS
+# ============================================================
+def _spread(x):
+    """Bits of x (< 2^16) moved to the even positions."""
+    x = np.asarray(x, dtype=np.uint64)
+    for shift, mask in ((8, 0x00FF00FF), (4, 0x0F0F0F0F), (2, 0x33333333), (1, 0x55555555)):
+        x = (x | (x << np.uint64(shift))) & np.uint64(mask)
+    return x
+
+
+def cell_xy(lat, lon, level):
+    """Cell column (longitude) and row (latitude) at `level`."""
+    n = 1 << level
+    x = np.floor((np.asarray(lon) + 180.0) % 360.0 / 360.0 * n).astype(np.int64)
+    y = np.floor((np.asarray(lat) + 90.0) / 180.0 * n).astype(np.int64)
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+
+def morton(x, y):
+    return _spread(x) | (_spread(y) << np.uint64(1))
+
+
+def _cover(x0, x1, y0, y1, level):
+    """
+    Inclusive Morton ranges of the quadtree blocks covering cells
+    [x0, x1] x [y0, y1]: whole blocks where they fit, merged when adjacent.
+    """
+    ranges, stack = [], [(0, 0, 0)]
+    while stack:
+        l, nx, ny = stack.pop()
+        size = 1 << (level - l)
+        bx0, by0 = nx * size, ny * size
+        bx1, by1 = bx0 + size - 1, by0 + size - 1
+        if bx1 < x0 or bx0 > x1 or by1 < y0 or by0 > y1:
+            continue
+        if (x0 <= bx0 and bx1 <= x1 and y0 <= by0 and by1 <= y1) or l == level:
+            lo = int(morton(nx, ny)) << 2 * (level - l)
+            ranges.append((lo, lo + size * size - 1))
+            continue
+        stack.extend((l + 1, 2 * nx + dx, 2 * ny + dy) for dy in (1, 0) for dx in (1, 0))
+    ranges.sort()
+    merged = []
+    for lo, hi in ranges:
+        if merged and lo == merged[-1][1] + 1:
+            merged[-1][1] = hi
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+def region_cover(polygon, pad_deg, level):
+    """Morton ranges covering a polygon's bounding box dilated by pad_deg (great-circle)."""
+    lat, lon = polygon[:, 0], polygon[:, 1]
+    lat0, lat1 = max(-90.0, lat.min() - pad_deg), min(90.0, lat.max() + pad_deg)
+    n = 1 << level
+    _, y0 = cell_xy(lat0, 0.0, level)
+    _, y1 = cell_xy(lat1, 0.0, level)
+    edge = max(abs(lat0), abs(lat1))
+    lon_pad = pad_deg / np.cos(np.radians(edge)) if edge < 89.0 else 360.0
+    lon0, lon1 = lon.min() - lon_pad, lon.max() + lon_pad
+    if lon1 - lon0 >= 360.0:
+        return _cover(0, n - 1, int(y0), int(y1), level)
+    x0, _ = cell_xy(0.0, lon0, level)
+    x1, _ = cell_xy(0.0, lon1, level)
+    if x0 <= x1:
+        return _cover(int(x0), int(x1), int(y0), int(y1), level)
+    return _cover(0, int(x1), int(y0), int(y1), level) + _cover(int(x0), n - 1, int(y0), int(y1), level)
+
+
+def box(lat_min, lat_max, lon_min, lon_max):
+    """A lat/lon box as a polygon; lon_max may exceed 180 to cross the dateline."""
+    return [(lat_min, lon_min), (lat_min, lon_max), (lat_max, lon_max), (lat_max, lon_min)]
+
+
+def in_polygon(lat, lon, polygon):
+    """Even-odd test of points against a lat/lon polygon, trying lon and lon ± 360."""
+    plat, plon = polygon[:, 0], polygon[:, 1]
+    qlat, qlon = np.roll(plat, 1), np.roll(plon, 1)
+    inside = np.zeros(np.shape(lat), dtype=bool)
+    for shift in (0.0, 360.0, -360.0):
+        x, y = (np.asarray(lon) + shift)[..., None], np.asarray(lat)[..., None]
+        spans = (plat > y) != (qlat > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cross = x < (qlon - plon) * (y - plat) / (qlat - plat) + plon
+        inside |= (np.count_nonzero(spans & cross, axis=-1) % 2).astype(bool)
+    return inside
+
+
+def _unit(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def region_cap(polygon):
+    """Spherical cap (unit centre, radius in rad) holding the polygon, edges included."""
+    u = np.linspace(0.0, 1.0, 17)[:-1, None]
+    plat, plon = polygon[:, 0], polygon[:, 1]
+    edges = _unit(plat + u * (np.roll(plat, -1) - plat), plon + u * (np.roll(plon, -1) - plon)).reshape(-1, 3)
+    centre = edges.sum(axis=0)
+    norm = np.linalg.norm(centre)
+    if norm < 1e-9:
+        return np.array([0.0, 0.0, 1.0]), np.pi
+    centre /= norm
+    return centre, float(np.arccos(np.clip(edges @ centre, -1, 1)).max()) + np.radians(CAP_MARGIN_DEG)
+
+
+# ============================================================
+# BUILD
+# ============================================================
+def build_track_index(eph_path, path, level=TRACK_LEVEL, bucket_s=TRACK_BUCKET_S, pad_deg=TRACK_PAD_DEG):
+    """
+    Write a trip-geo/1 index for every object of the trip-eph/1 table at
+    `eph_path`; returns the header block for the pipeline output.
+    """
+    table = EphemerisTable(eph_path)
+    span = table.epoch_end - table.epoch_start
+    objects, postings = [], []
+    for band in table.bands:
+        state, norads = band["state"], band["norads"]
+        if not len(norads):
+            continue
+        # Sample step from the band's fastest ground-track rate (|v|/|r| + Earth's)
+        r, v = state[..., :3], state[..., 3:]
+        rate = np.nanmax(np.linalg.norm(v, axis=-1) / np.linalg.norm(r, axis=-1)) + EARTH_RATE
+        step = float(min(band["step"], max(1.0, np.floor(2 * np.radians(pad_deg) / rate))))
+        times = table.epoch_start + np.arange(0.0, span + 1e-9, step)
+        if times[-1] < table.epoch_end:
+            times = np.append(times, float(table.epoch_end))
+        offsets = np.rint(times - table.epoch_start).astype(np.int64)
+        buckets = (offsets // bucket_s).astype(np.uint64) << np.uint64(2 * level)
+
+        base = len(objects)
+        objects.extend((int(n), step) for n in norads)
+        chunk = max(1, _BUILD_SAMPLES // len(times))
+        for lo in range(0, len(norads), chunk):
+            ids = norads[lo:lo + chunk]
+            pos = table.positions_at(np.broadcast_to(ids, (len(times), len(ids))).ravel(),
+                                     np.repeat(times, len(ids)))
+            lat, lon = pos["lat"].reshape(len(times), -1).T, pos["lon"].reshape(len(times), -1).T
+            keys = buckets + morton(*cell_xy(np.nan_to_num(lat), np.nan_to_num(lon), level))
+            ok = np.isfinite(lat)
+
+            # One posting per run of samples with the same key
+            starts = ok & np.concatenate([np.ones((len(ids), 1), dtype=bool),
+                                          (keys[:, 1:] != keys[:, :-1]) | ~ok[:, :-1]], axis=1)
+            ends = ok & np.concatenate([(keys[:, 1:] != keys[:, :-1]) | ~ok[:, 1:],
+                                        np.ones((len(ids), 1), dtype=bool)], axis=1)
+            so, sk = np.nonzero(starts)
+            _, ek = np.nonzero(ends)
+            found = np.empty(len(so), dtype=_POSTING)
+            found["key"], found["obj"] = keys[so, sk], base + lo + so
+            found["first"], found["last"] = offsets[sk], offsets[ek]
+            postings.append(found)
+
+    postings = np.concatenate(postings) if postings else np.zeros(0, dtype=_POSTING)
+    postings = postings[np.lexsort((postings["first"], postings["obj"], postings["key"]))]
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, level, table.epoch_start, table.epoch_end, bucket_s, pad_deg,
+                             len(objects), len(postings)))
+        f.write(np.array(objects, dtype=_OBJECT).tobytes())
+        for name in _POSTING.names:
+            f.write(np.ascontiguousarray(postings[name]).tobytes())
+    os.replace(tmp, path)
+    return {"file": os.path.basename(path), "format": FORMAT, "ephemeris": os.path.basename(eph_path),
+            "level": level, "bucket_s": bucket_s, "pad_deg": pad_deg,
+            "objects": len(objects), "postings": len(postings)}
+
+
+# ============================================================
+# QUERY
+# ============================================================
+class TrackIndex:
+    """
+    Memory-mapped trip-geo/1 reader over its trip-eph/1 table (by default
+    the .eph beside it); a query touches only the postings it covers.
+    """
+
+    def __init__(self, path, ephemeris=None):
+        with open(path, "rb") as f:
+            magic, version, self.level, self.epoch_start, self.epoch_end, self.bucket_s, self.pad_deg, \
+                n_objects, n_postings = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a {FORMAT} file")
+        self.objects = np.fromfile(path, dtype=_OBJECT, count=n_objects, offset=_HEADER.size)
+        offset = _HEADER.size + n_objects * _OBJECT.itemsize
+        self.postings = {}
+        for name, dtype in _POSTING.descr:
+            self.postings[name] = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(n_postings,)) \
+                if n_postings else np.zeros(0, dtype=dtype)
+            offset += n_postings * np.dtype(dtype).itemsize
+        self.keys = self.postings["key"]
+        self.table = EphemerisTable(ephemeris or os.path.splitext(path)[0] + ".eph")
+        if (self.table.epoch_start, self.table.epoch_end) != (self.epoch_start, self.epoch_end):
+            raise ValueError(f"{path}: ephemeris table covers a different window")
+
+    def candidates(self, polygon, t0, t1):
+        """Postings (obj, first, last columns) in the dilated region's key ranges for [t0, t1]."""
+        ranges = np.array(region_cover(polygon, self.pad_deg, self.level), dtype=np.uint64).reshape(-1, 2)
+        b0, b1 = (int(t0) - self.epoch_start) // self.bucket_s, (int(t1) - self.epoch_start) // self.bucket_s
+        buckets = np.arange(b0, b1 + 1, dtype=np.uint64)[:, None] << np.uint64(2 * self.level)
+        lo = np.searchsorted(self.keys, (buckets + ranges[:, 0]).ravel(), "left")
+        hi = np.searchsorted(self.keys, (buckets + ranges[:, 1]).ravel(), "right")
+        rows = np.sort(ragged_arange(lo, hi - lo))
+        return {name: column[rows] for name, column in self.postings.items() if name != "key"}
+
+    def query(self, polygon, t0=None, t1=None):
+        """
+        Objects over `polygon` ([(lat, lon), ...], see box()) between Unix
+        times t0 and t1 (default: the whole window), as {norad: [[enter,
+        leave], ...]} with intervals clipped to [t0, t1].
+        """
+        polygon = np.asarray(polygon, dtype=np.float64)
+        t0 = self.epoch_start if t0 is None else max(float(t0), self.epoch_start)
+        t1 = self.epoch_end if t1 is None else min(float(t1), self.epoch_end)
+        if t1 < t0 or not len(self.keys):
+            return {}
+        found = self.candidates(polygon, t0, t1)
+
+        # Verification windows: a sample step either side of each run, merged per object
+        obj = found["obj"].astype(np.int64)
+        step = self.objects["sample_s"][obj].astype(np.float64)
+        w0 = np.maximum(self.epoch_start + found["first"] - step, t0)
+        w1 = np.minimum(self.epoch_start + found["last"] + step, t1)
+        order = np.flatnonzero(w0 <= w1)
+        order = order[np.lexsort((w0[order], obj[order]))]
+        obj, w0, w1, step = obj[order], w0[order], w1[order], step[order]
+        scale = t1 - t0 + 1.0                    # object-major running max of the window ends
+        reach = np.maximum.accumulate(obj * scale + (w1 - t0))
+        new = np.r_[True, obj[1:] * scale + (w0[1:] - t0) > reach[:-1]] if len(obj) else np.zeros(0, dtype=bool)
+        starts = np.flatnonzero(new)
+        if not len(starts):
+            return {}
+        obj, w0, w1 = obj[starts], w0[starts], np.maximum.reduceat(w1, starts)
+        step = step[starts]
+        dt = step / VERIFY_DIVISOR
+        rate = 2 * np.radians(self.pad_deg) / step     # ground-rate bound the sample step was cut for
+
+        # Points every dt across each window (its end included), tested against the region
+        counts = np.floor((w1 - w0) / dt).astype(np.int64) + 2
+        win = np.repeat(np.arange(len(obj)), counts)
+        times = np.minimum(w0[win] + ragged_arange(np.zeros(len(obj), dtype=np.int64), counts) * dt[win], w1[win])
+        norads = self.objects["norad"][obj].astype(np.int64)
+        centre, radius = region_cap(polygon)
+
+        def inside(ids, t):
+            pos = self.table.positions_at(ids, t)
+            return in_polygon(pos["lat"], pos["lon"], polygon), pos
+
+        hit, pos = inside(norads[win], times)
+
+        # Outside pairs whose distances to the cap sum to less than the track can cover between them
+        gap = np.maximum(np.arccos(np.clip(_unit(pos["lat"], pos["lon"]) @ centre, -1, 1)) - radius, 0.0)
+        span = np.diff(times)
+        near = np.flatnonzero((win[1:] == win[:-1]) & ~hit[:-1] & ~hit[1:]
+                              & (gap[:-1] + gap[1:] <= rate[win[:-1]] * span))
+        if len(near):
+            extra = (times[near, None] + span[near, None] * np.arange(1, REFINE) / REFINE).ravel()
+            extra_win = np.repeat(win[near], REFINE - 1)
+            times, win = np.concatenate([times, extra]), np.concatenate([win, extra_win])
+            hit = np.concatenate([hit, inside(norads[extra_win], extra)[0]])
+            order = np.lexsort((times, win))
+            times, win, hit = times[order], win[order], hit[order]
+        first = np.r_[True, win[1:] != win[:-1]]
+        last = np.r_[win[1:] != win[:-1], True]
+        enter = np.flatnonzero(hit & (first | ~np.r_[False, hit[:-1]]))
+        leave = np.flatnonzero(hit & (last | ~np.r_[hit[1:], False]))
+
+        # Bisect each crossing between its outside and inside neighbours
+        def bisect(idx, outside, inner):
+            a, b = times[outside].copy(), times[inner].copy()     # a out, b in
+            ids = norads[win[idx]]
+            for _ in range(BISECTIONS):
+                mid = (a + b) / 2
+                now = inside(ids, mid)[0]
+                a, b = np.where(now, a, mid), np.where(now, mid, b)
+            return b
+
+        t_enter, t_leave = times[enter], times[leave]
+        inner = ~first[enter]
+        t_enter[inner] = bisect(enter[inner], enter[inner] - 1, enter[inner])
+        inner = ~last[leave]
+        t_leave[inner] = bisect(leave[inner], leave[inner] + 1, leave[inner])
+
+        result = {}
+        for norad, a, b in zip(norads[win[enter]].tolist(), t_enter.tolist(), t_leave.tolist()):
+            result.setdefault(norad, []).append([a, b])
+        return result
+
+    def stats(self):
+        return {"format": FORMAT, "objects": len(self.objects), "postings": len(self.keys),
+                "level": self.level, "bucket_s": self.bucket_s, "pad_deg": self.pad_deg,
+                "window": [self.epoch_start, self.epoch_end]}
+
+
+# ============================================================
+# HISTORY
+# ============================================================
+class TrackHistory:
+    """
+    Every run's .geo/.eph pair kept as a segment under one directory, so
+    a query spans the whole history rather than the last window. add()
+    hard-links (or copies) a run's files in as <epoch_start>.geo/.eph and
+    rewrites manifest.json atomically; files it does not list are
+    leftovers of an interrupted run and are removed. Run windows overlap,
+    and the newer run's tracks (fresher TLEs) win: segment i answers for
+    [start_i, start_i+1], the last one up to its end.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.segments = _load_json(self.manifest_path).get("segments", [])   # by start, newest last
+        self._open = {}
+
+    def _index(self, segment):
+        if segment["file"] not in self._open:
+            self._open[segment["file"]] = TrackIndex(os.path.join(self.root, segment["file"]))
+        return self._open[segment["file"]]
+
+    def add(self, path, ephemeris=None):
+        """Add one run's trip-geo/1 index (and its .eph, by default beside it); returns stats()."""
+        index = TrackIndex(path, ephemeris)
+        name = str(index.epoch_start)
+        os.makedirs(self.root, exist_ok=True)
+        for src, ext in ((path, ".geo"), (ephemeris or os.path.splitext(path)[0] + ".eph", ".eph")):
+            tmp = os.path.join(self.root, f"{name}{ext}.tmp.{os.getpid()}")
+            try:
+                os.link(src, tmp)
+            except OSError:
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, os.path.join(self.root, name + ext))
+        # A run starting at or before a kept one supersedes it from there on
+        self.segments = [s for s in self.segments if s["start"] < index.epoch_start]
+        self.segments.append({"file": name + ".geo", "start": index.epoch_start, "end": index.epoch_end,
+                              "objects": len(index.objects), "postings": len(index.keys)})
+        self._open.clear()
+        _write_json_atomic(self.manifest_path, {"format": FORMAT, "segments": self.segments})
+        listed = {s["file"] for s in self.segments} | {s["file"][:-4] + ".eph" for s in self.segments}
+        for leftover in set(os.listdir(self.root)) - listed - {"manifest.json"}:
+            os.remove(os.path.join(self.root, leftover))
+        return self.stats()
+
+    def query(self, polygon, t0=None, t1=None):
+        """TrackIndex.query() over every segment, intervals merged across segment boundaries."""
+        found = {}
+        for i, segment in enumerate(self.segments):
+            end = self.segments[i + 1]["start"] if i + 1 < len(self.segments) else segment["end"]
+            a = segment["start"] if t0 is None else max(float(t0), segment["start"])
+            b = min(end, segment["end"]) if t1 is None else min(float(t1), end, segment["end"])
+            if a > b:
+                continue
+            for norad, intervals in self._index(segment).query(polygon, a, b).items():
+                found.setdefault(norad, []).extend(intervals)
+        result = {}
+        for norad, intervals in found.items():
+            merged = result[norad] = []
+            for a, b in sorted(intervals):
+                if merged and a <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], b)
+                else:
+                    merged.append([a, b])
+        return result
+
+    def stats(self):
+        return {"format": FORMAT, "segments": len(self.segments),
+                "postings": sum(s["postings"] for s in self.segments),
+                "window": [self.segments[0]["start"], self.segments[-1]["end"]] if self.segments else None}
+
+
+if __name__ == "__main__":
+    import sys, tempfile, time
+    from datetime import datetime, timezone
+
+    def iso(t):
+        return datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    if len(sys.argv) < 2:
+        sys.exit(__doc__[__doc__.index("Usage:"):].rstrip())
+
+    if sys.argv[1:2] == ["--demo"]:
+        from synthetic_catalog import synthetic_catalog
+        from ephemeris_table import build_ephemeris
+        from orbital_trip_pipeline_v2 import PROPAGATION_END
+
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+        hours = float(sys.argv[3]) if len(sys.argv) > 3 else 240
+        tles, norads = [], {}
+        for name, entry in synthetic_catalog(count):
+            tles.append((name, entry["tle1"], entry["tle2"]))
+            norads[name] = entry["norad"]
+        with tempfile.TemporaryDirectory() as tmp:
+            eph, geo = os.path.join(tmp, "demo.eph"), os.path.join(tmp, "demo.geo")
+            t0 = time.perf_counter()
+            build_ephemeris(tles, norads, eph, PROPAGATION_END, hours)
+            t1 = time.perf_counter()
+            info = build_track_index(eph, geo)
+            t2 = time.perf_counter()
+            index = TrackIndex(geo)
+            print(f"\n  {count} objects over {hours:g} h: ephemeris {t1 - t0:.1f}s, index {t2 - t1:.1f}s, "
+                  f"{info['postings']} postings ({os.path.getsize(geo) >> 20} MB)")
+
+            # Random boxes and windows, against a brute-force scan of every object
+            rng = np.random.default_rng(3)
+            table, waits, missed, total = index.table, [], 0, 0
+            for _ in range(20):
+                lat0, lon0 = rng.uniform(-60, 50), rng.uniform(-180, 170)
+                region = np.array(box(lat0, lat0 + rng.uniform(2, 10), lon0, lon0 + rng.uniform(2, 10)))
+                q0 = rng.uniform(table.epoch_start, table.epoch_end - 6 * 3600)
+                q1 = q0 + rng.uniform(600, 6 * 3600)
+                t = time.perf_counter()
+                hits = index.query(region, q0, q1)
+                waits.append(time.perf_counter() - t)
+                ids = np.array(table.norads)
+                for tq in np.arange(q0, q1, 10.0):
+                    snap = table.positions_at_all(tq, geodetic=True)
+                    for n in snap["norad"][in_polygon(snap["lat"], snap["lon"], region)].tolist():
+                        total += 1
+                        if not any(a - 1 <= tq <= b + 1 for a, b in hits.get(n, ())):
+                            missed += 1
+            waits = np.array(waits) * 1e3
+            print(f"  20 random box queries (2-10°, 10 min - 6 h): median {np.median(waits):.2f} ms, "
+                  f"max {waits.max():.2f} ms")
+            print(f"  vs 10 s brute-force scan of all {len(ids)} objects: {missed} of {total} "
+                  f"in-region samples outside the returned intervals\n")
+        sys.exit()
+
+    index = TrackHistory(sys.argv[1]) if os.path.isdir(sys.argv[1]) else TrackIndex(sys.argv[1])
+    info = index.stats()
+    if len(sys.argv) > 5:
+        region = box(*map(float, sys.argv[2:6]))
+        q0, q1 = (float(sys.argv[6]), float(sys.argv[7])) if len(sys.argv) > 7 else (None, None)
+        t = time.perf_counter()
+        hits = index.query(region, q0, q1)
+        print(f"  {len(hits)} objects in {(time.perf_counter() - t) * 1e3:.2f} ms")
+        for norad, intervals in sorted(hits.items()):
+            for a, b in intervals:
+                print(f"  {norad:6d}  {iso(a)} .. {iso(b)}  ({b - a:7.1f}s)")
+    elif isinstance(index, TrackHistory):
+        print(f"  {FORMAT} history: {info['segments']} runs, {info['postings']} postings"
+              + (f", {iso(info['window'][0])} .. {iso(info['window'][1])}" if info["window"] else ""))
+        for s in index.segments:
+            print(f"  {s['file']:16} {iso(s['start'])} .. {iso(s['end'])}  {s['objects']:6d} objects  "
+                  f"{s['postings']:9d} postings")
+    else:
+        print(f"  {FORMAT}: {info['objects']} objects, {info['postings']} postings, level {info['level']}, "
+              f"{info['bucket_s']}s buckets, pad {info['pad_deg']:g}°, {iso(info['window'][0])} .. "
+              f"{iso(info['window'][1])}")
+
@@ -0,0 +1,214 @@
+"""
+Orbital TrIP — Breadcrumb Chain Verification
+Re-hashes every breadcrumb, checks index/key/prev-hash linkage and
+verifies the full Ed25519 signature. verify_extension() checks a
+run's new crumbs together with the archived crumbs up to the stored head. verify_catalog() spreads chains
+over a process pool with early-exit, streaming and time-budget modes so
+a whole catalog can be audited each refresh.
+
+Usage:
+    python3 verification.py [--workers N]   # self-check + throughput
+"""
+
+import hashlib, time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from nacl.exceptions import BadSignatureError
+from nacl.signing import VerifyKey
+
+from breadcrumb_codec import ENCODING_BINARY, GENESIS_PREV, canonical_bytes, decode_signature
+
+
+# ============================================================
+# SINGLE CHAIN
+# ============================================================
+def verify_chain(chain, public_key, encoding=ENCODING_BINARY, prev=GENESIS_PREV, start_index=0,
+                 fail_fast=True):
+    """
+    Verify a breadcrumb chain segment signed by `public_key` (hex).
+    `prev`/`start_index` describe where the segment attaches: genesis
+    for a full chain, the stored head for an incremental extension.
+
+    Returns {"ok", "checked", "valid", "errors"} where `valid` counts
+    crumbs before the first failure and `errors` lists (i, reason).
+    """
+    verify_key = VerifyKey(bytes.fromhex(public_key))
+    checked, valid, errors = 0, 0, []
+
+    for k, crumb in enumerate(chain):
+        checked += 1
+        reason = None
+        if crumb["i"] != start_index + k:
+            reason = f"index {crumb['i']} != {start_index + k}"
+        elif crumb["id"] != public_key:
+            reason = "key mismatch"
+        elif crumb["prev"] != prev:
+            reason = "broken linkage"
+        else:
+            content = canonical_bytes(crumb, encoding)
+            if hashlib.sha256(content).hexdigest() != crumb["hash"]:
+                reason = "hash mismatch"
+            else:
+                try:
+                    verify_key.verify(content, decode_signature(crumb["sig"]))
+                except (BadSignatureError, ValueError) as e:
+                    reason = f"bad signature: {e}" if isinstance(e, ValueError) else "bad signature"
+
+        if reason:
+            errors.append((crumb["i"], reason))
+            if fail_fast:
+                break
+        elif not errors:
+            valid += 1
+        prev = crumb["hash"]
+
+    return {"ok": not errors, "checked": checked, "valid": valid, "errors": errors}
+
+
+def integrity_score(result, weight=10.0):
+    """
+    Integrity component: share of the checked crumbs that verified before
+    any failure. Nothing checked (or no result) earns nothing.
+    """
+    if not result or not result["checked"]:
+        return 0.0
+    return float(weight) * result["valid"] / result["checked"]
+
+
+def verify_extension(segment, public_key, encoding, start, anchor=None, carried=None):
+    """
+    Verify a chain extension (`segment`, attached at `start` = {i, prev})
+    against what was persisted before it, so integrity is not just a
+    re-check of crumbs this process signed:
+
+    - `anchor`: the archived crumbs up to the stored head (CrumbStore.tail).
+      They are re-verified from the archive together with the segment, and
+      the last one must hash to the stored head the segment links to.
+    - `carried`: the stored [checked, valid] of the last verification. It
+      stands in when there is no archive and nothing new to check.
+    """
+    if anchor and start["i"]:
+        result = verify_chain(list(anchor) + list(segment), public_key, encoding, prev=anchor[0]["prev"],
+                              start_index=anchor[0]["i"])
+        if anchor[-1]["hash"] != start["prev"]:
+            result.update(ok=False, valid=0, errors=[(anchor[-1]["i"], "stored head not in archive")] + result["errors"])
+        return result
+    result = verify_chain(segment, public_key, encoding, prev=start["prev"], start_index=start["i"])
+    if not result["checked"] and start["i"] and carried:
+        checked, valid = carried
+        result = {"ok": valid == checked, "checked": checked, "valid": valid, "errors": [], "carried": True}
+    return result
+
+
+# ============================================================
+# CATALOG
+# ============================================================
+def _verify_job(job):
+    key, chain, public_key, encoding, prev, start_index, fail_fast = job
+    try:
+        return key, verify_chain(chain, public_key, encoding, prev, start_index, fail_fast)
+    except Exception as e:
+        return key, {"ok": False, "checked": 0, "valid": 0, "errors": [(None, f"{type(e).__name__}: {e}")]}
+
+
+def _verify_chunk(jobs):
+    return [_verify_job(job) for job in jobs]
+
+
+def iter_verify_catalog(chains, workers=1, fail_fast=True, stop_on_failure=False, budget_s=None,
+                        chunk_size=32):
+    """
+    Stream (key, result) pairs for `chains`, an iterable of dicts with
+    key/chain/public_key and optional encoding/prev/start_index.
+
+    With workers > 1 chains are verified in chunks of `chunk_size` on a
+    process pool; results still come back in input order.
+    stop_on_failure ends the stream after the first invalid chain;
+    budget_s stops dispatching new chains once the time budget is spent
+    (remaining chains are yielded with result None).
+    """
+    deadline = time.monotonic() + budget_s if budget_s else None
+    jobs = [
+        (c["key"], c["chain"], c["public_key"], c.get("encoding", ENCODING_BINARY),
+         c.get("prev", GENESIS_PREV), c.get("start_index", 0), fail_fast)
+        for c in chains
+    ]
+
+    if workers <= 1:
+        for job in jobs:
+            if deadline and time.monotonic() > deadline:
+                yield job[0], None
+                continue
+            key, result = _verify_job(job)
+            yield key, result
+            if stop_on_failure and not result["ok"]:
+                return
+        return
+
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_verify_chunk, chunk) for chunk in chunks]
+
+        for i, (chunk, future) in enumerate(zip(chunks, futures)):
+            timeout = max(0, deadline - time.monotonic()) if deadline else None
+            try:
+                results = future.result(timeout=timeout)
+            except FutureTimeout:
+                for f in futures[i:]:
+                    f.cancel()
+                for job in (job for c in chunks[i:] for job in c):
+                    yield job[0], None
+                return
+            for key, result in results:
+                yield key, result
+                if stop_on_failure and not result["ok"]:
+                    for f in futures[i + 1:]:
+                        f.cancel()
+                    return
+
+
+def verify_catalog(chains, workers=1, fail_fast=True, stop_on_failure=False, budget_s=None):
+    """
+    Verify many chains and summarize. Returns
+    {"results": {key: result|None}, "verified", "invalid", "skipped", "seconds"}.
+    """
+    t0 = time.perf_counter()
+    results = dict(iter_verify_catalog(chains, workers, fail_fast, stop_on_failure, budget_s))
+    return {
+        "results": results,
+        "verified": sum(1 for r in results.values() if r and r["ok"]),
+        "invalid": sum(1 for r in results.values() if r and not r["ok"]),
+        "skipped": sum(1 for r in results.values() if r is None),
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from nacl.signing import SigningKey
+    from satellite_catalog import get_full_catalog
+    from propagation import propagate_catalog, positions_from_batch
+    from orbital_trip_pipeline_v2 import (generate_breadcrumb_chain, PROPAGATION_END,
+                                          PROPAGATION_HOURS, INTERVAL_MINUTES)
+
+    parser = argparse.ArgumentParser(description="Chain verification self-check")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    catalog = get_full_catalog()
+    batch = propagate_catalog([(n, d["tle1"], d["tle2"]) for n, d in catalog.items()],
+                              PROPAGATION_END, PROPAGATION_HOURS, INTERVAL_MINUTES)
+    chains = []
+    for name, positions in positions_from_batch(batch):
+        trip = generate_breadcrumb_chain(name, positions, SigningKey.generate())
+        chains.append({"key": name, "chain": trip["chain"], "public_key": trip["public_key"]})
+
+    # Tamper with one crumb: must be caught
+    chains[0]["chain"][3]["alt"] += 0.1
+
+    summary = verify_catalog(chains, workers=args.workers)
+    crumbs = sum(len(c["chain"]) for c in chains)
+    bad = [k for k, r in summary["results"].items() if r and not r["ok"]]
+    print(f"\n  ✓ {summary['verified']} chains valid, {summary['invalid']} invalid ({', '.join(bad)})")
+    print(f"  ✓ {crumbs:,} crumbs in {summary['seconds']}s "
+          f"({crumbs / summary['seconds']:,.0f} crumbs/s, {args.workers} worker(s))\n")